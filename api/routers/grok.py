@@ -1,21 +1,47 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from typing import Optional, Dict, Any, List
+from pathlib import Path
 from pydantic import BaseModel
 from services.grok_service import GrokService
 from services.session_manager import SessionManager
-from models.response_models import GenerationResponse
+from services.browser_pool import get_browser_pool
+from services.session_registry import has_usable_session
+from services.completion_detector import completion_stats
+from services.media_capture import capture_stats
+from services.selector_cache import get_selector_cache
+from services.resource_blocking import blocking_stats
+from services.readiness import readiness_stats
+from services.result_cache import get_result_cache
+from services.single_flight import generation_flights
+from services.job_queue import GenerationJobQueue, get_job_queue, job_event
+from models.response_models import (
+    GenerationResponse, JobStatus, JobStatusResponse, BatchItemResult, BatchGenerationResponse
+)
+from utils.error_handling import ErrorHandler, QueueFullError
+from config import config
 import logging
+import asyncio
+import json
 
 router = APIRouter()
 
 class ImageGenerationRequest(BaseModel):
     prompt: str
     timeout: Optional[int] = 300
+    bypass_cache: bool = False
 
 class VideoGenerationRequest(BaseModel):
     prompt: str
     timeout: Optional[int] = 600
+    bypass_cache: bool = False
+
+class ImageBatchRequest(BaseModel):
+    prompts: List[str]
+    timeout: Optional[int] = 300
+    concurrency: Optional[int] = None
+    stream: bool = False
+    bypass_cache: bool = False
 
 @router.post("/image", response_model=GenerationResponse)
 async def generate_image(
@@ -27,10 +53,10 @@ async def generate_image(
     """
     try:
         session_manager = SessionManager()
-        grok_service = GrokService(session_manager)
+        grok_service = GrokService(session_manager, get_browser_pool())
         
         # Check if we have a valid session
-        if not session_manager.has_valid_session():
+        if not has_usable_session(session_manager):
             raise HTTPException(
                 status_code=401,
                 detail="No valid session. Please login first."
@@ -39,11 +65,16 @@ async def generate_image(
         # Generate image in background
         result = await grok_service.generate_image(
             request.prompt,
-            request.timeout
+            request.timeout,
+            bypass_cache=request.bypass_cache
         )
         
         return result
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise ErrorHandler.handle_exception(e)
     except Exception as e:
         logging.error(f"Image generation failed: {str(e)}")
         raise HTTPException(
@@ -51,6 +82,86 @@ async def generate_image(
             detail=f"Image generation failed: {str(e)}"
         )
 
+@router.post("/image/batch", response_model=BatchGenerationResponse)
+async def generate_image_batch(request: ImageBatchRequest):
+    """
+    Generate images for a list of prompts with bounded parallelism.
+    
+    Each worker reuses one warm tab for its share of the prompts. Returns
+    all per-item results at once, or with "stream": true one NDJSON line per
+    item as soon as it completes.
+    """
+    if not request.prompts:
+        raise HTTPException(status_code=400, detail="No prompts given")
+    if len(request.prompts) > config.BATCH_MAX_PROMPTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many prompts ({len(request.prompts)}), at most {config.BATCH_MAX_PROMPTS} per batch"
+        )
+    
+    session_manager = SessionManager()
+    if not has_usable_session(session_manager):
+        raise HTTPException(
+            status_code=401,
+            detail="No valid session. Please login first."
+        )
+    
+    grok_service = GrokService(session_manager, get_browser_pool())
+    items = grok_service.generate_image_batch(
+        request.prompts,
+        request.timeout or 300,
+        request.concurrency,
+        request.bypass_cache
+    )
+    
+    def item_result(index: int, result: GenerationResponse) -> BatchItemResult:
+        return BatchItemResult(index=index, prompt=request.prompts[index], **result.model_dump())
+    
+    if request.stream:
+        # Pull the first item before the 200 goes out, so a saturated pool
+        # still answers 429 instead of an empty stream
+        try:
+            first = await items.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except QueueFullError as e:
+            raise ErrorHandler.handle_exception(e)
+        except Exception as e:
+            logging.error(f"Batch generation failed: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Batch generation failed: {str(e)}"
+            )
+        
+        async def ndjson_stream():
+            if first is None:
+                return
+            yield item_result(*first).model_dump_json() + "\n"
+            try:
+                async for index, result in items:
+                    yield item_result(index, result).model_dump_json() + "\n"
+            except Exception as e:
+                # Headers are sent; end the stream with an error line the client can see
+                logging.error(f"Batch generation failed mid-stream: {str(e)}")
+                yield json.dumps({"error": f"Batch generation failed: {str(e)}"}) + "\n"
+        
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+    
+    try:
+        results = [item_result(index, result) async for index, result in items]
+    except QueueFullError as e:
+        raise ErrorHandler.handle_exception(e)
+    except Exception as e:
+        logging.error(f"Batch generation failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch generation failed: {str(e)}"
+        )
+    
+    results.sort(key=lambda r: r.index)
+    succeeded = sum(1 for r in results if r.success)
+    return BatchGenerationResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
 @router.post("/video", response_model=GenerationResponse)
 async def generate_video(
     request: VideoGenerationRequest,
@@ -61,10 +172,10 @@ async def generate_video(
     """
     try:
         session_manager = SessionManager()
-        grok_service = GrokService(session_manager)
+        grok_service = GrokService(session_manager, get_browser_pool())
         
         # Check if we have a valid session
-        if not session_manager.has_valid_session():
+        if not has_usable_session(session_manager):
             raise HTTPException(
                 status_code=401,
                 detail="No valid session. Please login first."
@@ -73,14 +184,178 @@ async def generate_video(
         # Generate video in background
         result = await grok_service.generate_video(
             request.prompt,
-            request.timeout
+            request.timeout,
+            bypass_cache=request.bypass_cache
         )
         
         return result
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise ErrorHandler.handle_exception(e)
     except Exception as e:
         logging.error(f"Video generation failed: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Video generation failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/pool")
+async def browser_pool_status():
+    """
+    Get the status of the shared browser pool
+    """
+    pool = get_browser_pool()
+    if pool is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **pool.stats()}
+
+@router.get("/stats")
+async def generation_stats():
+    """
+    Get generation statistics: how completions were detected, how results
+    were saved, how often learned selectors matched first, how many
+    requests the blocking profiles aborted and how long each call site
+    waited for its page to become ready
+    """
+    return {
+        "completion": completion_stats.snapshot(),
+        "capture": capture_stats.snapshot(),
+        "selectors": get_selector_cache().stats(),
+        "blocking": blocking_stats.snapshot(),
+        "readiness": readiness_stats.snapshot(),
+        "result_cache": get_result_cache().stats(),
+        "coalescing": generation_flights.stats(),
+    }
+
+
+# ==================== Asynchronous Job Endpoints ====================
+
+def _running_job_queue() -> GenerationJobQueue:
+    job_queue = get_job_queue()
+    if job_queue is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue is not running"
+        )
+    return job_queue
+
+def _submit_job(
+    content_type: str,
+    prompt: str,
+    timeout: Optional[int],
+    bypass_cache: bool = False
+) -> Dict[str, Any]:
+    job_queue = _running_job_queue()
+    
+    session_manager = SessionManager()
+    if not has_usable_session(session_manager):
+        raise HTTPException(
+            status_code=401,
+            detail="No valid session. Please login first."
+        )
+    
+    try:
+        return job_queue.submit(content_type, prompt, timeout or config.GENERATION_TIMEOUT, bypass_cache)
+    except QueueFullError as e:
+        raise ErrorHandler.handle_exception(e)
+
+@router.post("/jobs/image", response_model=JobStatusResponse, status_code=202)
+async def submit_image_job(request: ImageGenerationRequest):
+    """
+    Queue an image generation and return immediately with a job id to poll
+    """
+    return _submit_job("image", request.prompt, request.timeout, request.bypass_cache)
+
+@router.post("/jobs/video", response_model=JobStatusResponse, status_code=202)
+async def submit_video_job(request: VideoGenerationRequest):
+    """
+    Queue a video generation and return immediately with a job id to poll
+    """
+    return _submit_job("video", request.prompt, request.timeout, request.bypass_cache)
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """
+    Get the status, progress and result file path of a generation job
+    """
+    job = _running_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job not found: {job_id}"
+        )
+    
+    return job
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Download the generated file of a completed job
+    """
+    job = _running_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job not found: {job_id}"
+        )
+    
+    if job["status"] != JobStatus.completed.value:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job['status']}, result not available"
+        )
+    
+    file_path = Path(job["file_path"] or "")
+    if not file_path.is_file():
+        raise HTTPException(
+            status_code=410,
+            detail="Result file no longer exists"
+        )
+    
+    return FileResponse(str(file_path), filename=file_path.name)
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Stream progress, state changes and the final result of a job as
+    Server-Sent Events. The stream ends after the completed/failed event.
+    """
+    job_queue = _running_job_queue()
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job not found: {job_id}"
+        )
+    
+    events = job_queue.subscribe(job_id)
+    
+    async def event_stream():
+        try:
+            # Start with the current state so late subscribers catch up
+            event = job_event(job)
+            yield _format_sse(event)
+            
+            while event["event"] == "progress":
+                if await request.is_disconnected():
+                    return
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=config.JOB_EVENT_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _format_sse(event)
+        finally:
+            job_queue.unsubscribe(job_id, events)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services.browser_pool import get_browser_pool
+from services.metrics import registry, pool_queue_depth, pool_active_pages, pool_browsers
+
+router = APIRouter()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _update_pool_gauges():
+    pool = get_browser_pool()
+    if pool is None:
+        stats = {"size": 0, "scheduler": {"queue_depth": 0, "active_pages": 0}}
+    else:
+        stats = pool.stats()
+    
+    pool_queue_depth.set(stats["scheduler"]["queue_depth"])
+    pool_active_pages.set(stats["scheduler"]["active_pages"])
+    pool_browsers.set(stats["size"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Expose generation phase timings, cookie injection, login validation and
+    browser pool metrics in the Prometheus text format
+    """
+    _update_pool_gauges()
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
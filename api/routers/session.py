@@ -2,6 +2,9 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from services.session_manager import SessionManager
+from services.browser_pool import get_browser_pool
+from services.session_registry import get_session_registry
+from services.context_cache import context_cache
 from services.cookie_extractor import (
     extract_cookies_from_grok,
     extract_grok_cookies_with_manual_oauth,
@@ -99,6 +102,16 @@ class CookieInjectionResponse(BaseModel):
     saved_to: Optional[str] = None
 
 
+class AccountRequest(BaseModel):
+    """Request model for registering an additional account"""
+    cookies: List[Cookie]
+    session_id: Optional[str] = Field(
+        None,
+        description="Identifier of the account; generated when omitted"
+    )
+    label: Optional[str] = Field(None, description="Human readable account name")
+
+
 class ExtractionStatusResponse(BaseModel):
     """Response model for extraction status"""
     task_id: str
@@ -108,6 +121,17 @@ class ExtractionStatusResponse(BaseModel):
     duration_seconds: Optional[float] = None
     error_message: Optional[str] = None
 
+
+async def _refresh_browser_pool():
+    """
+    Recycle pooled browsers and cached contexts so they pick up the new
+    session state
+    """
+    pool = get_browser_pool()
+    if pool is not None:
+        await pool.invalidate()
+    await context_cache.close_all()
+
 @router.post("/login")
 async def login(request: LoginRequest):
     """
@@ -122,6 +146,7 @@ async def login(request: LoginRequest):
         )
         
         if success:
+            await _refresh_browser_pool()
             return {"success": True, "message": "Login successful"}
         else:
             raise HTTPException(
@@ -161,6 +186,7 @@ async def logout():
     try:
         session_manager = SessionManager()
         session_manager.logout()
+        await _refresh_browser_pool()
         return {"success": True, "message": "Logged out successfully"}
         
     except Exception as e:
@@ -185,6 +211,7 @@ async def oauth_login(request: OAuthLoginRequest):
         )
         
         if success:
+            await _refresh_browser_pool()
             return {
                 "success": True,
                 "message": "OAuth login successful",
@@ -218,11 +245,13 @@ async def inject_cookies(request: CookieInjectionRequest):
         )
         
         if success:
+            await _refresh_browser_pool()
             return {
                 "success": True,
                 "message": "Cookies injected successfully",
                 "session_valid": session_manager.has_valid_session(),
-                "cookie_count": cookie_count
+                "cookie_count": cookie_count,
+                "login_verdict": session_manager.last_login_verdict
             }
         else:
             raise HTTPException(
@@ -345,6 +374,7 @@ async def grok_login(request: GrokLoginRequest):
             )
             
             if success:
+                await _refresh_browser_pool()
                 logging.info(
                     f"Successfully created session {session_id} with "
                     f"{cookie_count} cookies for {request.email}"
@@ -511,6 +541,7 @@ async def inject_grok_cookies(request: CookieInjectionRequestV2):
         )
         
         if success:
+            await _refresh_browser_pool()
             logging.info(f"✅ Successfully injected {cookie_count} cookies, session is valid")
             return CookieInjectionResponse(
                 status="success",
@@ -629,4 +660,53 @@ async def load_grok_cookies():
         raise HTTPException(
             status_code=500,
             detail=f"Failed to load cookies: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+# ==================== Multi-Account Endpoints ====================
+
+@router.get("/accounts")
+async def list_accounts():
+    """
+    List registered accounts and how much generation work each one carries
+    """
+    pool = get_browser_pool()
+    load = pool.stats()["sessions"] if pool is not None else {}
+    
+    accounts = []
+    for account in get_session_registry().list():
+        account.pop("cookie_file", None)
+        account["pool"] = load.get(account["session_id"], {"browsers": 0, "active_pages": 0, "leases": 0})
+        accounts.append(account)
+    
+    return {"accounts": accounts, "count": len(accounts)}
+
+@router.post("/accounts", status_code=201)
+async def add_account(request: AccountRequest):
+    """
+    Register an account (or replace its cookies) so generations can be
+    routed to it
+    """
+    try:
+        account = get_session_registry().add(
+            [cookie.model_dump(exclude_none=True) for cookie in request.cookies],
+            session_id=request.session_id,
+            label=request.label
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await _refresh_browser_pool()
+    account.pop("cookie_file", None)
+    return account
+
+@router.delete("/accounts/{session_id}")
+async def remove_account(session_id: str):
+    """
+    Remove a registered account and its stored cookies
+    """
+    if not get_session_registry().remove(session_id):
+        raise HTTPException(status_code=404, detail=f"Account {session_id} not found")
+    
+    await _refresh_browser_pool()
+    return {"success": True, "message": f"Account {session_id} removed"}
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Grok generation site.
+
+Serves /generate/image and /generate/video pages with the markup GrokService
+drives (a prompt textarea, a generate button, a progress bar and a result
+preview) from a stdlib HTTP server, so generations can be benchmarked end
+to end without touching grok.com.
+
+Clicking generate asks POST /api/generate for a job, advances the progress
+bar in steps over the configured delay, fetches the result from
+/assets/generated/<id>.png|.mp4 and then shows it with "100%" and a
+download button - the same signals the completion detector listens for.
+
+Run on its own to poke at it in a browser:
+
+    python benchmarks/fake_grok_site.py --port 8765 --image-delay 2
+"""
+
+import argparse
+import json
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+GENERATION_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Fake Grok - generate {content_type}</title>
+</head>
+<body>
+<main>
+  <textarea id="prompt-input" placeholder="Enter a prompt to generate an {content_type}"></textarea>
+  <button id="generate-btn" class="generate-button">Generate</button>
+  <div class="progress-bar">0%</div>
+  <div class="result-preview"></div>
+</main>
+<script>
+const CONTENT_TYPE = "{content_type}";
+const button = document.getElementById("generate-btn");
+const bar = document.querySelector(".progress-bar");
+const preview = document.querySelector(".result-preview");
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+button.addEventListener("click", async () => {{
+    const prompt = document.getElementById("prompt-input").value;
+    button.disabled = true;
+    bar.textContent = "0%";
+    preview.replaceChildren();
+
+    const job = await (await fetch("/api/generate", {{
+        method: "POST",
+        headers: {{"Content-Type": "application/json"}},
+        body: JSON.stringify({{prompt: prompt, content_type: CONTENT_TYPE}}),
+    }})).json();
+
+    for (let step = 1; step < job.steps; step++) {{
+        await sleep(job.delay * 1000 / job.steps);
+        bar.textContent = Math.round(100 * step / job.steps) + "%";
+    }}
+    await sleep(job.delay * 1000 / job.steps);
+
+    // Load the result before announcing it, like the real site
+    await (await fetch(job.asset)).arrayBuffer();
+    const media = document.createElement(CONTENT_TYPE === "video" ? "video" : "img");
+    media.src = job.asset;
+    media.alt = "generated " + CONTENT_TYPE;
+    const download = document.createElement("button");
+    download.textContent = "Download";
+    preview.append(media, download);
+    bar.textContent = "100% complete";
+    button.disabled = false;
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def _png(width: int, height: int, seed: int = 0) -> bytes:
+    """
+    A noise PNG; noise barely compresses, so the file clears the
+    GROK_RESULT_MIN_BYTES threshold that tells results from icons
+    """
+    rng = random.Random(seed)
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+def _mp4(size: int, seed: int = 0) -> bytes:
+    """An ftyp box followed by filler; enough for capture, not for playback"""
+    ftyp = struct.pack(">I", 24) + b"ftypisom" + struct.pack(">I", 512) + b"isomiso2"
+    filler = random.Random(seed).randbytes(size - len(ftyp) - 8)
+    return ftyp + struct.pack(">I", len(filler) + 8) + b"mdat" + filler
+
+
+class FakeGrokSite:
+    """
+    Threaded HTTP server hosting the fake generation pages
+
+    image_delay/video_delay are the seconds a generation takes, plus up to
+    jitter seconds at random; progress_steps is how often the bar updates.
+    They can be changed while the server runs.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        image_delay: float = 1.0,
+        video_delay: float = 3.0,
+        jitter: float = 0.0,
+        progress_steps: int = 10,
+        image_size: int = 96,
+        video_bytes: int = 256 * 1024
+    ):
+        self.image_delay = image_delay
+        self.video_delay = video_delay
+        self.jitter = jitter
+        self.progress_steps = max(1, progress_steps)
+        self.assets = {
+            "png": ("image/png", _png(image_size, image_size)),
+            "mp4": ("video/mp4", _mp4(video_bytes)),
+        }
+        self.generations: Dict[str, int] = {"image": 0, "video": 0}
+        self.assets_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGrokSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-grok-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeGrokSite":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def new_job(self, content_type: str) -> Dict[str, Any]:
+        """Register a generation and return what the page needs to play it"""
+        if content_type not in self.generations:
+            raise ValueError(f"Unknown content type: {content_type}")
+        with self._lock:
+            self.generations[content_type] += 1
+
+        delay = self.video_delay if content_type == "video" else self.image_delay
+        extension = "mp4" if content_type == "video" else "png"
+        return {
+            "id": uuid.uuid4().hex,
+            "delay": delay + random.uniform(0, self.jitter),
+            "steps": self.progress_steps,
+            "asset": f"/assets/generated/{uuid.uuid4().hex}.{extension}",
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"generations": dict(self.generations), "assets_served": self.assets_served}
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path in ("/", "/generate/image", "/generate/video"):
+                    content_type = "video" if path.endswith("video") else "image"
+                    page = GENERATION_PAGE.format(content_type=content_type)
+                    self._send(200, "text/html; charset=utf-8", page.encode("utf-8"))
+                elif path.startswith("/assets/generated/") and path.rsplit(".", 1)[-1] in site.assets:
+                    mime_type, body = site.assets[path.rsplit(".", 1)[-1]]
+                    with site._lock:
+                        site.assets_served += 1
+                    self._send(200, mime_type, body)
+                else:
+                    self._send(404, "text/plain", b"Not found")
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self._send(404, "text/plain", b"Not found")
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    job = site.new_job(request.get("content_type", "image"))
+                except ValueError as e:
+                    self._send(400, "application/json", json.dumps({"error": str(e)}).encode("utf-8"))
+                    return
+                self._send(200, "application/json", json.dumps(job).encode("utf-8"))
+
+        return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the fake Grok generation site")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--image-delay", type=float, default=1.0, help="Seconds an image generation takes")
+    parser.add_argument("--video-delay", type=float, default=3.0, help="Seconds a video generation takes")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds per generation")
+    args = parser.parse_args(argv)
+
+    site = FakeGrokSite(args.host, args.port, args.image_delay, args.video_delay, args.jitter).start()
+    print(f"Fake Grok site on {site.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
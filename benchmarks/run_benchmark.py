@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+End-to-end generation benchmark against the local fake Grok site.
+
+Starts benchmarks/fake_grok_site.py, points GROK_URL at it and drives
+GrokService through a real browser pool, the same code path the API uses.
+Every run is hermetic: output files, caches and session state go to a
+temporary directory, and no saved cookies are loaded.
+
+For each concurrency level, --jobs generations with distinct prompts run
+with at most that many in flight. Latency percentiles (p50/p95/p99) and
+throughput (jobs/sec) are printed per level:
+
+    python benchmarks/run_benchmark.py --concurrency 1,2,4 --jobs 20 --image-delay 1
+
+Requires Playwright's Chromium (playwright install chromium).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import config
+from benchmarks.fake_grok_site import FakeGrokSite
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of values (p in 0-100), None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(concurrency: int, latencies: List[float], failures: int, wall_seconds: float) -> Dict[str, Any]:
+    """Latency percentiles and throughput of one concurrency level"""
+    return {
+        "concurrency": concurrency,
+        "jobs": len(latencies) + failures,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "jobs_per_sec": len(latencies) / wall_seconds if wall_seconds > 0 else 0.0,
+        "wall_seconds": wall_seconds,
+    }
+
+
+def configure_hermetic(work_dir: Path, site_url: str, headless: bool):
+    """Point the service at the fake site and keep all state in work_dir"""
+    config.GROK_URL = site_url
+    config.HEADLESS = headless
+    config.OUTPUT_DIR = str(work_dir / "output")
+    config.SESSION_DIR = str(work_dir / "sessions")
+    config.SESSION_REGISTRY_DIR = str(work_dir / "sessions" / "accounts")
+    config.GROK_COOKIE_FILE_PATH = str(work_dir / "cookies.json")
+    config.STORAGE_STATE_FILE = str(work_dir / "storage_state.json")
+    config.SELECTOR_CACHE_FILE = str(work_dir / "selector_cache.json")
+    config.RESULT_CACHE_FILE = str(work_dir / "result_cache.json")
+    config.RESULT_CACHE_ENABLED = False
+    config.TRACING_ENABLED = False
+    for directory in (config.OUTPUT_DIR, config.SESSION_DIR):
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+
+async def run_level(service, content_type: str, concurrency: int, jobs: int, timeout: int) -> Dict[str, Any]:
+    """Run jobs generations with at most concurrency in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+    generate = service.generate_video if content_type == "video" else service.generate_image
+
+    async def job(index: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                # Distinct prompts so nothing is coalesced or cached
+                result = await generate(f"benchmark c{concurrency} job {index} {time.time_ns()}", timeout)
+                success = result.success
+            except Exception:
+                success = False
+            if success:
+                latencies.append(time.monotonic() - started)
+            else:
+                failures += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(job(i) for i in range(jobs)))
+    return summarize(concurrency, latencies, failures, time.monotonic() - started)
+
+
+async def run_benchmark(args) -> List[Dict[str, Any]]:
+    from services.browser_pool import BrowserPool
+    from services.page_scheduler import PageScheduler
+    from services.session_registry import SessionRegistry
+    from services.session_manager import SessionManager
+    from services.selector_cache import SelectorCache, set_selector_cache
+    from services.grok_service import GrokService
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="grok-bench-") as tmp, FakeGrokSite(
+        image_delay=args.image_delay,
+        video_delay=args.video_delay,
+        jitter=args.jitter,
+        progress_steps=args.progress_steps
+    ) as site:
+        work_dir = Path(tmp)
+        configure_hermetic(work_dir, site.url, not args.headed)
+        set_selector_cache(SelectorCache(config.SELECTOR_CACHE_FILE))
+
+        pool = BrowserPool(
+            min_size=args.browsers,
+            max_size=args.browsers,
+            acquire_timeout=max(60, args.timeout),
+            scheduler=PageScheduler(args.pages_per_browser, max_queue_size=max(levels) * 2),
+            registry=SessionRegistry(config.SESSION_REGISTRY_DIR),
+            warm_tab_types=[args.content_type] if args.warm_tabs else []
+        )
+        await pool.start()
+        try:
+            if not pool.stats()["size"]:
+                raise RuntimeError("Could not launch a browser; is Chromium installed (playwright install chromium)?")
+            service = GrokService(SessionManager(), pool)
+            if args.warmup:
+                await run_level(service, args.content_type, 1, args.warmup, args.timeout)
+            for level in levels:
+                summary = await run_level(service, args.content_type, level, args.jobs, args.timeout)
+                results.append(summary)
+                print_row(summary)
+        finally:
+            await pool.stop()
+            set_selector_cache(None)
+        print(f"\nFake site: {site.stats()}")
+    return results
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:9.0f}" if seconds is not None else f"{'-':>9}"
+
+
+def print_header():
+    print(f"{'conc':>5} {'jobs':>5} {'failed':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'jobs/s':>8}")
+
+
+def print_row(summary: Dict[str, Any]):
+    print(
+        f"{summary['concurrency']:>5} {summary['jobs']:>5} {summary['failed']:>6} "
+        f"{_ms(summary['p50'])} {_ms(summary['p95'])} {_ms(summary['p99'])} "
+        f"{summary['jobs_per_sec']:8.2f}"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GrokService against a local fake Grok site")
+    parser.add_argument("--content-type", choices=["image", "video"], default="image")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated concurrency levels")
+    parser.add_argument("--jobs", type=int, default=12, help="Generations per concurrency level")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed generations before the first level")
+    parser.add_argument("--image-delay", type=float, default=1.0, help="Seconds the fake site takes per image")
+    parser.add_argument("--video-delay", type=float, default=3.0, help="Seconds the fake site takes per video")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds per generation")
+    parser.add_argument("--progress-steps", type=int, default=10, help="Progress bar updates per generation")
+    parser.add_argument("--browsers", type=int, default=1, help="Pooled browsers")
+    parser.add_argument("--pages-per-browser", type=int, default=4, help="Concurrent pages per browser")
+    parser.add_argument("--no-warm-tabs", dest="warm_tabs", action="store_false", help="Open a fresh tab per job")
+    parser.add_argument("--timeout", type=int, default=120, help="Generation timeout in seconds")
+    parser.add_argument("--headed", action="store_true", help="Show the browsers")
+    parser.add_argument("--json", dest="json_file", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    print(f"Benchmarking {args.content_type} generation, {args.jobs} jobs per level\n")
+    print_header()
+    results = asyncio.run(run_benchmark(args))
+
+    if args.json_file:
+        Path(args.json_file).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.json_file}")
+    return 0 if all(r["failed"] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
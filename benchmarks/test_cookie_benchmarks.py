@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the cookie hot paths.
+
+Synthetic cookie jars of 10 to 100k entries run through validation
+(EnhancedCookieInjector.validate_cookie), normalization and expiry filtering
+(cookie_pipeline.normalize_jar / playwright_cookies, check_cookies.classify_cookies), extraction
+formatting (GrokCookieExtractor._extract_all_cookies) and the cookie file
+round trip. Needs pytest-benchmark:
+
+    pip install pytest-benchmark
+    python -m pytest benchmarks/test_cookie_benchmarks.py --benchmark-autosave
+    python -m pytest benchmarks/test_cookie_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:25%
+
+The jars are seeded, so saved runs can be compared across commits.
+"""
+
+import sys
+import os
+import asyncio
+import random
+import time
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from services.enhanced_cookie_injector import EnhancedCookieInjector
+from services.cookie_pipeline import normalize_jar, playwright_cookies
+from services.cookie_extractor import GrokCookieExtractor, save_cookies_to_file, load_cookies_from_file
+from scripts.check_cookies import classify_cookies
+
+JAR_SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+# Start of today: validate_cookie checks expiry against the clock, so the
+# jars are built relative to it; within a day they are identical
+NOW = float(int(time.time()) // 86400 * 86400)
+
+DOMAINS = [".grok.com", "grok.com", "auth.grok.com", ".x.ai", "accounts.x.ai", "  .GROK.com "]
+SAME_SITES = ["Lax", "lax", "Strict", "None", "no_restriction", "unspecified", None]
+
+
+@lru_cache(maxsize=None)
+def make_jar(size: int, seed: int = 42):
+    """
+    A cookie jar shaped like real exports: mixed domain spellings, session
+    cookies, expiry in seconds and milliseconds, ~20% expired, a few broken
+    """
+    rng = random.Random(seed)
+    jar = []
+    for i in range(size):
+        roll = rng.random()
+        if roll < 0.2:
+            expires = NOW - rng.randint(1, 30 * 86400)
+        elif roll < 0.35:
+            expires = -1
+        elif roll < 0.45:
+            expires = (NOW + rng.randint(1, 365 * 86400)) * 1000
+        else:
+            expires = NOW + rng.randint(1, 365 * 86400)
+
+        cookie = {
+            "name": f"{rng.choice(['auth_token', 'sid', 'pref', '_ga', 'cf_clearance'])}_{i}",
+            "value": "%032x" % rng.getrandbits(128),
+            "domain": rng.choice(DOMAINS),
+            "path": "/",
+            "expires": expires,
+            "httpOnly": rng.random() < 0.5,
+            "secure": rng.random() < 0.7,
+            "sameSite": rng.choice(SAME_SITES),
+        }
+        if rng.random() < 0.01:
+            cookie["domain"] = ""
+        if rng.random() < 0.01:
+            cookie["value"] = ""
+        jar.append(cookie)
+    return jar
+
+
+def run(benchmark, func, *args):
+    """Benchmark func(*args), with fewer rounds for the large jars"""
+    size = len(args[0])
+    rounds = max(3, min(200, 100_000 // size))
+    return benchmark.pedantic(func, args=args, rounds=rounds, iterations=1, warmup_rounds=1)
+
+
+def validate_jar(jar):
+    return [EnhancedCookieInjector.validate_cookie(cookie, i) for i, cookie in enumerate(jar)]
+
+
+class FakeContext:
+    def __init__(self, cookies):
+        self._cookies = cookies
+
+    async def cookies(self):
+        return self._cookies
+
+
+def extract_jar(jar):
+    extractor = GrokCookieExtractor()
+    extractor.context = FakeContext(jar)
+    return asyncio.run(extractor._extract_all_cookies())
+
+
+@pytest.mark.parametrize("size", JAR_SIZES)
+def test_validate_cookies(benchmark, size):
+    jar = make_jar(size)
+    results = run(benchmark, validate_jar, jar)
+    assert len(results) == size
+    assert sum(1 for r in results if r["valid"]) >= size * 0.6
+
+
+@pytest.mark.parametrize("size", JAR_SIZES)
+def test_normalize_and_filter_expired(benchmark, size):
+    jar = make_jar(size)
+    prepared = run(benchmark, playwright_cookies, jar, NOW)
+    assert 0 < len(prepared) < size or size < 100
+
+
+@pytest.mark.parametrize("size", JAR_SIZES)
+def test_normalize_to_records(benchmark, size):
+    jar = make_jar(size)
+    records = run(benchmark, normalize_jar, jar, NOW)
+    assert 0 < len(records) < size or size < 100
+
+
+@pytest.mark.parametrize("size", JAR_SIZES)
+def test_classify_expiry(benchmark, size):
+    jar = make_jar(size)
+    valid, expired, session, _ = run(benchmark, classify_cookies, jar, NOW)
+    assert len(valid) + len(expired) + len(session) == size
+
+
+@pytest.mark.parametrize("size", JAR_SIZES)
+def test_format_extracted_cookies(benchmark, size):
+    jar = make_jar(size)
+    formatted = run(benchmark, extract_jar, jar)
+    assert 0 < len(formatted) <= size
+
+
+@pytest.mark.parametrize("size", JAR_SIZES)
+def test_serialize_cookie_file(benchmark, size, tmp_path):
+    jar = make_jar(size)
+    cookie_file = str(tmp_path / "cookies.json")
+    run(benchmark, save_cookies_to_file, jar, cookie_file)
+    assert len(load_cookies_from_file(cookie_file)) == size
+
+
+@pytest.mark.parametrize("size", JAR_SIZES)
+def test_load_cookie_file(benchmark, size, tmp_path):
+    cookie_file = str(tmp_path / "cookies.json")
+    save_cookies_to_file(make_jar(size), cookie_file)
+    loaded = benchmark.pedantic(
+        load_cookies_from_file, args=(cookie_file,),
+        rounds=max(3, min(200, 100_000 // size)), iterations=1, warmup_rounds=1
+    )
+    assert len(loaded) == size
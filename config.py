@@ -14,6 +14,7 @@ class Config(BaseSettings):
     # File storage
     OUTPUT_DIR: str = "/home/engine/project/output"
     SESSION_DIR: str = "/home/engine/project/sessions"
+    SESSION_REGISTRY_DIR: str = "/home/engine/project/sessions/accounts"  # Cookies of additional accounts
     
     # AI Website URLs
     GROK_URL: str = "https://grok.com"
@@ -27,6 +28,62 @@ class Config(BaseSettings):
     GENERATION_TIMEOUT: int = 300  # 5 minutes for generation
     LOGIN_TIMEOUT: int = 120  # 2 minutes for login
     
+    # Browser pool settings (warm browsers shared by all requests)
+    BROWSER_POOL_ENABLED: bool = True
+    BROWSER_POOL_MIN_SIZE: int = 1  # Browsers kept warm at all times
+    BROWSER_POOL_MAX_SIZE: int = 4  # Upper bound on concurrently running browsers
+    BROWSER_POOL_IDLE_TIMEOUT: int = 300  # Close idle browsers above min size after 5 minutes
+    BROWSER_POOL_HEALTH_CHECK_INTERVAL: int = 30  # Seconds between health checks
+    BROWSER_POOL_ACQUIRE_TIMEOUT: int = 60  # Seconds to wait for a free browser
+    BROWSER_POOL_LAUNCH_BACKOFF_MAX: int = 60  # Max seconds between launch attempts after repeated failures
+    BROWSER_POOL_WARM_TABS: str = "image,video"  # Generation pages kept open per browser, empty disables
+    
+    # Resource blocking profiles ("off", "generation", "validation" or categories like "analytics,fonts")
+    RESOURCE_BLOCKING_GENERATION_PROFILE: str = "generation"  # Pooled and cached generation contexts
+    RESOURCE_BLOCKING_VALIDATION_PROFILE: str = "validation"  # Login, cookie injection and extraction contexts
+    
+    # Page scheduler settings (admission control for pooled pages)
+    PAGE_SCHEDULER_MAX_PAGES_PER_CONTEXT: int = 2  # Concurrent generations per browser context
+    PAGE_SCHEDULER_MAX_QUEUE_SIZE: int = 16  # Waiting requests before answering 429
+    
+    # Asynchronous generation job settings
+    JOB_STORE_DIR: str = "/home/engine/project/jobs"
+    JOB_WORKERS: int = 2  # Generations running at the same time
+    JOB_QUEUE_MAX_SIZE: int = 100  # Pending jobs before answering 429
+    JOB_MAX_RETAINED: int = 500  # Finished jobs kept for polling
+    JOB_EVENT_BUFFER_SIZE: int = 100  # Buffered progress events per stream subscriber
+    JOB_EVENT_KEEPALIVE: int = 15  # Seconds between keep-alive comments on idle streams
+    JOB_PROGRESS_PERSIST_INTERVAL: float = 1.0  # Min seconds between job file writes within a stage
+    
+    # Generation completion detection
+    GROK_RESULT_URL_PATTERN: str = r"(generated|assets|image|video|media)"  # URLs of generated media responses
+    GROK_RESULT_MIN_BYTES: int = 10240  # Smaller image/video responses are icons, not results
+    GROK_COMPLETION_POLL_INTERVAL: int = 500  # In-page fallback check interval in milliseconds
+    GROK_MEDIA_CAPTURE_ENABLED: bool = True  # Save results from the network response instead of a browser download
+    GROK_CAPTURE_CHUNK_BYTES: int = 8 * 1024 * 1024  # Range request size when a partial result is fetched again
+    
+    # Learned selector cache (which fallback selector matched per site and role)
+    SELECTOR_CACHE_FILE: str = str(BASE_DIR / "data" / "selector_cache.json")
+    SELECTOR_CACHE_HEAD_START: int = 500  # Milliseconds the learned selector is tried alone
+    
+    # Batch generation (/api/grok/image/batch)
+    BATCH_MAX_PROMPTS: int = 50  # Prompts accepted in one batch request
+    BATCH_MAX_CONCURRENCY: int = 2  # Workers (warm tabs) per batch
+    
+    # Identical generations in flight at the same time share one browser run
+    GENERATION_COALESCING_ENABLED: bool = True
+    
+    # Request tracing (OTLP/JSON lines, one trace per line)
+    TRACING_ENABLED: bool = False
+    TRACE_EXPORT_FILE: str = str(BASE_DIR / "data" / "traces.jsonl")
+    
+    # Prompt result cache (repeat prompts answered with the already saved file)
+    RESULT_CACHE_ENABLED: bool = False
+    RESULT_CACHE_FILE: str = str(BASE_DIR / "data" / "result_cache.json")
+    RESULT_CACHE_TTL: int = 86400  # Seconds a cached result is reused
+    RESULT_CACHE_MAX_ENTRIES: int = 1000
+    RESULT_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # Total size of cached files
+    
     # Grok specific settings
     GROK_COOKIE_TIMEOUT: int = 60  # Cookie extraction timeout in seconds
     GROK_LOGIN_TIMEOUT: int = 120  # Login operation timeout in seconds
@@ -35,6 +92,7 @@ class Config(BaseSettings):
     # Manual OAuth settings (for semi-automated extraction)
     GROK_OAUTH_TIMEOUT: int = 600  # Wait for user login timeout (10 minutes)
     GROK_COOKIE_FILE_PATH: str = str(BASE_DIR / "data" / "grok_cookies.json")  # Cookie storage path
+    STORAGE_STATE_FILE: str = str(BASE_DIR / "data" / "grok_storage_state.json")  # Cookies + localStorage snapshot of the validated session
 
     # Use a persistent browser profile for manual OAuth (avoids "incognito"-like fresh contexts)
     # Can be overridden via env var GROK_OAUTH_USER_DATA_DIR
@@ -57,4 +115,5 @@ config = Config()
 
 # Ensure directories exist
 Path(config.OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
-Path(config.SESSION_DIR).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+Path(config.SESSION_DIR).mkdir(parents=True, exist_ok=True)
+Path(config.JOB_STORE_DIR).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -1,10 +1,55 @@
+import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.routers import grok, session
+from api.routers import grok, session, metrics
 from config import config
+from services.browser_pool import BrowserPool, set_browser_pool
+from services.job_queue import GenerationJobQueue, set_job_queue
+from services.selector_cache import get_selector_cache
+from services.result_cache import get_result_cache
+from services.context_cache import context_cache
+from utils import tracing
+from utils.tracing import TracingMiddleware
 
-app = FastAPI(title="AI Browser Automation API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the process-wide browser pool and job queue on startup and
+    close them on shutdown
+    """
+    pool = None
+    if config.BROWSER_POOL_ENABLED:
+        pool = BrowserPool()
+        try:
+            await pool.start()
+            set_browser_pool(pool)
+        except Exception as e:
+            logging.error(f"Failed to start browser pool, falling back to per-request browsers: {str(e)}")
+            await pool.stop()
+            pool = None
+
+    job_queue = GenerationJobQueue()
+    await job_queue.start()
+    set_job_queue(job_queue)
+
+    try:
+        yield
+    finally:
+        set_job_queue(None)
+        await job_queue.stop()
+        set_browser_pool(None)
+        if pool is not None:
+            await pool.stop()
+        await context_cache.close_all()
+        get_selector_cache().flush()
+        get_result_cache().flush()
+        tracing.tracer.flush()
+
+
+app = FastAPI(title="AI Browser Automation API", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -15,9 +60,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Root span per request; passes requests straight through while tracing is off
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(grok.router, prefix="/api/grok", tags=["grok"])
 app.include_router(session.router, prefix="/api/session", tags=["session"])
+app.include_router(metrics.router, tags=["metrics"])
 
 @app.get("/")
 async def root():
@@ -29,4 +78,4 @@ if __name__ == "__main__":
         host=config.API_HOST,
         port=config.API_PORT,
         reload=True
-    )
\ No newline at end of file
+    )
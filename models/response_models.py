@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 
 class FileType(str, Enum):
@@ -12,13 +12,42 @@ class GenerationResponse(BaseModel):
     file_path: Optional[str] = None
     file_type: Optional[FileType] = None
     error_message: Optional[str] = None
+    cached: bool = False
     
     class Config:
         json_schema_extra = {
             "example": {
                 "success": True,
                 "file_path": "/output/abc123.png",
-                "file_type": "image"
+                "file_type": "image",
+                "cached": False
+            }
+        }
+
+class BatchItemResult(GenerationResponse):
+    index: int
+    prompt: str
+
+class BatchGenerationResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "results": [
+                    {
+                        "index": 0,
+                        "prompt": "a red fox",
+                        "success": True,
+                        "file_path": "/output/abc123.png",
+                        "file_type": "image",
+                        "cached": False
+                    }
+                ],
+                "succeeded": 1,
+                "failed": 0
             }
         }
 
@@ -36,4 +65,35 @@ class SessionStatusResponse(BaseModel):
                 "session_expiry": "2023-12-31T23:59:59Z",
                 "browser_type": "chromium"
             }
-        }
\ No newline at end of file
+        }
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    content_type: str
+    status: JobStatus
+    stage: Optional[str] = None
+    progress: float = 0.0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    file_path: Optional[str] = None
+    file_type: Optional[FileType] = None
+    error_message: Optional[str] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "3f2b8c1e-6a0d-4f57-9a43-2d1c0b7e9f10",
+                "content_type": "image",
+                "status": "running",
+                "stage": "generating",
+                "progress": 0.4,
+                "created_at": "2023-12-31T23:59:59+00:00"
+            }
+        }
@@ -16,6 +16,36 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import config
 
 
+def classify_cookies(cookies, current_ts):
+    """
+    Split cookie names into valid, expired and session cookies.
+    
+    Returns:
+        (valid, expired, session, domains)
+    """
+    valid_cookies = []
+    expired_cookies = []
+    session_cookies = []
+    domains = set()
+    
+    for cookie in cookies:
+        name = cookie.get("name", "")
+        domain = cookie.get("domain", "")
+        expires = cookie.get("expires")
+        
+        domains.add(domain)
+        
+        if expires is None or expires == -1:
+            session_cookies.append(name)
+        elif expires > 0:
+            if expires < current_ts:
+                expired_cookies.append(name)
+            else:
+                valid_cookies.append(name)
+    
+    return valid_cookies, expired_cookies, session_cookies, domains
+
+
 def check_cookies():
     """Check the status of saved cookies."""
     
@@ -54,26 +84,7 @@ def check_cookies():
     
     # Analyze cookies
     current_ts = datetime.now(timezone.utc).timestamp()
-    
-    valid_cookies = []
-    expired_cookies = []
-    session_cookies = []
-    domains = set()
-    
-    for cookie in cookies:
-        name = cookie.get("name", "")
-        domain = cookie.get("domain", "")
-        expires = cookie.get("expires")
-        
-        domains.add(domain)
-        
-        if expires is None or expires == -1:
-            session_cookies.append(name)
-        elif expires > 0:
-            if expires < current_ts:
-                expired_cookies.append(name)
-            else:
-                valid_cookies.append(name)
+    valid_cookies, expired_cookies, session_cookies, domains = classify_cookies(cookies, current_ts)
     
     # Print summary
     print("📊 Cookie Status:")
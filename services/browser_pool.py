@@ -0,0 +1,594 @@
+"""
+Browser Pool Module
+
+Keeps a set of warm Chromium instances alive for the whole lifetime of the
+API process, so generation requests lease a page from an already running
+browser instead of starting Playwright and launching Chromium every time.
+
+Each pooled browser owns one authenticated context that hosts a bounded
+number of concurrent pages. Page slots are handed out by a PageScheduler,
+which queues requests fairly and applies backpressure when the queue is full.
+
+Each context also keeps warm tabs: pages parked on the image and video
+generation pages with the prompt focused. A lease for a content type takes
+a parked tab and skips navigation; afterwards the tab is reset in place
+(prompt cleared, result dismissed) and parked again instead of reloading.
+
+Contexts are authenticated as one of the accounts in the SessionRegistry;
+new browsers always go to the account with the fewest of them, so the
+scheduler's least-loaded routing spreads work across accounts.
+
+The pool is created by the FastAPI lifespan hook in main.py and shared by
+every request through get_browser_pool().
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, AsyncIterator, Set
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from config import config
+from services.enhanced_cookie_injector import EnhancedCookieInjector
+from services.cookie_pipeline import playwright_cookies
+from services.page_scheduler import PageScheduler
+from services.session_registry import SessionRegistry, get_session_registry, DEFAULT_SESSION_ID
+from services import warm_tabs
+from services.resource_blocking import apply_generation_profile
+from utils.error_handling import BrowserError
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class PooledBrowser:
+    """
+    A warm Chromium instance together with its authenticated context
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        context: BrowserContext,
+        generation: int = 0,
+        session_id: str = DEFAULT_SESSION_ID
+    ):
+        self.id = str(uuid.uuid4())[:8]
+        self.browser = browser
+        self.context = context
+        self.generation = generation
+        self.session_id = session_id
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.active_pages = 0
+        self.lease_count = 0
+        self.retired = False
+        # Idle tabs parked on a generation page, by content type
+        self.warm_pages: Dict[str, List[Page]] = {}
+
+    @property
+    def in_use(self) -> bool:
+        return self.active_pages > 0
+
+    @property
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_used
+
+    def is_connected(self) -> bool:
+        return self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Process-wide pool of warm browsers that hands out pages on lease
+    """
+
+    def __init__(
+        self,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        idle_timeout: Optional[int] = None,
+        health_check_interval: Optional[int] = None,
+        acquire_timeout: Optional[int] = None,
+        scheduler: Optional[PageScheduler] = None,
+        registry: Optional[SessionRegistry] = None,
+        warm_tab_types: Optional[List[str]] = None
+    ):
+        self.min_size = config.BROWSER_POOL_MIN_SIZE if min_size is None else min_size
+        self.max_size = config.BROWSER_POOL_MAX_SIZE if max_size is None else max_size
+        self.idle_timeout = config.BROWSER_POOL_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.health_check_interval = (
+            config.BROWSER_POOL_HEALTH_CHECK_INTERVAL
+            if health_check_interval is None else health_check_interval
+        )
+        self.acquire_timeout = (
+            config.BROWSER_POOL_ACQUIRE_TIMEOUT if acquire_timeout is None else acquire_timeout
+        )
+
+        if self.max_size < 1:
+            raise ValueError("Browser pool max_size must be at least 1")
+        self.min_size = max(0, min(self.min_size, self.max_size))
+
+        if warm_tab_types is None:
+            warm_tab_types = [t.strip() for t in config.BROWSER_POOL_WARM_TABS.split(",") if t.strip()]
+        self.warm_tab_types = warm_tab_types
+
+        self.scheduler = scheduler or PageScheduler()
+        self.registry = registry or get_session_registry()
+        self.playwright = None
+        self._entries: List[PooledBrowser] = []
+        self._launching = 0
+        self._launching_sessions: Dict[str, int] = {}
+        self._generation = 0
+        self._growth_tasks: Set[asyncio.Task] = set()
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._warm_hits = 0
+        self._warm_misses = 0
+        self._warm_resets_failed = 0
+        # Consecutive launch failures back off further launches
+        self._launch_failures = 0
+        self._launch_error: Optional[Exception] = None
+        self._launch_retry_at = 0.0
+
+    async def start(self):
+        """Start Playwright and launch the minimum number of warm browsers"""
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+
+        self._closed = False
+        await self._ensure_min_size()
+
+        if self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+
+        logger.info(
+            f"Browser pool started with {len(self._entries)} warm browsers "
+            f"(min={self.min_size}, max={self.max_size})"
+        )
+
+    async def stop(self):
+        """Close every pooled browser and stop Playwright"""
+        self._closed = True
+        self.scheduler.close()
+
+        tasks = list(self._growth_tasks)
+        if self._maintenance_task:
+            tasks.append(self._maintenance_task)
+            self._maintenance_task = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        entries = list(self._entries)
+        self._entries.clear()
+        for entry in entries:
+            self.scheduler.unregister(entry.id)
+            await self._close_entry(entry)
+
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception:
+                pass
+            self.playwright = None
+
+        logger.info("Browser pool stopped")
+
+    @asynccontextmanager
+    async def lease(self, content_type: Optional[str] = None) -> AsyncIterator[Page]:
+        """
+        Lease a page on a warm browser for the duration of the block.
+
+        With a content_type that has warm tabs, the page is a tab already
+        parked on that generation page; it is reset and parked again
+        afterwards. Otherwise the page is fresh and closed afterwards.
+
+        Raises QueueFullError when too many requests are already waiting.
+        """
+        warm = content_type in self.warm_tab_types
+        with span("pool.acquire", content_type=content_type) as current:
+            entry = await self._acquire()
+        started = time.monotonic()
+        page: Optional[Page] = None
+        healthy = True
+
+        try:
+            page = self._take_warm_page(entry, content_type) if warm else None
+            if current is not None:
+                current.set_attribute("warm_tab", page is not None)
+            if page is None:
+                page = await entry.context.new_page()
+            yield page
+        except Exception:
+            healthy = entry.is_connected()
+            raise
+        finally:
+            if page is not None:
+                parked = healthy and warm and await self._park_after_job(entry, page, content_type)
+                if not parked:
+                    try:
+                        await page.close()
+                    except Exception:
+                        healthy = entry.is_connected()
+            await self._release(entry, time.monotonic() - started, healthy)
+
+    async def invalidate(self):
+        """
+        Recycle every pooled browser, e.g. after the stored session changed.
+
+        Idle browsers are closed right away, browsers with active pages are
+        closed when their last page is released.
+        """
+        self._generation += 1
+        entries = list(self._entries)
+        for entry in entries:
+            await self._retire(entry)
+
+        logger.info(f"Browser pool invalidated, recycling {len(entries)} browsers")
+
+        if not self._closed:
+            await self._ensure_min_size()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get current pool and scheduler statistics"""
+        in_use = sum(1 for e in self._entries if e.in_use)
+        sessions: Dict[str, Dict[str, int]] = {}
+        for entry in self._entries:
+            session = sessions.setdefault(entry.session_id, {"browsers": 0, "active_pages": 0, "leases": 0})
+            session["browsers"] += 1
+            session["active_pages"] += entry.active_pages
+            session["leases"] += entry.lease_count
+
+        return {
+            "size": len(self._entries),
+            "in_use": in_use,
+            "idle": len(self._entries) - in_use,
+            "launching": self._launching,
+            "launch_failures": self._launch_failures,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "closed": self._closed,
+            "sessions": sessions,
+            "warm_tabs": {
+                "types": self.warm_tab_types,
+                "parked": sum(len(pages) for e in self._entries for pages in e.warm_pages.values()),
+                "hits": self._warm_hits,
+                "misses": self._warm_misses,
+                "resets_failed": self._warm_resets_failed,
+            },
+            "scheduler": self.scheduler.stats(),
+        }
+
+    async def _acquire(self) -> PooledBrowser:
+        """Wait for a page slot, growing the pool when demand exceeds capacity"""
+        if self._closed:
+            raise BrowserError("Browser pool is closed")
+
+        if not self.scheduler.capacity and not self._launching and self._launch_backing_off():
+            # Nothing running can serve the request and launches keep failing
+            raise BrowserError(f"Could not launch a pooled browser: {str(self._launch_error)}")
+
+        self._maybe_grow()
+
+        try:
+            key = await self.scheduler.acquire(self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise BrowserError(
+                f"Timed out after {self.acquire_timeout}s waiting for a pooled browser"
+            )
+
+        entry = self._get_entry(key)
+        if entry is None:
+            self.scheduler.release(key)
+            raise BrowserError("Pooled browser was removed while waiting")
+
+        entry.active_pages += 1
+        entry.last_used = time.monotonic()
+        return entry
+
+    async def _release(self, entry: PooledBrowser, held_seconds: float, healthy: bool = True):
+        """Return a page slot to the scheduler and retire broken browsers"""
+        entry.active_pages -= 1
+        entry.last_used = time.monotonic()
+        entry.lease_count += 1
+        self.scheduler.release(entry.id, held_seconds)
+
+        stale = entry.generation != self._generation
+        if self._closed or entry.retired or stale or not healthy or not entry.is_connected():
+            await self._retire(entry)
+
+    def _take_warm_page(self, entry: PooledBrowser, content_type: str) -> Optional[Page]:
+        """Take a tab parked on the generation page, if one is idle"""
+        pages = entry.warm_pages.get(content_type, [])
+        while pages:
+            page = pages.pop()
+            if not page.is_closed():
+                self._warm_hits += 1
+                return page
+        self._warm_misses += 1
+        return None
+
+    async def _park_after_job(self, entry: PooledBrowser, page: Page, content_type: str) -> bool:
+        """Reset a used tab in place and park it again; False means close it"""
+        if self._closed or entry.retired or entry.generation != self._generation:
+            return False
+
+        pages = entry.warm_pages.setdefault(content_type, [])
+        if len(pages) >= self.scheduler.max_pages_per_context:
+            return False
+
+        # The tab may still be on a different page, e.g. after a navigation failure
+        if warm_tabs.is_on_generation_page(page, content_type):
+            ready = await warm_tabs.reset(page, content_type)
+        else:
+            ready = await warm_tabs.park(page, content_type)
+        if not ready:
+            self._warm_resets_failed += 1
+            return False
+
+        pages.append(page)
+        return True
+
+    async def _prewarm(self, entry: PooledBrowser):
+        """Open one tab per warm content type on a newly launched browser"""
+        for content_type in self.warm_tab_types:
+            try:
+                page = await entry.context.new_page()
+            except Exception as e:
+                logger.warning(f"Could not open warm tab on pooled browser {entry.id}: {str(e)}")
+                return
+            if await warm_tabs.park(page, content_type):
+                entry.warm_pages.setdefault(content_type, []).append(page)
+            else:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+
+    def _get_entry(self, key: str) -> Optional[PooledBrowser]:
+        for entry in self._entries:
+            if entry.id == key:
+                return entry
+        return None
+
+    def _add_entry(self, entry: PooledBrowser):
+        self._entries.append(entry)
+        self.scheduler.register(entry.id)
+
+    async def _retire(self, entry: PooledBrowser):
+        """Stop scheduling pages on a browser and close it once it is unused"""
+        entry.retired = True
+        # Slots handed to a waiter that hasn't resumed yet count as busy too
+        busy = entry.in_use or self.scheduler.load(entry.id) > 0
+        self.scheduler.unregister(entry.id)
+
+        if busy or entry not in self._entries:
+            return
+
+        self._entries.remove(entry)
+        await self._close_entry(entry)
+
+    def _maybe_grow(self):
+        """Launch another browser in the background if queued demand needs it"""
+        if self._closed or len(self._entries) + self._launching >= self.max_size:
+            return
+        if self._launch_backing_off():
+            return
+
+        demand = self.scheduler.queue_depth + 1
+        incoming = self.scheduler.available() + self._launching * self.scheduler.max_pages_per_context
+        if demand <= incoming:
+            return
+
+        session_id = self._start_launch()
+        task = asyncio.create_task(self._grow(session_id))
+        self._growth_tasks.add(task)
+        task.add_done_callback(self._growth_tasks.discard)
+
+    async def _grow(self, session_id: str):
+        error = None
+        try:
+            entry = await self._launch(session_id)
+        except Exception as e:
+            error = e
+        finally:
+            self._finish_launch(session_id)
+
+        if error is not None:
+            self._launch_failed(error)
+            return
+        self._launch_succeeded()
+
+        if self._closed:
+            await self._close_entry(entry)
+            return
+
+        await self._prewarm(entry)
+        self._add_entry(entry)
+
+    def _target_size(self) -> int:
+        """Warm browsers to keep: min_size, but at least one per account"""
+        return min(self.max_size, max(self.min_size, len(self.registry.session_ids())))
+
+    def _start_launch(self) -> str:
+        """Reserve a launch for the account with the fewest browsers"""
+        counts = {session_id: 0 for session_id in self.registry.session_ids()}
+        for entry in self._entries:
+            if entry.session_id in counts and entry.generation == self._generation and not entry.retired:
+                counts[entry.session_id] += 1
+        for session_id, launching in self._launching_sessions.items():
+            if session_id in counts:
+                counts[session_id] += launching
+
+        session_id = min(counts, key=counts.get)
+        self._launching += 1
+        self._launching_sessions[session_id] = self._launching_sessions.get(session_id, 0) + 1
+        return session_id
+
+    def _launch_backing_off(self) -> bool:
+        return self._launch_error is not None and time.monotonic() < self._launch_retry_at
+
+    def _launch_failed(self, error: Exception):
+        """
+        Back off further launches and, when no browser is running or on the
+        way, fail the queued requests with the launch error instead of letting
+        them run into the acquire timeout
+        """
+        self._launch_failures += 1
+        self._launch_error = error
+        backoff = min(config.BROWSER_POOL_LAUNCH_BACKOFF_MAX, 2 ** (self._launch_failures - 1))
+        self._launch_retry_at = time.monotonic() + backoff
+        logger.error(f"Failed to launch pooled browser, next launch in {backoff}s at the earliest: {str(error)}")
+
+        if not self.scheduler.capacity and not self._launching:
+            self.scheduler.fail_waiters(BrowserError(f"Could not launch a pooled browser: {str(error)}"))
+
+    def _launch_succeeded(self):
+        self._launch_failures = 0
+        self._launch_error = None
+
+    def _finish_launch(self, session_id: str):
+        self._launching -= 1
+        self._launching_sessions[session_id] -= 1
+        if not self._launching_sessions[session_id]:
+            del self._launching_sessions[session_id]
+
+    async def _launch(self, session_id: str = DEFAULT_SESSION_ID) -> PooledBrowser:
+        """Launch a new Chromium instance with a context authenticated as session_id"""
+        browser = await self.playwright.chromium.launch(
+            headless=config.HEADLESS,
+            timeout=config.BROWSER_TIMEOUT,
+        )
+
+        try:
+            storage_state = self.registry.load_storage_state(session_id)
+            if storage_state is not None:
+                # Cookies and localStorage restored in a single call
+                context = await browser.new_context(
+                    viewport={"width": 1280, "height": 800},
+                    ignore_https_errors=True,
+                    storage_state=storage_state
+                )
+            else:
+                context = await browser.new_context(
+                    viewport={"width": 1280, "height": 800},
+                    ignore_https_errors=True
+                )
+                await self._authenticate(context, session_id)
+            await apply_generation_profile(context)
+        except Exception:
+            await browser.close()
+            raise
+
+        entry = PooledBrowser(browser, context, self._generation, session_id)
+        logger.info(f"Launched pooled browser {entry.id} for session {session_id}")
+        return entry
+
+    async def _authenticate(self, context: BrowserContext, session_id: str = DEFAULT_SESSION_ID):
+        """Load the saved cookies of an account into a new pooled context"""
+        cookies = self.registry.load_cookies(session_id)
+        if not cookies:
+            logger.warning(f"No saved cookies found for session {session_id}, pooled browser context is not authenticated")
+            return
+
+        valid_cookies = playwright_cookies(cookies)
+        if valid_cookies:
+            outcomes = await EnhancedCookieInjector.inject_cookie_batch(context, valid_cookies)
+            injected = sum(1 for success, _ in outcomes if success)
+            logger.info(f"Authenticated pooled context for session {session_id} with {injected}/{len(valid_cookies)} cookies")
+
+    async def _close_entry(self, entry: PooledBrowser):
+        try:
+            await entry.context.close()
+        except Exception:
+            pass
+        try:
+            await entry.browser.close()
+        except Exception:
+            pass
+        logger.info(f"Closed pooled browser {entry.id}")
+
+    async def _ensure_min_size(self):
+        """Launch browsers until the pool holds min_size (and one per account)"""
+        while not self._closed:
+            current = sum(
+                1 for e in self._entries
+                if e.generation == self._generation and not e.retired
+            )
+            if current + self._launching >= self._target_size() or self._launch_backing_off():
+                return
+
+            session_id = self._start_launch()
+            error = None
+            try:
+                entry = await self._launch(session_id)
+            except Exception as e:
+                error = e
+            finally:
+                self._finish_launch(session_id)
+
+            if error is not None:
+                self._launch_failed(error)
+                return
+            self._launch_succeeded()
+
+            await self._prewarm(entry)
+            self._add_entry(entry)
+
+    async def _evict_idle(self):
+        """Close idle browsers above the warm size that exceeded the idle timeout"""
+        idle = sorted(
+            (e for e in self._entries if not e.in_use and not e.retired),
+            key=lambda e: e.last_used
+        )
+        surplus = len(self._entries) - self._target_size()
+        for entry in idle:
+            if surplus <= 0:
+                break
+            if entry.idle_seconds >= self.idle_timeout:
+                logger.info(f"Evicting idle pooled browser {entry.id}")
+                await self._retire(entry)
+                surplus -= 1
+
+    async def _check_health(self):
+        """Retire idle browsers that crashed or stopped answering"""
+        for entry in [e for e in self._entries if not e.in_use and not e.retired]:
+            try:
+                if not entry.is_connected():
+                    raise BrowserError("browser disconnected")
+                await asyncio.wait_for(entry.context.cookies(), timeout=5)
+            except Exception as e:
+                logger.warning(f"Pooled browser {entry.id} failed health check: {str(e)}")
+                await self._retire(entry)
+
+    async def _maintenance_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._evict_idle()
+                await self._check_health()
+                await self._ensure_min_size()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Browser pool maintenance failed: {str(e)}")
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    """Get the process-wide browser pool, if one was started"""
+    return _browser_pool
+
+
+def set_browser_pool(pool: Optional[BrowserPool]):
+    """Register the process-wide browser pool"""
+    global _browser_pool
+    _browser_pool = pool
@@ -0,0 +1,353 @@
+"""
+Generation Completion Detector Module
+
+Detects the end of a Grok generation from events instead of polling the UI
+every two seconds. Three signals race each other and the first one wins:
+
+1. mutation - an in-page MutationObserver (plus media load events) that
+   re-checks the completion condition whenever the DOM changes
+2. function - page.wait_for_function with the same condition, polled inside
+   the page as a safety net, without any CDP round trips while waiting
+3. network - the first response that looks like the generated image/video
+
+The observer also pushes progress bar text and generate button state back
+to Python through an exposed binding, so progress is reported as it changes.
+
+Completion is judged relative to the click. arm() records the download
+buttons, preview images and progress text already on the page. A warm tab
+that still shows the previous job's result therefore doesn't count as done:
+those nodes count again only once the generate button was seen busy, and
+the progress bar only once it moved away from its armed text.
+"""
+
+import asyncio
+import logging
+import re
+import time
+import weakref
+from typing import Optional, Callable, Dict, Any
+from playwright.async_api import Page, Response
+from config import config
+from utils.tracing import traced, current_span
+
+logger = logging.getLogger(__name__)
+
+# Cadence of the former polling loop, used to estimate the latency saved
+POLL_INTERVAL_SECONDS = 2.0
+
+PROGRESS_BINDING = "__grokReportProgress"
+
+# Shared JS helpers: locate the generate button and decide whether the
+# generation finished. Mirrors the selectors GrokService uses. Without an
+# armed baseline (window.__grokCompletionState) everything on the page counts.
+_PAGE_HELPERS = """
+    const textOf = (el) => (el && el.textContent || "").trim().toLowerCase();
+    const findGenerateButton = () => {
+        const direct = document.querySelector("#generate-btn, .generate-button, [aria-label='Generate']");
+        if (direct) return direct;
+        return Array.from(document.querySelectorAll("button"))
+            .find((b) => /^(generate|create)/.test(textOf(b))) || null;
+    };
+    const readProgress = () => {
+        const bar = document.querySelector(".progress-bar");
+        const button = findGenerateButton();
+        return [bar ? (bar.textContent || "").trim() : null, !!(button && button.disabled)];
+    };
+    const noteWork = () => {
+        const state = window.__grokCompletionState;
+        if (!state) return;
+        const button = findGenerateButton();
+        if (button && button.disabled) state.busySeen = true;
+        if (textOf(document.querySelector(".progress-bar")) !== state.barText) state.barMoved = true;
+    };
+    // Present before the click: only counts once the job was seen running,
+    // or for an image whose source changed
+    const isNew = (el) => {
+        const state = window.__grokCompletionState;
+        if (!state || state.busySeen || !state.stale.has(el)) return true;
+        return el.tagName === "IMG" && state.stale.get(el) !== (el.currentSrc || el.src || "");
+    };
+    const isComplete = () => {
+        noteWork();
+        const state = window.__grokCompletionState;
+        const button = findGenerateButton();
+        if (!(button && button.disabled)) {
+            const download = Array.from(document.querySelectorAll("button"))
+                .find((b) => textOf(b).includes("download") && isNew(b));
+            const preview = Array.from(document.querySelectorAll(".result-preview img"))
+                .find((img) => isNew(img) && img.complete && img.naturalWidth > 0);
+            if (download || preview) return true;
+        }
+        const bar = document.querySelector(".progress-bar");
+        if (bar && (!state || state.busySeen || state.barMoved)) {
+            const text = textOf(bar);
+            if (text.includes("100%") || text.includes("complete")) return true;
+        }
+        return false;
+    };
+"""
+
+COMPLETION_PREDICATE = "() => {%s\n    return isComplete();\n}" % _PAGE_HELPERS
+
+# Records what already shows a result before the click (see isNew)
+BASELINE_SCRIPT = """() => {
+%s
+    const stale = new WeakMap();
+    document.querySelectorAll("button, .result-preview img")
+        .forEach((el) => stale.set(el, el.currentSrc || el.src || ""));
+    window.__grokCompletionState = {
+        stale: stale,
+        barText: textOf(document.querySelector(".progress-bar")),
+        busySeen: false,
+        barMoved: false,
+    };
+}""" % _PAGE_HELPERS
+
+MUTATION_WAIT_SCRIPT = """(timeoutMs) => new Promise((resolve) => {
+%s
+    let lastState = null;
+    let timer = null;
+    const onChange = () => {
+        const state = JSON.stringify(readProgress());
+        if (state !== lastState) {
+            lastState = state;
+            if (window.%s) window.%s(...JSON.parse(state));
+        }
+        if (isComplete()) finish(true);
+    };
+    const observer = new MutationObserver(onChange);
+    const finish = (value) => {
+        observer.disconnect();
+        document.removeEventListener("load", onChange, true);
+        document.removeEventListener("loadeddata", onChange, true);
+        clearTimeout(timer);
+        window.__grokCancelCompletionWait = null;
+        resolve(value);
+    };
+    observer.observe(document.documentElement, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+    // Image/video loads don't mutate the DOM, listen for them separately
+    document.addEventListener("load", onChange, true);
+    document.addEventListener("loadeddata", onChange, true);
+    timer = setTimeout(() => finish(false), timeoutMs);
+    window.__grokCancelCompletionWait = () => finish(false);
+    onChange();
+})""" % (_PAGE_HELPERS, PROGRESS_BINDING, PROGRESS_BINDING)
+
+# Called with the progress bar text (if any) and whether generation is busy
+ProgressListener = Callable[[Optional[str], bool], None]
+
+# Progress listener of the detector currently running on each page
+_page_listeners: "weakref.WeakKeyDictionary[Page, ProgressListener]" = weakref.WeakKeyDictionary()
+_pages_with_binding: "weakref.WeakSet[Page]" = weakref.WeakSet()
+
+
+class CompletionStats:
+    """
+    Counts how generations finished and how much latency event-driven
+    detection saved compared to the former 2-second polling loop
+    """
+
+    def __init__(self):
+        self.detections: Dict[str, int] = {}
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.estimated_saved_seconds = 0.0
+
+    def record(self, signal: Optional[str], elapsed: float):
+        self.total_wait_seconds += elapsed
+        if signal is None:
+            self.timeouts += 1
+            return
+
+        self.detections[signal] = self.detections.get(signal, 0) + 1
+        # The polling loop would only have noticed at its next 2s tick
+        self.estimated_saved_seconds += POLL_INTERVAL_SECONDS - (elapsed % POLL_INTERVAL_SECONDS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        completed = sum(self.detections.values())
+        return {
+            "detections": dict(self.detections),
+            "timeouts": self.timeouts,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "estimated_saved_seconds": round(self.estimated_saved_seconds, 3),
+            "avg_saved_seconds": round(self.estimated_saved_seconds / completed, 3) if completed else 0.0,
+        }
+
+
+completion_stats = CompletionStats()
+
+
+def is_result_response(response: Response) -> bool:
+    """
+    Check whether a network response looks like the generated image/video
+    """
+    try:
+        if not response.ok:
+            return False
+
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith(("image/", "video/")):
+            return False
+
+        if not re.search(config.GROK_RESULT_URL_PATTERN, response.url, re.IGNORECASE):
+            return False
+
+        content_length = response.headers.get("content-length")
+        if content_length and int(content_length) < config.GROK_RESULT_MIN_BYTES:
+            return False
+
+        return True
+    except Exception:
+        return False
+
+
+class CompletionDetector:
+    """
+    Resolves as soon as the generated result shows up on the page
+    """
+
+    def __init__(self, page: Page, on_progress: Optional[ProgressListener] = None):
+        self.page = page
+        self.on_progress = on_progress
+        self.result_response: Optional[Response] = None
+        self.signal: Optional[str] = None
+        self._network_result: Optional[asyncio.Future] = None
+
+    async def arm(self):
+        """
+        Start listening for the result; call before clicking generate so a
+        fast response can't slip through unnoticed
+        """
+        self._network_result = asyncio.get_running_loop().create_future()
+        self.page.on("response", self._on_response)
+
+        if self.on_progress is not None:
+            _page_listeners[self.page] = self.on_progress
+        await self._ensure_progress_binding()
+
+        try:
+            await self.page.evaluate(BASELINE_SCRIPT)
+        except Exception as e:
+            logger.debug(f"Could not record the completion baseline: {str(e)}")
+
+    @traced("playwright.completion")
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait up to timeout seconds for the generation to finish
+        """
+        if self._network_result is None:
+            await self.arm()
+        network_result = self._network_result
+
+        timeout_ms = int(timeout * 1000)
+        started = time.monotonic()
+        signals = {
+            asyncio.create_task(self._wait_for_mutation(timeout_ms)): "mutation",
+            asyncio.create_task(self._wait_for_function(timeout_ms)): "function",
+            asyncio.create_task(self._wait_for_network(network_result)): "network",
+        }
+        pending = set(signals)
+
+        try:
+            while pending:
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if not task.cancelled() and task.exception() is None and task.result():
+                        self.signal = signals[task]
+                        break
+                if self.signal:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await self.close()
+
+        # The asset response usually arrives before the DOM shows the result
+        if self.result_response is None and network_result.done() and not network_result.cancelled():
+            self.result_response = network_result.result()
+
+        elapsed = time.monotonic() - started
+        completion_stats.record(self.signal, elapsed)
+        current = current_span()
+        if current is not None:
+            current.set_attribute("timeout", timeout)
+            current.set_attribute("signal", self.signal)
+
+        if self.signal:
+            logger.info(f"Generation completed after {elapsed:.2f}s (detected via {self.signal})")
+            return True
+
+        logger.warning(f"Generation not detected as complete within {timeout}s")
+        return False
+
+    async def _wait_for_mutation(self, timeout_ms: int) -> bool:
+        return bool(await self.page.evaluate(MUTATION_WAIT_SCRIPT, timeout_ms))
+
+    async def _wait_for_function(self, timeout_ms: int) -> bool:
+        await self.page.wait_for_function(
+            COMPLETION_PREDICATE,
+            timeout=timeout_ms,
+            polling=config.GROK_COMPLETION_POLL_INTERVAL
+        )
+        return True
+
+    async def _wait_for_network(self, network_result: asyncio.Future) -> bool:
+        self.result_response = await network_result
+        return True
+
+    def _on_response(self, response: Response):
+        if self._network_result is None or self._network_result.done():
+            return
+        if is_result_response(response):
+            logger.info(f"Generated asset response detected: {response.url[:120]}")
+            self._network_result.set_result(response)
+
+    async def _ensure_progress_binding(self):
+        if self.page in _pages_with_binding:
+            return
+
+        page_ref = weakref.ref(self.page)
+
+        def dispatch(progress_text: Optional[str], busy: bool):
+            page = page_ref()
+            listener = _page_listeners.get(page) if page is not None else None
+            if listener is not None:
+                try:
+                    listener(progress_text, busy)
+                except Exception as e:
+                    logger.warning(f"Progress listener failed: {str(e)}")
+
+        try:
+            await self.page.expose_function(PROGRESS_BINDING, dispatch)
+            _pages_with_binding.add(self.page)
+        except Exception as e:
+            logger.debug(f"Could not expose progress binding: {str(e)}")
+
+    async def close(self):
+        """
+        Stop listening; safe to call more than once
+        """
+        if self._network_result is None:
+            return
+        if not self._network_result.done():
+            self._network_result.cancel()
+        self._network_result = None
+
+        self.page.remove_listener("response", self._on_response)
+        _page_listeners.pop(self.page, None)
+        try:
+            await self.page.evaluate(
+                "() => window.__grokCancelCompletionWait && window.__grokCancelCompletionWait()"
+            )
+        except Exception:
+            pass
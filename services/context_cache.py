@@ -0,0 +1,181 @@
+"""
+Profile Context Cache Module
+
+Process-wide cache of authenticated browser contexts used by
+SessionManager.get_page() when no browser pool is running. Contexts are
+keyed by the profile they were built from:
+
+- "persistent:<user_data_dir>" - a persistent Chromium profile (headed mode)
+- "storage_state:<snapshot file>" - a fresh context restored from a storage
+  state snapshot (headless mode)
+
+Each cached context keeps a home page that was navigated to Grok once, so
+later generations reuse it instead of navigating and waiting for the page
+to become ready before every run.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable
+from playwright.async_api import Browser, BrowserContext, Page
+from config import config
+from services.login_probe import session_ready_conditions
+from services.readiness import wait_until_ready
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class CachedContext:
+    """
+    An authenticated context plus the resources needed to close it
+    """
+
+    def __init__(
+        self,
+        key: str,
+        context: BrowserContext,
+        playwright: Any = None,
+        browser: Optional[Browser] = None,
+        source_version: Optional[float] = None
+    ):
+        self.key = key
+        self.context = context
+        self.playwright = playwright
+        self.browser = browser
+        self.source_version = source_version
+        self.home_page: Optional[Page] = None
+        self.home_busy = False
+        self.closed = False
+        self.leases = 0
+        context.on("close", self._on_close)
+
+    def _on_close(self, *args):
+        self.closed = True
+
+    def is_usable(self) -> bool:
+        if self.closed:
+            return False
+        if self.browser is not None and not self.browser.is_connected():
+            return False
+        return True
+
+    async def home(self) -> Page:
+        """
+        Get the home page, navigating to Grok only the first time
+        """
+        if self.home_page is None or self.home_page.is_closed():
+            page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+            with span("playwright.goto", kind="client", url=config.GROK_URL, timeout=config.BROWSER_TIMEOUT):
+                await page.goto(config.GROK_URL, wait_until="domcontentloaded", timeout=config.BROWSER_TIMEOUT)
+            await wait_until_ready(page, "context_cache.home", session_ready_conditions(), config.BROWSER_TIMEOUT)
+            self.home_page = page
+        return self.home_page
+
+    async def close(self):
+        self.closed = True
+        for resource in (self.context, self.browser, self.playwright):
+            if resource is None:
+                continue
+            try:
+                if resource is self.playwright:
+                    await resource.stop()
+                else:
+                    await resource.close()
+            except Exception:
+                pass
+
+
+ContextFactory = Callable[[], Awaitable[CachedContext]]
+
+
+class ContextCache:
+    """
+    Keeps one authenticated context per profile for the life of the process
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, CachedContext] = {}
+        self._creating: Dict[str, asyncio.Future] = {}
+
+    async def get(
+        self,
+        key: str,
+        factory: ContextFactory,
+        source_version: Optional[float] = None
+    ) -> CachedContext:
+        """
+        Get the cached context for a profile, creating it with factory when
+        missing, closed, or built from an older source_version
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (not entry.is_usable() or entry.source_version != source_version):
+            logger.info(f"Cached context {key} is stale, recreating it")
+            await self.evict(key)
+            entry = None
+
+        if entry is not None:
+            return entry
+
+        # Concurrent callers share a single creation
+        creating = self._creating.get(key)
+        if creating is None:
+            creating = asyncio.ensure_future(factory())
+            self._creating[key] = creating
+            try:
+                entry = await creating
+            finally:
+                self._creating.pop(key, None)
+            entry.source_version = source_version
+            self._entries[key] = entry
+            logger.info(f"Cached new context for {key}")
+            return entry
+
+        return await asyncio.shield(creating)
+
+    @asynccontextmanager
+    async def lease(self, entry: CachedContext) -> AsyncIterator[Page]:
+        """
+        Lease the already navigated home page, or a fresh page when another
+        generation is using it
+        """
+        entry.leases += 1
+        if not entry.home_busy:
+            entry.home_busy = True
+            try:
+                yield await entry.home()
+            finally:
+                entry.home_busy = False
+            return
+
+        page = await entry.context.new_page()
+        try:
+            yield page
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def evict(self, key: str):
+        """
+        Close and forget the cached context of a profile
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            await entry.close()
+            logger.info(f"Closed cached context {key}")
+
+    async def close_all(self):
+        for key in list(self._entries):
+            await self.evict(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            key: {"leases": entry.leases, "home_busy": entry.home_busy, "usable": entry.is_usable()}
+            for key, entry in self._entries.items()
+        }
+
+
+context_cache = ContextCache()
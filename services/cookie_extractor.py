@@ -19,6 +19,13 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from config import config
+from services.selector_cache import get_selector_cache
+from services.storage_state import StorageStateStore
+from services.resource_blocking import apply_validation_profile
+from services.login_probe import session_ready_conditions, post_login_conditions
+from services.readiness import Readiness, wait_until_ready
+from services.cookie_pipeline import normalize_jar
+from utils.tracing import traced, span
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +64,7 @@ class GrokCookieExtractor:
                     viewport={"width": 1280, "height": 800},
                     ignore_https_errors=True,
                 )
+                await apply_validation_profile(self.context)
                 self.browser = None
     
     async def close(self):
@@ -89,6 +97,7 @@ class GrokCookieExtractor:
                 pass
             self.playwright = None
     
+    @traced("cookie_extractor.extract_cookies")
     async def extract_cookies(
         self,
         email: str,
@@ -119,6 +128,7 @@ class GrokCookieExtractor:
                     viewport={"width": 1280, "height": 800},
                     ignore_https_errors=True
                 )
+                await apply_validation_profile(self.context)
 
             if self.context is None:
                 raise Exception("Browser context not initialized")
@@ -180,9 +190,10 @@ class GrokCookieExtractor:
         login_timeout = timeout_seconds * 1000
         
         try:
-            await self.page.goto(config.GROK_URL, timeout=login_timeout)
+            with span("playwright.goto", kind="client", url=config.GROK_URL, timeout=login_timeout):
+                await self.page.goto(config.GROK_URL, wait_until="domcontentloaded", timeout=login_timeout)
             
-            await self.page.wait_for_load_state("networkidle", timeout=30000)
+            await wait_until_ready(self.page, "cookie_extractor.login_page", session_ready_conditions(), 30000)
             
             email_selectors = [
                 'input[type="email"]',
@@ -198,24 +209,17 @@ class GrokCookieExtractor:
                 'input[id*="password"]'
             ]
             
-            email_input = None
-            for selector in email_selectors:
-                try:
-                    email_input = await self.page.wait_for_selector(
-                        selector, timeout=10000
-                    )
-                    if email_input:
-                        break
-                except Exception:
-                    continue
+            _, email_input = await get_selector_cache().find(self.page, "email_input", email_selectors, timeout=10000)
             
             if not email_input:
                 raise Exception("Email input field not found")
             
-            await self.page.fill('input[type="email"]', email)
+            await email_input.fill(email)
             
-            await self.page.wait_for_selector('input[type="password"]', timeout=10000)
-            await self.page.fill('input[type="password"]', password)
+            _, password_input = await get_selector_cache().find(self.page, "password_input", password_selectors, timeout=10000)
+            if not password_input:
+                raise Exception("Password input field not found")
+            await password_input.fill(password)
             
             submit_selectors = [
                 'button[type="submit"]',
@@ -224,23 +228,15 @@ class GrokCookieExtractor:
                 'button:has-text("Continue")'
             ]
             
-            submit_button = None
-            for selector in submit_selectors:
-                try:
-                    submit_button = await self.page.wait_for_selector(
-                        selector, timeout=5000
-                    )
-                    if submit_button:
-                        break
-                except Exception:
-                    continue
+            _, submit_button = await get_selector_cache().find(self.page, "submit_button", submit_selectors, timeout=5000)
             
+            readiness = Readiness(self.page, "cookie_extractor.login", post_login_conditions(self.page), login_timeout)
             if submit_button:
                 await submit_button.click()
             else:
-                await self.page.press('input[type="password"]', 'Enter')
+                await password_input.press('Enter')
             
-            await self.page.wait_for_load_state("networkidle", timeout=login_timeout)
+            await readiness.wait()
             
             current_url = self.page.url
             logger.info(f"Login navigation complete. Current URL: {current_url}")
@@ -254,22 +250,7 @@ class GrokCookieExtractor:
         Extract all cookies from the current browser context
         """
         raw_cookies = await self.context.cookies()
-        
-        formatted_cookies = []
-        for cookie in raw_cookies:
-            formatted_cookie = {
-                "name": cookie.get("name", ""),
-                "value": cookie.get("value", ""),
-                "domain": cookie.get("domain", ""),
-                "path": cookie.get("path", "/"),
-                "expires": cookie.get("expires"),
-                "httpOnly": cookie.get("httpOnly", False),
-                "secure": cookie.get("secure", False),
-                "sameSite": cookie.get("sameSite")
-            }
-            formatted_cookies.append(formatted_cookie)
-        
-        return formatted_cookies
+        return [record.to_export() for record in normalize_jar(raw_cookies)]
 
 
 async def extract_cookies_from_grok(
@@ -681,6 +662,13 @@ class ManualOAuthExtractor:
                 # Save cookies to file
                 save_path = save_cookies_to_file(cookies)
                 
+                if login_success:
+                    # Keep localStorage too, so new contexts restore the full session
+                    try:
+                        await StorageStateStore().capture(self.context, "manual_oauth")
+                    except Exception as e:
+                        logger.warning(f"Could not capture storage state: {e}")
+                
                 result = {
                     "status": "success",
                     "message": "Cookies extracted successfully",
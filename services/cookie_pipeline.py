@@ -0,0 +1,297 @@
+"""
+Cookie Normalization Pipeline Module
+
+One set of rules for turning exported or extracted cookies into cookies
+Playwright accepts, applied in a single pass per jar:
+
+- name and value are required
+- domain is trimmed and lower-cased; a leading dot is kept, and added for
+  short subdomain labels like "www.grok.com"
+- path defaults to "/", httpOnly/secure are coerced to booleans
+- expires in milliseconds is converted to seconds; expired cookies are
+  dropped; -1/0/missing (or unparsable) means a session cookie
+- sameSite is mapped to Lax/Strict/None ("no_restriction" -> None,
+  "unspecified" -> Lax, unknown values dropped), and SameSite=None forces
+  secure, which browsers require
+
+Each cookie becomes a compact CookieRecord. The fast path (normalize_jar,
+playwright_cookies) collects no messages; passing a CookieIssues to
+normalize_cookie records the errors, warnings and fixes behind
+EnhancedCookieInjector.validate_cookie's report.
+"""
+
+import time
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+# Values above this are millisecond timestamps (beyond the year 2286 in seconds)
+_MILLISECONDS_THRESHOLD = 1e10
+
+MAX_COOKIE_BYTES = 4096
+
+_SAME_SITE = {
+    "lax": "Lax",
+    "strict": "Strict",
+    "none": "None",
+    "no_restriction": "None",
+    "unspecified": "Lax",  # Browser default
+}
+_CANONICAL_SAME_SITE = frozenset(("Lax", "Strict", "None"))
+
+# A jar spans a handful of domains; their normalized form is memoized
+_DOMAIN_CACHE_SIZE = 1024
+_domain_cache: Dict[str, Tuple[str, bool]] = {}
+
+
+def _normalize_domain(domain_raw: str) -> Tuple[str, bool]:
+    """
+    Normalized domain ("" when empty) and whether a leading dot was added
+    """
+    cached = _domain_cache.get(domain_raw)
+    if cached is not None:
+        return cached
+
+    domain = domain_raw.strip().lower()
+    domain_clean = domain.lstrip(".")
+    added_dot = False
+    if not domain_clean:
+        domain = ""
+    elif domain[0] == ".":
+        domain = "." + domain_clean
+    else:
+        first_label, _, rest = domain_clean.partition(".")
+        # Short first label like "www" or "api": a subdomain cookie.
+        # Otherwise a standard domain or one like "accounts.x.ai", kept as is
+        added_dot = len(first_label) <= 3 and "." in rest
+        domain = "." + domain_clean if added_dot else domain_clean
+
+    if len(_domain_cache) >= _DOMAIN_CACHE_SIZE:
+        _domain_cache.clear()
+    _domain_cache[domain_raw] = (domain, added_dot)
+    return domain, added_dot
+
+
+class CookieRecord:
+    """
+    A normalized cookie; expires and same_site are None when not set
+    """
+
+    __slots__ = ("name", "value", "domain", "path", "expires", "http_only", "secure", "same_site")
+
+    def __init__(
+        self,
+        name: str,
+        value: str,
+        domain: str,
+        path: str = "/",
+        expires: Optional[float] = None,
+        http_only: bool = False,
+        secure: bool = False,
+        same_site: Optional[str] = None
+    ):
+        self.name = name
+        self.value = value
+        self.domain = domain
+        self.path = path
+        self.expires = expires
+        self.http_only = http_only
+        self.secure = secure
+        self.same_site = same_site
+
+    def to_playwright(self) -> Dict[str, Any]:
+        """Cookie dict for BrowserContext.add_cookies"""
+        cookie = {
+            "name": self.name,
+            "value": self.value,
+            "domain": self.domain,
+            "path": self.path,
+            "httpOnly": self.http_only,
+            "secure": self.secure,
+        }
+        if self.expires is not None:
+            cookie["expires"] = self.expires
+        if self.same_site is not None:
+            cookie["sameSite"] = self.same_site
+        return cookie
+
+    def to_export(self) -> Dict[str, Any]:
+        """Cookie dict as written to cookie files (-1 expires for session cookies)"""
+        return {
+            "name": self.name,
+            "value": self.value,
+            "domain": self.domain,
+            "path": self.path,
+            "expires": self.expires if self.expires is not None else -1,
+            "httpOnly": self.http_only,
+            "secure": self.secure,
+            "sameSite": self.same_site,
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CookieRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"CookieRecord(name={self.name!r}, domain={self.domain!r}, path={self.path!r})"
+
+
+class CookieIssues:
+    """
+    Errors (cookie rejected), warnings and applied fixes for one cookie
+    """
+
+    __slots__ = ("errors", "warnings", "fixes")
+
+    def __init__(self):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.fixes: List[str] = []
+
+
+def normalize_cookie(
+    cookie: Dict[str, Any],
+    now: Optional[float] = None,
+    issues: Optional[CookieIssues] = None
+) -> Optional[CookieRecord]:
+    """
+    Normalize one cookie; None when it is invalid or expired.
+
+    Without issues the first error returns right away; with issues every
+    problem is recorded.
+    """
+    report = issues is not None
+    valid = True
+
+    name = cookie.get("name")
+    value = cookie.get("value")
+    if not name or not value:
+        if not report:
+            return None
+        for field, field_value in (("name", name), ("value", value)):
+            if not field_value:
+                issues.errors.append(f"Missing or empty required field: '{field}'")
+        valid = False
+
+    # Domain
+    domain_raw = cookie.get("domain")
+    domain, added_dot = _normalize_domain(str(domain_raw)) if domain_raw else ("", False)
+    if not domain:
+        if not report:
+            return None
+        issues.errors.append("Missing domain field")
+        valid = False
+    elif added_dot and report:
+        issues.warnings.append(f"Domain '{domain_raw}' should start with '.' for subdomain cookies")
+        issues.fixes.append(f"Added leading dot to domain: {domain}")
+
+    # Path
+    path = cookie.get("path", "/")
+    if not path or not isinstance(path, str):
+        if report:
+            issues.warnings.append(f"Invalid path '{path}', using default '/'")
+            issues.fixes.append("Set path to default '/'")
+        path = "/"
+
+    # Flags
+    http_only = cookie.get("httpOnly", False)
+    if http_only.__class__ is not bool:
+        if report:
+            issues.warnings.append(f"Field 'httpOnly' should be boolean, got {type(http_only).__name__}")
+            issues.fixes.append("Converted httpOnly to boolean")
+        http_only = bool(http_only)
+    secure = cookie.get("secure", False)
+    if secure.__class__ is not bool:
+        if report:
+            issues.warnings.append(f"Field 'secure' should be boolean, got {type(secure).__name__}")
+            issues.fixes.append("Converted secure to boolean")
+        secure = bool(secure)
+
+    # Expiry
+    expires = cookie.get("expires")
+    if expires is not None:
+        if not isinstance(expires, (int, float)):
+            try:
+                expires = float(expires)
+            except (TypeError, ValueError):
+                if report:
+                    issues.warnings.append(
+                        f"Invalid expires value {expires!r}, treating as a session cookie"
+                    )
+                    issues.fixes.append("Removed invalid expires")
+                expires = None
+        if expires is not None:
+            if expires > _MILLISECONDS_THRESHOLD:
+                if report:
+                    issues.warnings.append(
+                        f"Converting expires from milliseconds to seconds ({expires} -> {expires / 1000})"
+                    )
+                    issues.fixes.append("Divided expires by 1000 (ms -> s)")
+                expires = expires / 1000
+            if expires <= 0:
+                expires = None
+            else:
+                if now is None:
+                    now = time.time()
+                if expires < now:
+                    if not report:
+                        return None
+                    issues.errors.append(f"Cookie expired {(now - expires) / 3600:.1f} hours ago")
+                    valid = False
+                expires = float(expires)
+
+    # SameSite
+    same_site = cookie.get("sameSite")
+    if same_site:
+        same_site_str = str(same_site)
+        if same_site_str in _CANONICAL_SAME_SITE:
+            same_site = same_site_str
+        else:
+            same_site = _SAME_SITE.get(same_site_str.lower())
+            if report:
+                if same_site:
+                    issues.warnings.append(f"Invalid sameSite value '{same_site_str}', normalized to '{same_site}'")
+                    issues.fixes.append(f"Normalized sameSite to {same_site}")
+                else:
+                    issues.warnings.append(f"Unknown sameSite value '{same_site_str}', removing")
+                    issues.fixes.append("Removed invalid sameSite value")
+        if same_site == "None" and not secure:
+            # Browsers reject SameSite=None cookies that aren't Secure
+            if report:
+                issues.warnings.append("SameSite=None requires Secure=True, auto-enabling")
+                issues.fixes.append("Set secure=True for SameSite=None cookie")
+            secure = True
+    else:
+        same_site = None
+
+    if report:
+        size = len(str(name or "")) + len(str(value or ""))
+        if size > MAX_COOKIE_BYTES:
+            issues.warnings.append(f"Cookie size is {size} bytes (limit is {MAX_COOKIE_BYTES})")
+
+    if not valid:
+        return None
+    return CookieRecord(str(name), str(value), domain, path, expires, http_only, secure, same_site)
+
+
+def normalize_jar(cookies: Iterable[Dict[str, Any]], now: Optional[float] = None) -> List[CookieRecord]:
+    """
+    Normalize a cookie jar in one pass, dropping invalid and expired cookies
+    """
+    if now is None:
+        now = time.time()
+    normalize = normalize_cookie
+    return [record for record in (normalize(cookie, now) for cookie in cookies) if record is not None]
+
+
+def playwright_cookies(cookies: Iterable[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Normalize a cookie jar straight into add_cookies dicts
+    """
+    if now is None:
+        now = time.time()
+    normalize = normalize_cookie
+    return [
+        record.to_playwright()
+        for record in (normalize(cookie, now) for cookie in cookies)
+        if record is not None
+    ]
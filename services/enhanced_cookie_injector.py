@@ -3,12 +3,13 @@ Enhanced Cookie Injection Module
 Provides improved cookie validation, detailed error reporting, and automatic fix suggestions
 """
 
-import asyncio
 import logging
-from datetime import datetime
 from typing import Dict, Any, List, Tuple, Optional
 from playwright.async_api import BrowserContext
 from config import config
+from services.metrics import cookie_injection_seconds, cookies_injected_total
+from services.cookie_pipeline import CookieIssues, normalize_cookie
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -27,156 +28,42 @@ class EnhancedCookieInjector:
         Returns:
             Dict with validation result, including fixed cookie or error details
         """
-        errors = []
-        warnings = []
-        fixes = []
-        
-        original_cookie = cookie.copy()
-        fixed_cookie = {}
-        
-        # Check required fields
-        required_fields = ["name", "value"]
-        for field in required_fields:
-            if field not in cookie or not cookie[field]:
-                errors.append(f"Missing or empty required field: '{field}'")
-        
-        # Extract basic fields
-        name = cookie.get("name", "")
-        value = cookie.get("value", "")
-        
-        if not errors:
-            fixed_cookie["name"] = str(name)
-            fixed_cookie["value"] = str(value)
-        
-        # Validate domain
-        domain = cookie.get("domain", "")
-        if not domain:
-            errors.append("Missing domain field")
-        else:
-            # Fix domain format
-            domain_str = str(domain).strip().lower()
-            had_leading_dot = domain_str.startswith(".")
-            domain_clean = domain_str.lstrip(".")
-
-            # Count parts in domain
-            parts = domain_clean.split(".")
-            dot_count = len(parts) - 1
-
-            # Determine if we should add leading dot
-            # - If original had dot, keep it
-            # - If domain has 2+ dots AND first part is NOT a known TLD pattern, add dot
-            # - For standard two-part domains (e.g., "accounts.x.ai"), keep as-is
-
-            if had_leading_dot:
-                # Original had dot, keep it
-                fixed_cookie["domain"] = "." + domain_clean
-            elif dot_count >= 2 and len(parts[0]) <= 3:
-                # Short first part like "www", "api", etc. - likely a subdomain
-                # Examples: "www.grok.com" → ".www.grok.com" (subdomain cookie)
-                warnings.append(f"Domain '{domain}' should start with '.' for subdomain cookies")
-                fixes.append(f"Added leading dot to domain: .{domain_clean}")
-                fixed_cookie["domain"] = "." + domain_clean
-            else:
-                # Standard domain or known multi-part domain like "accounts.x.ai"
-                # Keep as-is without leading dot
-                fixed_cookie["domain"] = domain_clean
-        
-        # Validate path
-        path = cookie.get("path", "/")
-        if not path or not isinstance(path, str):
-            warnings.append(f"Invalid path '{path}', using default '/'")
-            fixes.append("Set path to default '/'")
-            fixed_cookie["path"] = "/"
-        else:
-            fixed_cookie["path"] = str(path)
-        
-        # Validate boolean fields
-        for field, default in [("httpOnly", False), ("secure", False)]:
-            value = cookie.get(field, default)
-            if not isinstance(value, bool):
-                warnings.append(f"Field '{field}' should be boolean, got {type(value).__name__}")
-                fixes.append(f"Converted {field} to boolean")
-                fixed_cookie[field] = bool(value)
-            else:
-                fixed_cookie[field] = value
-
-        # CRITICAL: SameSite=None requires Secure=True (browser security requirement)
-        same_site = cookie.get("sameSite")
-        if same_site:
-            same_site_str = str(same_site)
-            if same_site_str.lower() == "none":
-                if not fixed_cookie.get("secure", False):
-                    warnings.append("SameSite=None requires Secure=True, auto-enabling")
-                    fixes.append("Set secure=True for SameSite=None cookie")
-                    fixed_cookie["secure"] = True
-        
-        # Validate and normalize expires
-        expires = cookie.get("expires")
-        if expires is not None:
-            try:
-                if isinstance(expires, (int, float)):
-                    epoch_ts = float(expires)
-                    # Fix millisecond timestamps
-                    if epoch_ts > 1e10:  # If timestamp is in milliseconds (beyond year 2286)
-                        epoch_ts = epoch_ts / 1000
-                        warnings.append(f"Converting expires from milliseconds to seconds ({expires} -> {epoch_ts})")
-                        fixes.append("Divided expires by 1000 (ms -> s)")
-                    
-                    # Check if expired
-                    now = datetime.now().timestamp()
-                    if epoch_ts > 0 and epoch_ts < now:
-                        hours_ago = (now - epoch_ts) / 3600
-                        errors.append(f"Cookie expired {hours_ago:.1f} hours ago")
-                    
-                    fixed_cookie["expires"] = epoch_ts
-                else:
-                    errors.append(f"Invalid expires type: {type(expires).__name__}, expected int/float")
-            except Exception as e:
-                errors.append(f"Error parsing expires: {str(e)}")
-                # Don't include invalid expires
-        
-        # Validate sameSite
-        same_site = cookie.get("sameSite")
-        if same_site:
-            same_site_str = str(same_site)
-            valid_values = ["Lax", "Strict", "None"]
-            
-            if same_site_str in valid_values:
-                fixed_cookie["sameSite"] = same_site_str
-            else:
-                # Try to normalize
-                normalized = {
-                    "lax": "Lax",
-                    "strict": "Strict",
-                    "none": "None",
-                    "no_restriction": "None",
-                    "unspecified": "Lax"  # Common default
-                }.get(same_site_str.lower())
-                
-                if normalized:
-                    warnings.append(f"Invalid sameSite value '{same_site_str}', normalized to '{normalized}'")
-                    fixes.append(f"Normalized sameSite to {normalized}")
-                    fixed_cookie["sameSite"] = normalized
-                else:
-                    warnings.append(f"Unknown sameSite value '{same_site_str}', removing")
-                    fixes.append(f"Removed invalid sameSite value")
-        
-        # Size check (browsers have cookie size limits)
-        cookie_size = len(fixed_cookie.get("name", "")) + len(fixed_cookie.get("value", ""))
-        if cookie_size > 4096:
-            warnings.append(f"Cookie size is {cookie_size} bytes (limit is 4096)")
+        issues = CookieIssues()
+        record = normalize_cookie(cookie, issues=issues)
+        valid = not issues.errors
         
         return {
             "index": index,
-            "original": original_cookie,
-            "fixed": fixed_cookie if len(errors) == 0 else None,
-            "valid": len(errors) == 0,
-            "errors": errors,
-            "warnings": warnings,
-            "fixes": fixes,
-            "cookie_size": cookie_size
+            "original": cookie,
+            "fixed": record.to_playwright() if valid else None,
+            "valid": valid,
+            "errors": issues.errors,
+            "warnings": issues.warnings,
+            "fixes": issues.fixes,
+            "cookie_size": len(str(cookie.get("name") or "")) + len(str(cookie.get("value") or ""))
         }
     
+    @staticmethod
+    def _describe_injection_error(error: Exception) -> str:
+        """
+        Turn a browser error from add_cookies into a readable message
+        """
+        error_msg = str(error)
+        
+        # Extract more details from common errors
+        if "net::" in error_msg:
+            # Network error
+            return f"Network Error: {error_msg}"
+        elif "Invalid cookie" in error_msg or "failed" in error_msg.lower():
+            # Cookie validation error from browser
+            return f"Browser rejected cookie: {error_msg}"
+        elif "domain" in error_msg.lower():
+            return f"Domain error: {error_msg}"
+        elif "expired" in error_msg.lower():
+            return f"Cookie expired: {error_msg}"
+        else:
+            return f"Unexpected error: {error_msg}"
+    
     @staticmethod
     async def inject_single_cookie(context: BrowserContext, cookie: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
         """
@@ -189,31 +76,67 @@ class EnhancedCookieInjector:
             await context.add_cookies([cookie])
             return True, None
         except Exception as e:
-            error_msg = str(e)
-            
-            # Extract more details from common errors
-            if "net::" in error_msg:
-                # Network error
-                return False, f"Network Error: {error_msg}"
-            elif "Invalid cookie" in error_msg or "failed" in error_msg.lower():
-                # Cookie validation error from browser
-                return False, f"Browser rejected cookie: {error_msg}"
-            elif "domain" in error_msg.lower():
-                return False, f"Domain error: {error_msg}"
-            elif "expired" in error_msg.lower():
-                return False, f"Cookie expired: {error_msg}"
-            else:
-                return False, f"Unexpected error: {error_msg}"
+            return False, EnhancedCookieInjector._describe_injection_error(e)
+    
+    @staticmethod
+    async def inject_cookie_batch(
+        context: BrowserContext,
+        cookies: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Inject cookies with one add_cookies call. Only when the browser
+        rejects the batch is it split in halves (recursively) to find out
+        exactly which cookies are bad.
+        
+        Returns:
+            One (success, error_message) tuple per cookie, in input order
+        """
+        if not cookies:
+            return []
+        
+        with span("playwright.add_cookies", cookies=len(cookies)) as current, cookie_injection_seconds.time():
+            outcomes = await EnhancedCookieInjector._add_cookies_bisecting(context, cookies)
+            injected = sum(1 for success, _ in outcomes if success)
+            if current is not None:
+                current.set_attribute("failed", len(outcomes) - injected)
+        
+        cookies_injected_total.inc(injected, outcome="injected")
+        cookies_injected_total.inc(len(outcomes) - injected, outcome="failed")
+        return outcomes
+    
+    @staticmethod
+    async def _add_cookies_bisecting(
+        context: BrowserContext,
+        cookies: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Optional[str]]]:
+        try:
+            await context.add_cookies(cookies)
+            return [(True, None)] * len(cookies)
+        except Exception as e:
+            if len(cookies) == 1:
+                return [(False, EnhancedCookieInjector._describe_injection_error(e))]
+        
+        middle = len(cookies) // 2
+        return (
+            await EnhancedCookieInjector._add_cookies_bisecting(context, cookies[:middle])
+            + await EnhancedCookieInjector._add_cookies_bisecting(context, cookies[middle:])
+        )
     
     @staticmethod
     async def inject_cookies_with_report(
         context: BrowserContext,
         cookies: List[Dict[str, Any]],
-        initial_page: Optional[Any] = None
+        initial_page: Optional[Any] = None,
+        batch: bool = True
     ) -> Dict[str, Any]:
         """
         Inject cookies with comprehensive validation and detailed reporting
         
+        With batch=True all valid cookies are sent in a single add_cookies
+        call (bisecting only on failure); otherwise one call per cookie.
+        initial_page is only used to warn when it is on a different domain
+        than the cookies.
+        
         Returns:
             Dict with injection results, metrics, and recommendations
         """
@@ -268,43 +191,21 @@ class EnhancedCookieInjector:
                 "error": "All cookies failed validation"
             }
         
-        # Phase 2: Visit domains to prime cookie store
-        if initial_page:
-            domains = set()
-            for cookie in valid_cookies:
-                domain = cookie.get("domain", "")
-                if domain:
-                    # Create visit URL from domain
-                    if domain.startswith("."):
-                        visit_domain = domain[1:]  # Remove leading dot
-                    else:
-                        visit_domain = domain
-                    
-                    # Choose protocol
-                    if "localhost" in visit_domain or visit_domain.startswith("127.0."):
-                        protocol = "http"
-                    else:
-                        protocol = "https"
-                    
-                    domains.add(f"{protocol}://{visit_domain}")
-            
-            logger.info(f"\nPhase 2: Priming cookie store by visiting {len(domains)} domains...")
-            for url in sorted(domains):
-                try:
-                    logger.info(f"  Visiting: {url}")
-                    await initial_page.goto(url, wait_until="domcontentloaded", timeout=15000)
-                    await asyncio.sleep(0.5)  # Brief pause
-                except Exception as e:
-                    logger.warning(f"  Failed to visit {url}: {str(e)}")
-        
-        # Phase 3: Inject valid cookies
-        logger.info(f"\nPhase 3: Injecting {len(valid_cookies)} validated cookies...")
+        # Phase 2: Inject valid cookies. add_cookies takes explicit domains, so
+        # there is no need to visit each domain first
+        logger.info(f"\nPhase 2: Injecting {len(valid_cookies)} validated cookies...")
         injected_count = 0
         failed_count = 0
         
-        for i, cookie in enumerate(valid_cookies):
-            success, error = await EnhancedCookieInjector.inject_single_cookie(context, cookie)
-            
+        if batch:
+            outcomes = await EnhancedCookieInjector.inject_cookie_batch(context, valid_cookies)
+        else:
+            outcomes = [
+                await EnhancedCookieInjector.inject_single_cookie(context, cookie)
+                for cookie in valid_cookies
+            ]
+        
+        for i, (cookie, (success, error)) in enumerate(zip(valid_cookies, outcomes)):
             cookie_name = cookie.get("name", f"unnamed_{i}")
             
             if success:
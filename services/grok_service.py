@@ -2,139 +2,364 @@ import os
 import logging
 import asyncio
 import uuid
+import re
+import time
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List, Tuple
 from datetime import datetime
-from playwright.async_api import Page, Locator
+from playwright.async_api import Page, Locator, Response
 from config import config
 from models.response_models import GenerationResponse, FileType
 from services.session_manager import SessionManager
+from services.browser_pool import BrowserPool, get_browser_pool
+from services.completion_detector import CompletionDetector
+from services.media_capture import save_response, extension_for, capture_stats
+from services.selector_cache import get_selector_cache
+from services import warm_tabs
+from services.readiness import SelectorCondition, wait_until_ready
+from services.result_cache import get_result_cache, cache_key
+from services.single_flight import generation_flights
+from services.metrics import generation_phase_seconds, generation_seconds, generations_total
+from utils.error_handling import QueueFullError
+from utils.tracing import span, traced, current_span
+from utils.browser_utils import BrowserUtils
+
+# Called with the current stage name and, when known, overall progress (0.0-1.0)
+ProgressCallback = Callable[[str, Optional[float]], None]
 
 class GrokService:
-    def __init__(self, session_manager: SessionManager):
+    def __init__(self, session_manager: SessionManager, browser_pool: Optional[BrowserPool] = None):
         self.session_manager = session_manager
+        self.browser_pool = browser_pool if browser_pool is not None else get_browser_pool()
         
-    async def generate_image(self, prompt: str, timeout: int = 300) -> GenerationResponse:
+    @traced("grok.generate_image")
+    async def generate_image(
+        self,
+        prompt: str,
+        timeout: int = 300,
+        progress_callback: Optional[ProgressCallback] = None,
+        bypass_cache: bool = False
+    ) -> GenerationResponse:
         """
         Generate an image using Grok AI through browser automation
         """
-        try:
-            page = await self.session_manager.get_page()
-            
-            # Navigate to image generation page
-            await self._navigate_to_generation_page(page, "image")
-            
-            # Find and fill the prompt input
-            prompt_input = await self._find_prompt_input(page)
-            await prompt_input.fill(prompt)
-            
-            # Find and click generate button
-            generate_button = await self._find_generate_button(page)
-            await generate_button.click()
-            
-            # Wait for generation to complete
-            generation_complete = await self._wait_for_generation_complete(page, timeout)
+        return await self._generate("image", prompt, timeout, progress_callback, bypass_cache)
             
-            if not generation_complete:
-                return GenerationResponse(
-                    success=False,
-                    error_message="Generation timed out"
-                )
-                
-            # Download the generated image
-            file_path = await self._download_generated_content(page, "image")
-            
-            return GenerationResponse(
-                success=True,
-                file_path=file_path,
-                file_type=FileType.image
-            )
-            
-        except Exception as e:
-            logging.error(f"Image generation failed: {str(e)}")
-            return GenerationResponse(
-                success=False,
-                error_message=str(e)
-            )
-            
-    async def generate_video(self, prompt: str, timeout: int = 600) -> GenerationResponse:
+    @traced("grok.generate_video")
+    async def generate_video(
+        self,
+        prompt: str,
+        timeout: int = 600,
+        progress_callback: Optional[ProgressCallback] = None,
+        bypass_cache: bool = False
+    ) -> GenerationResponse:
         """
         Generate a video using Grok AI through browser automation
         """
+        return await self._generate("video", prompt, timeout, progress_callback, bypass_cache)
+    
+    async def generate_image_batch(
+        self,
+        prompts: List[str],
+        timeout: int = 300,
+        concurrency: Optional[int] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Tuple[int, GenerationResponse]]:
+        """
+        Generate images for several prompts, yielding (index, result) pairs
+        as they complete.
+        
+        Cached prompts are answered first without a browser. The rest are
+        shared by up to concurrency workers; each worker leases one warm tab
+        for the whole batch and runs its prompts on it one after another, so
+        navigation and session setup are paid once per worker.
+        
+        Raises QueueFullError when no worker could lease a page because the
+        pool is saturated, so callers can shed load instead of reporting
+        every item as failed.
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue()
+        
+        for index, prompt in enumerate(prompts):
+            cached_path = None
+            if config.RESULT_CACHE_ENABLED and not bypass_cache:
+                cached_path = get_result_cache().get("image", prompt)
+            if cached_path is not None:
+                generations_total.inc(content_type="image", outcome="cached")
+                yield index, GenerationResponse(
+                    success=True,
+                    file_path=cached_path,
+                    file_type=FileType.image,
+                    cached=True
+                )
+            else:
+                pending.put_nowait(index)
+        
+        remaining = pending.qsize()
+        if not remaining:
+            return
+        
+        workers = max(1, min(concurrency or config.BATCH_MAX_CONCURRENCY, config.BATCH_MAX_CONCURRENCY, remaining))
+        lease_errors: List[Exception] = []
+        leased = 0
+        
+        async def worker():
+            nonlocal leased
+            try:
+                async with self._lease_page("image") as page:
+                    leased += 1
+                    while not pending.empty():
+                        index = pending.get_nowait()
+                        try:
+                            # The result cache was already consulted above
+                            result = await self._generate(
+                                "image", prompts[index], timeout, bypass_cache=True, page=page
+                            )
+                        except Exception as e:
+                            result = GenerationResponse(success=False, error_message=str(e))
+                        results.put_nowait((index, result))
+            except Exception as e:
+                # Could not get a browser; the other workers keep draining the prompts
+                logging.error(f"Batch worker could not lease a page: {str(e)}")
+                lease_errors.append(e)
+        
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        all_done = asyncio.ensure_future(asyncio.gather(*tasks))
         try:
-            page = await self.session_manager.get_page()
-            
-            # Navigate to video generation page
-            await self._navigate_to_generation_page(page, "video")
-            
-            # Find and fill the prompt input
-            prompt_input = await self._find_prompt_input(page)
-            await prompt_input.fill(prompt)
+            while remaining:
+                if results.empty() and all_done.done():
+                    break
+                next_result = asyncio.ensure_future(results.get())
+                await asyncio.wait({next_result, all_done}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_result.done():
+                    next_result.cancel()
+                    continue
+                remaining -= 1
+                yield next_result.result()
             
-            # Find and click generate button
-            generate_button = await self._find_generate_button(page)
-            await generate_button.click()
-            
-            # Wait for generation to complete (videos take longer)
-            generation_complete = await self._wait_for_generation_complete(page, timeout)
-            
-            if not generation_complete:
+            # Every worker failed to get a browser before the prompts ran out
+            if not pending.empty() and not leased:
+                for e in lease_errors:
+                    if isinstance(e, QueueFullError):
+                        raise e
+            error = (str(lease_errors[-1]) or type(lease_errors[-1]).__name__) if lease_errors else "Batch worker stopped"
+            while not pending.empty():
+                yield pending.get_nowait(), GenerationResponse(success=False, error_message=error)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(all_done, return_exceptions=True)
+    
+    @asynccontextmanager
+    async def _lease_page(
+        self,
+        content_type: Optional[str] = None,
+        page: Optional[Page] = None
+    ) -> AsyncIterator[Page]:
+        """
+        Lease a page from the shared browser pool (a warm tab parked on the
+        content type's generation page when available), or fall back to the
+        session manager's cached context when no pool is running.
+        
+        A page the caller already holds (e.g. a batch worker's tab) is used as is.
+        """
+        if page is not None:
+            yield page
+        elif self.browser_pool is not None:
+            async with self.browser_pool.lease(content_type) as page:
+                yield page
+        else:
+            async with self.session_manager.lease_page() as page:
+                yield page
+    
+    async def _generate(
+        self,
+        content_type: str,
+        prompt: str,
+        timeout: int,
+        progress_callback: Optional[ProgressCallback] = None,
+        bypass_cache: bool = False,
+        page: Optional[Page] = None
+    ) -> GenerationResponse:
+        """
+        Run a single generation of the given content type on a leased page
+        (or on page, when the caller already holds one).
+        
+        With the result cache enabled, a repeated prompt is answered with the
+        file saved for it before; bypass_cache forces a fresh generation
+        (whose result then replaces the cached one).
+        
+        Identical generations (same prompt and timeout) already in flight
+        are joined instead of started again: every caller gets the same
+        GenerationResponse.
+        """
+        if config.RESULT_CACHE_ENABLED and not bypass_cache:
+            cached_path = get_result_cache().get(content_type, prompt)
+            if cached_path is not None:
+                if progress_callback is not None:
+                    try:
+                        progress_callback("cached", 1.0)
+                    except Exception as e:
+                        logging.warning(f"Progress callback failed: {str(e)}")
+                generations_total.inc(content_type=content_type, outcome="cached")
                 return GenerationResponse(
-                    success=False,
-                    error_message="Generation timed out"
+                    success=True,
+                    file_path=cached_path,
+                    file_type=FileType(content_type),
+                    cached=True
                 )
+        
+        if page is not None or not config.GENERATION_COALESCING_ENABLED:
+            # A held page belongs to the caller's lease, which a shared
+            # flight could outlive; and others must not run on that tab
+            return await self._run_generation(content_type, prompt, timeout, progress_callback, page)
+        
+        # The timeout is part of the key so nobody inherits a shorter budget
+        return await generation_flights.run(
+            f"{cache_key(content_type, prompt)}:{timeout}",
+            lambda report: self._run_generation(content_type, prompt, timeout, report, page),
+            progress_callback
+        )
+    
+    @traced("grok.run_generation")
+    async def _run_generation(
+        self,
+        content_type: str,
+        prompt: str,
+        timeout: int,
+        progress_callback: Optional[ProgressCallback] = None,
+        held_page: Optional[Page] = None
+    ) -> GenerationResponse:
+        """
+        Drive the browser through one generation on a leased page
+        """
+        def report(stage: str, progress: Optional[float] = None):
+            if progress_callback is not None:
+                try:
+                    progress_callback(stage, progress)
+                except Exception as e:
+                    logging.warning(f"Progress callback failed: {str(e)}")
+        
+        @contextmanager
+        def phase(name: str):
+            with span(f"grok.{name}", content_type=content_type), \
+                    generation_phase_seconds.time(content_type=content_type, phase=name):
+                yield
+        
+        generation_span = current_span()
+        if generation_span is not None:
+            generation_span.set_attribute("content_type", content_type)
+            generation_span.set_attribute("prompt.length", len(prompt))
+            generation_span.set_attribute("timeout", timeout)
+        
+        started = time.monotonic()
+        outcome = "failure"
+        try:
+            report("waiting_for_browser", 0.0)
+            async with self._lease_page(content_type, held_page) as page:
+                # Pages left on the generation page (warm tabs) are only reset
+                report("navigating", 0.05)
+                with phase("navigate"):
+                    if not await warm_tabs.reset(page, content_type):
+                        await self._navigate_to_generation_page(page, content_type)
+                
+                # Find and fill the prompt input
+                report("filling_prompt", 0.1)
+                with phase("find_prompt"):
+                    prompt_input = await self._find_prompt_input(page)
+                with phase("fill"):
+                    await prompt_input.fill(prompt)
+                
+                # Start listening before the click so a fast result isn't missed
+                detector = self._completion_detector(page, report)
+                await detector.arm()
+                
+                try:
+                    # Find and click generate button
+                    with phase("click"):
+                        generate_button = await self._find_generate_button(page)
+                        await generate_button.click()
+                    
+                    # Wait for generation to complete (videos take longer)
+                    report("generating", 0.15)
+                    with phase("wait"):
+                        generation_complete = await detector.wait(timeout)
+                finally:
+                    await detector.close()
+                
+                if not generation_complete:
+                    outcome = "timeout"
+                    return GenerationResponse(
+                        success=False,
+                        error_message="Generation timed out"
+                    )
+                    
+                # Download the generated content
+                report("downloading", 0.9)
+                with phase("download"):
+                    file_path = await self._download_generated_content(page, content_type, detector.result_response)
                 
-            # Download the generated video
-            file_path = await self._download_generated_content(page, "video")
+            if config.RESULT_CACHE_ENABLED:
+                get_result_cache().put(content_type, prompt, file_path)
             
+            outcome = "success"
             return GenerationResponse(
                 success=True,
                 file_path=file_path,
-                file_type=FileType.video
+                file_type=FileType(content_type)
             )
             
+        except QueueFullError:
+            # Let the API layer answer with 429 and Retry-After
+            outcome = "rejected"
+            raise
         except Exception as e:
-            logging.error(f"Video generation failed: {str(e)}")
+            logging.error(f"{content_type.capitalize()} generation failed: {str(e)}")
             return GenerationResponse(
                 success=False,
                 error_message=str(e)
             )
+        finally:
+            if generation_span is not None:
+                generation_span.set_attribute("outcome", outcome)
+            generations_total.inc(content_type=content_type, outcome=outcome)
+            if outcome != "rejected":
+                generation_seconds.observe(time.monotonic() - started, content_type=content_type)
             
     async def _navigate_to_generation_page(self, page: Page, content_type: str):
         """
         Navigate to the appropriate generation page
         """
-        if content_type == "image":
-            # Navigate to image generation URL
+        if content_type in ("image", "video"):
             # This will need to be customized based on actual Grok URLs
-            await page.goto(f"{config.GROK_URL}/generate/image", timeout=config.BROWSER_TIMEOUT)
-        elif content_type == "video":
-            await page.goto(f"{config.GROK_URL}/generate/video", timeout=config.BROWSER_TIMEOUT)
+            url = warm_tabs.generation_url(content_type)
+            with span("playwright.goto", kind="client", url=url, timeout=config.BROWSER_TIMEOUT):
+                await page.goto(
+                    url,
+                    wait_until="domcontentloaded",
+                    timeout=config.BROWSER_TIMEOUT
+                )
             
-        await page.wait_for_load_state("networkidle")
+        # Ready once the prompt input rendered
+        await wait_until_ready(
+            page,
+            "grok.generation_page",
+            [SelectorCondition(warm_tabs.PROMPT_SELECTORS)],
+            timeout=config.BROWSER_TIMEOUT
+        )
         
     async def _find_prompt_input(self, page: Page) -> Locator:
         """
         Find the prompt input field on the page
         """
-        # Try different common selectors for prompt input
-        selectors = [
-            "textarea[placeholder*='prompt']",
-            "textarea[placeholder*='describe']",
-            "input[placeholder*='prompt']",
-            "#prompt-input",
-            ".prompt-textarea",
-            "[name='prompt']"
-        ]
-        
-        for selector in selectors:
-            try:
-                element = await page.query_selector(selector, timeout=5000)
-                if element:
-                    return element
-            except Exception:
-                continue
-                
+        _, element = await get_selector_cache().find(
+            page, "prompt_input", warm_tabs.PROMPT_SELECTORS, timeout=5000
+        )
+        if element:
+            return element
+            
         raise Exception("Could not find prompt input field")
         
     async def _find_generate_button(self, page: Page) -> Locator:
@@ -152,58 +377,51 @@ class GrokService:
             "[aria-label='Generate']"
         ]
         
-        for selector in selectors:
-            try:
-                element = await page.query_selector(selector, timeout=5000)
-                if element:
-                    return element
-            except Exception:
-                continue
-                
+        _, element = await get_selector_cache().find(page, "generate_button", selectors, timeout=5000)
+        if element:
+            return element
+            
         raise Exception("Could not find generate button")
         
-    async def _wait_for_generation_complete(self, page: Page, timeout: int) -> bool:
+    def _completion_detector(
+        self,
+        page: Page,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> CompletionDetector:
         """
-        Wait for generation to complete by monitoring UI indicators
+        Create a detector that reports generation progress as the UI changes
         """
-        start_time = datetime.now()
+        def on_progress(progress_text: Optional[str], busy: bool):
+            if progress_callback is None:
+                return
+            percent = self._parse_progress_percent(progress_text)
+            if percent is not None:
+                # Generation spans 15%-90% of the overall job progress
+                progress_callback("generating", 0.15 + 0.75 * percent / 100)
+            else:
+                progress_callback("generating" if busy else "waiting_for_result", None)
         
-        while (datetime.now() - start_time).seconds < timeout:
-            try:
-                # Check for completion indicators
-                # These selectors will need to be customized based on actual Grok UI
-                
-                # Check if generate button is re-enabled
-                generate_button = await self._find_generate_button(page)
-                is_disabled = await generate_button.get_attribute("disabled")
-                
-                if not is_disabled:
-                    # Check for download button or result preview
-                    download_button = await page.query_selector("button:has-text('Download')", timeout=2000)
-                    result_preview = await page.query_selector(".result-preview img", timeout=2000)
-                    
-                    if download_button or result_preview:
-                        return True
-                
-                # Check for progress indicators
-                progress_bar = await page.query_selector(".progress-bar", timeout=2000)
-                if progress_bar:
-                    progress_text = await progress_bar.text_content()
-                    if "100%" in progress_text or "complete" in progress_text.lower():
-                        return True
-                
-                # Wait a bit before checking again
-                await asyncio.sleep(2)
-                
-            except Exception:
-                await asyncio.sleep(2)
-                continue
-                
-        return False
+        return CompletionDetector(page, on_progress)
+        
+    @staticmethod
+    def _parse_progress_percent(progress_text: Optional[str]) -> Optional[float]:
+        """
+        Extract a percentage like "45%" from progress bar text
+        """
+        match = re.search(r"(\d{1,3}(?:\.\d+)?)\s*%", progress_text or "")
+        if not match:
+            return None
+        return min(float(match.group(1)), 100.0)
         
-    async def _download_generated_content(self, page: Page, content_type: str) -> str:
+    async def _download_generated_content(
+        self,
+        page: Page,
+        content_type: str,
+        result_response: Optional[Response] = None
+    ) -> str:
         """
-        Download the generated content from the page
+        Save the generated content, straight from the captured network
+        response when there is one, otherwise through a browser download
         """
         output_dir = Path(config.OUTPUT_DIR)
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -211,15 +429,31 @@ class GrokService:
         # Generate unique filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         unique_id = str(uuid.uuid4())[:8]
+        default_extension = ".png" if content_type == "image" else ".mp4"
+        
+        if config.GROK_MEDIA_CAPTURE_ENABLED and result_response is not None:
+            extension = extension_for(result_response.headers.get("content-type", ""), default_extension)
+            file_path = output_dir / f"grok_{content_type}_{timestamp}_{unique_id}{extension}"
+            try:
+                await save_response(result_response, file_path)
+                return str(file_path)
+            except Exception as e:
+                logging.warning(f"Could not capture {content_type} from network response, downloading instead: {str(e)}")
+        
+        capture_stats.fallback_downloads += 1
+        return await self._download_via_browser(
+            page, content_type, output_dir / f"grok_{content_type}_{timestamp}_{unique_id}{default_extension}"
+        )
         
+    async def _download_via_browser(self, page: Page, content_type: str, file_path: Path) -> str:
+        """
+        Download the generated content by clicking it in the page
+        """
         if content_type == "image":
-            filename = f"grok_image_{timestamp}_{unique_id}.png"
-            file_path = output_dir / filename
-            
             # Find image element and download
-            img_element = await page.query_selector(".result-preview img", timeout=10000)
-            if not img_element:
-                img_element = await page.query_selector("img[alt*='generated']", timeout=10000)
+            img_element = await BrowserUtils.wait_for_element(
+                page, [".result-preview img", "img[alt*='generated']"], timeout=10000
+            )
                 
             if img_element:
                 img_src = await img_element.get_attribute("src")
@@ -233,11 +467,8 @@ class GrokService:
                     return str(file_path)
                 
         elif content_type == "video":
-            filename = f"grok_video_{timestamp}_{unique_id}.mp4"
-            file_path = output_dir / filename
-            
             # Find video element and download
-            video_element = await page.query_selector("video", timeout=10000)
+            video_element = await BrowserUtils.wait_for_element(page, ["video"], timeout=10000, visible=False)
             if video_element:
                 video_src = await video_element.get_attribute("src")
                 if video_src:
@@ -250,7 +481,7 @@ class GrokService:
                     return str(file_path)
             
             # Alternative: find download button
-            download_button = await page.query_selector("button:has-text('Download')", timeout=10000)
+            download_button = await BrowserUtils.wait_for_element(page, ["button:has-text('Download')"], timeout=10000)
             if download_button:
                 async with page.context.expect_download() as download_info:
                     await download_button.click()
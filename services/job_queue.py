@@ -0,0 +1,394 @@
+"""
+Generation Job Queue Module
+
+Asynchronous job API backing for /api/grok/jobs. Clients submit a
+generation and poll for its status instead of holding an HTTP request open
+for the whole generation. Job state is persisted as one JSON file per job,
+so status and results survive a restart of the API process.
+
+A small, fixed number of workers pull jobs from a bounded queue and run them
+through GrokService on pages leased from the shared browser pool. Progress
+updates are also pushed to subscribers, which back the Server-Sent Events
+stream at /api/grok/jobs/{job_id}/events. Subscribers see every update at
+once; the job file is rewritten only when the stage or status changes, or
+at most every JOB_PROGRESS_PERSIST_INTERVAL seconds, from a worker thread.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+from config import config
+from models.response_models import JobStatus
+from services.browser_pool import get_browser_pool
+from services.grok_service import GrokService
+from services.session_manager import SessionManager
+from services.session_registry import has_usable_session
+from utils.error_handling import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = {JobStatus.completed.value, JobStatus.failed.value}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def job_event(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the event pushed to subscribers for the current job state"""
+    if job["status"] in FINISHED_STATUSES:
+        event = job["status"]
+    else:
+        event = "progress"
+
+    return {
+        "event": event,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "stage": job.get("stage"),
+        "progress": job.get("progress", 0.0),
+        "file_path": job.get("file_path"),
+        "file_type": job.get("file_type"),
+        "error_message": job.get("error_message"),
+        "updated_at": job.get("updated_at"),
+    }
+
+
+class JobStore:
+    """
+    Persists generation jobs as one JSON file per job
+    """
+
+    def __init__(self, job_dir: Optional[str] = None):
+        self.job_dir = Path(job_dir or config.JOB_STORE_DIR)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._dirty: set = set()
+        self._writers: Dict[str, asyncio.Task] = {}
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Load every persisted job into memory"""
+        self._jobs.clear()
+        for path in self.job_dir.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    job = json.load(f)
+                self._jobs[job["job_id"]] = job
+            except Exception as e:
+                logger.warning(f"Skipping unreadable job file {path}: {str(e)}")
+        return list(self._jobs.values())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def put(self, job: Dict[str, Any]):
+        """Update a job in memory only"""
+        job["updated_at"] = _now()
+        self._jobs[job["job_id"]] = job
+
+    def save(self, job: Dict[str, Any]):
+        """Write a job atomically so readers never see a partial file"""
+        self.put(job)
+        self._write(job)
+
+    def save_later(self, job: Dict[str, Any]):
+        """
+        Update a job in memory now and write it from a worker thread.
+
+        Writes of one job run one at a time; updates arriving meanwhile are
+        coalesced into a single write of the latest state.
+        """
+        self.put(job)
+        job_id = job["job_id"]
+        self._dirty.add(job_id)
+        if job_id not in self._writers:
+            self._writers[job_id] = asyncio.get_running_loop().create_task(self._flush(job_id))
+
+    async def flush(self):
+        """Wait for pending background writes"""
+        while self._writers:
+            await asyncio.gather(*list(self._writers.values()), return_exceptions=True)
+
+    async def _flush(self, job_id: str):
+        try:
+            while job_id in self._dirty:
+                self._dirty.discard(job_id)
+                job = self._jobs.get(job_id)
+                if job is None:
+                    break
+                # Snapshot so the thread never sees the dict change mid-dump
+                await asyncio.to_thread(self._write, dict(job))
+                if job_id not in self._jobs:
+                    # Deleted while the write was running
+                    self._unlink(job_id)
+        except Exception as e:
+            logger.warning(f"Could not persist job {job_id}: {str(e)}")
+        finally:
+            self._writers.pop(job_id, None)
+
+    def _write(self, job: Dict[str, Any]):
+        path = self.job_dir / f"{job['job_id']}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def delete(self, job_id: str):
+        self._jobs.pop(job_id, None)
+        self._dirty.discard(job_id)
+        self._unlink(job_id)
+
+    def _unlink(self, job_id: str):
+        try:
+            (self.job_dir / f"{job_id}.json").unlink()
+        except FileNotFoundError:
+            pass
+
+    def prune(self, max_retained: int):
+        """Drop the oldest finished jobs beyond max_retained"""
+        finished = sorted(
+            (j for j in self._jobs.values() if j["status"] in FINISHED_STATUSES),
+            key=lambda j: j.get("finished_at") or j["created_at"]
+        )
+        for job in finished[:max(0, len(finished) - max_retained)]:
+            self.delete(job["job_id"])
+
+
+class GenerationJobQueue:
+    """
+    Bounded queue of generation jobs served by a fixed set of workers
+    """
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        workers: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        max_retained: Optional[int] = None
+    ):
+        self.store = store or JobStore()
+        self.worker_count = config.JOB_WORKERS if workers is None else workers
+        self.max_queue_size = config.JOB_QUEUE_MAX_SIZE if max_queue_size is None else max_queue_size
+        self.max_retained = config.JOB_MAX_RETAINED if max_retained is None else max_retained
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._avg_job_seconds = 60.0
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._persisted_at: Dict[str, float] = {}
+
+    async def start(self):
+        """Restore persisted jobs and start the workers"""
+        for job in sorted(self.store.load(), key=lambda j: j["created_at"]):
+            if job["status"] == JobStatus.running.value:
+                # The process died mid-generation, the browser work is lost
+                self._finish(job, JobStatus.failed, error_message="Interrupted by server restart")
+            elif job["status"] == JobStatus.queued.value:
+                self._queue.put_nowait(job["job_id"])
+
+        self.store.prune(self.max_retained)
+
+        for i in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker(i)))
+
+        logger.info(
+            f"Job queue started with {self.worker_count} workers, "
+            f"{self._queue.qsize()} restored jobs"
+        )
+
+    async def stop(self):
+        """Stop the workers; queued jobs stay persisted for the next start"""
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._workers.clear()
+        await self.store.flush()
+
+    def submit(self, content_type: str, prompt: str, timeout: int, bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Queue a new generation job.
+
+        Raises QueueFullError when the queue already holds max_queue_size jobs.
+        """
+        if self._queue.qsize() >= self.max_queue_size:
+            raise QueueFullError(
+                f"Job queue is full ({self._queue.qsize()} jobs pending)",
+                retry_after=self.retry_after()
+            )
+
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "content_type": content_type,
+            "prompt": prompt,
+            "timeout": timeout,
+            "bypass_cache": bypass_cache,
+            "status": JobStatus.queued.value,
+            "stage": "queued",
+            "progress": 0.0,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "file_path": None,
+            "file_type": None,
+            "error_message": None,
+        }
+        self.store.save(job)
+        self._queue.put_nowait(job["job_id"])
+        self.store.prune(self.max_retained)
+
+        logger.info(f"Queued {content_type} job {job['job_id']}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds until a worker frees a queue slot"""
+        return max(1, math.ceil(self._avg_job_seconds / max(1, self.worker_count)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.worker_count,
+            "queued": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+        }
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Get a queue that receives every event published for a job"""
+        events: asyncio.Queue = asyncio.Queue(maxsize=config.JOB_EVENT_BUFFER_SIZE)
+        self._subscribers.setdefault(job_id, []).append(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id, [])
+        if events in subscribers:
+            subscribers.remove(events)
+        if not subscribers:
+            self._subscribers.pop(job_id, None)
+
+    def _publish(self, job: Dict[str, Any]):
+        subscribers = self._subscribers.get(job["job_id"])
+        if not subscribers:
+            return
+
+        event = job_event(job)
+        for events in subscribers:
+            if events.full():
+                # Slow consumer: drop the oldest update, the newest one wins
+                events.get_nowait()
+            events.put_nowait(event)
+
+    def update_progress(self, job: Dict[str, Any], stage: str, progress: Optional[float] = None):
+        """
+        Record the current stage and progress of a running job.
+
+        Subscribers get every update; the job file only on stage changes and
+        otherwise at most every JOB_PROGRESS_PERSIST_INTERVAL seconds.
+        """
+        stage_changed = job.get("stage") != stage
+        job["stage"] = stage
+        if progress is not None:
+            job["progress"] = round(max(job["progress"], min(progress, 1.0)), 3)
+
+        now = time.monotonic()
+        last_persisted = self._persisted_at.get(job["job_id"])
+        if stage_changed or last_persisted is None or now - last_persisted >= config.JOB_PROGRESS_PERSIST_INTERVAL:
+            self._persisted_at[job["job_id"]] = now
+            self.store.save_later(job)
+        else:
+            self.store.put(job)
+        self._publish(job)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self.store.get(job_id)
+                if job is None or job["status"] != JobStatus.queued.value:
+                    continue
+                started = time.monotonic()
+                try:
+                    await self._run(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Job worker {worker_id} failed on {job_id}: {str(e)}")
+                    self._finish(job, JobStatus.failed, error_message=str(e))
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * (time.monotonic() - started)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]):
+        job["status"] = JobStatus.running.value
+        job["started_at"] = _now()
+        self.update_progress(job, "starting")
+
+        session_manager = SessionManager()
+        if not has_usable_session(session_manager):
+            self._finish(job, JobStatus.failed, error_message="No valid session. Please login first.")
+            return
+
+        grok_service = GrokService(session_manager, get_browser_pool())
+
+        def on_progress(stage: str, progress: Optional[float] = None):
+            self.update_progress(job, stage, progress)
+
+        while True:
+            try:
+                bypass_cache = job.get("bypass_cache", False)
+                if job["content_type"] == "video":
+                    result = await grok_service.generate_video(job["prompt"], job["timeout"], on_progress, bypass_cache)
+                else:
+                    result = await grok_service.generate_image(job["prompt"], job["timeout"], on_progress, bypass_cache)
+                break
+            except QueueFullError as e:
+                # The browser pool is saturated by other traffic, wait our turn
+                self.update_progress(job, "waiting_for_browser")
+                await asyncio.sleep(e.retry_after)
+
+        if result.success:
+            self._finish(
+                job,
+                JobStatus.completed,
+                file_path=result.file_path,
+                file_type=result.file_type.value if result.file_type else None
+            )
+        else:
+            self._finish(job, JobStatus.failed, error_message=result.error_message)
+
+    def _finish(self, job: Dict[str, Any], status: JobStatus, **fields):
+        job.update(fields)
+        job["status"] = status.value
+        job["stage"] = status.value
+        job["finished_at"] = _now()
+        if status == JobStatus.completed:
+            job["progress"] = 1.0
+        self._persisted_at.pop(job["job_id"], None)
+        self.store.save_later(job)
+        self._publish(job)
+        logger.info(f"Job {job['job_id']} {status.value}")
+
+
+_job_queue: Optional[GenerationJobQueue] = None
+
+
+def get_job_queue() -> Optional[GenerationJobQueue]:
+    """Get the process-wide job queue, if one was started"""
+    return _job_queue
+
+
+def set_job_queue(queue: Optional[GenerationJobQueue]):
+    """Register the process-wide job queue"""
+    global _job_queue
+    _job_queue = queue
@@ -0,0 +1,179 @@
+"""
+Login State Probe Module
+
+Decides whether a page shows a logged-in Grok session from a single
+page.evaluate pass over every indicator plus one cookie snapshot, instead of
+waiting on each selector in turn. The result is a structured verdict that
+says why the session was judged logged in or not.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List
+from playwright.async_api import Page, BrowserContext
+from services.readiness import SelectorCondition, UrlCondition, ReadyCondition
+
+logger = logging.getLogger(__name__)
+
+AUTH_URL_KEYWORDS = ["login", "signin", "sign-in", "auth/", "oauth/"]
+APP_URL_KEYWORDS = ["chat", "conversation", "app", "dashboard", "home", "grok.com"]
+GROK_DOMAINS = ["grok.com", "grok.x.ai"]
+SESSION_COOKIE_KEYWORDS = ["session", "auth", "token", "sid", "_ga", "ct0", "kdt"]
+
+LOGIN_INDICATORS = [
+    # Chat interface elements (Grok-specific)
+    'textarea',
+    'input[type="text"]',
+    'div[role="textbox"]',
+    'textarea[placeholder*="Ask"]',
+    'textarea[placeholder*="Message"]',
+    'textarea[placeholder*="Type"]',
+    'div[class*="chat"]',
+    'div[class*="conversation"]',
+    'button[aria-label*="Send"]',
+    # User profile/menu elements
+    'button[aria-label*="Profile"]',
+    'button[aria-label*="User"]',
+    'button[aria-label*="Menu"]',
+    '[data-testid*="profile"]',
+    '[data-testid*="user"]',
+    '[data-testid*="menu"]',
+    # Navigation elements that appear when logged in
+    'nav',
+    'aside',
+    '[class*="sidebar"]',
+    '[class*="navigation"]',
+    # Avatar or user icon
+    'img[alt*="avatar"]',
+    'img[alt*="profile"]',
+    '[class*="avatar"]',
+]
+
+# Visible buttons/links with these texts mean we are logged out
+LOGIN_BUTTON_TEXTS = ["sign in", "log in", "login"]
+
+# Readiness: elements that only render once the app has loaded for a
+# logged-in user, or once a login form is shown to a logged-out one
+APP_READY_SELECTORS = [
+    'textarea[placeholder*="Ask"]',
+    'textarea[placeholder*="Message"]',
+    'button[aria-label*="Send"]',
+    'button[aria-label*="Profile"]',
+    '[data-testid*="profile"]',
+    'img[alt*="avatar"]',
+]
+LOGGED_OUT_SELECTORS = [
+    'input[type="password"]',
+    'input[type="email"]',
+    'a[href*="sign-in"]',
+    'a[href*="login"]',
+]
+LOGIN_ERROR_SELECTORS = ['[role="alert"]', '[class*="error"]']
+
+PROBE_SCRIPT = """([indicators, buttonTexts]) => {
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        const style = window.getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== "hidden";
+    };
+    const found = [];
+    for (const selector of indicators) {
+        try {
+            if (document.querySelector(selector)) found.push(selector);
+        } catch (e) {}
+    }
+    const loginButtons = [];
+    for (const el of document.querySelectorAll("button, a")) {
+        const text = (el.innerText || el.textContent || "").trim();
+        const lowered = text.toLowerCase();
+        if (buttonTexts.some((t) => lowered.includes(t)) && isVisible(el)) {
+            loginButtons.push(text.slice(0, 50));
+        }
+    }
+    return {indicators: found, loginButtons: loginButtons, readyState: document.readyState};
+}"""
+
+
+def is_auth_url(url: str) -> bool:
+    lowered = url.lower()
+    return any(keyword in lowered for keyword in AUTH_URL_KEYWORDS)
+
+
+def session_ready_conditions() -> List[ReadyCondition]:
+    """
+    Ready to probe a freshly loaded page: the app or a login form rendered,
+    or we were redirected to an auth page
+    """
+    return [
+        SelectorCondition(APP_READY_SELECTORS + LOGGED_OUT_SELECTORS),
+        UrlCondition(is_auth_url),
+    ]
+
+
+def post_login_conditions(page: Page) -> List[ReadyCondition]:
+    """
+    Ready to probe after submitting a login form: the app rendered, the form
+    showed an error, or we left the auth page the form was on
+    """
+    conditions: List[ReadyCondition] = [SelectorCondition(APP_READY_SELECTORS + LOGIN_ERROR_SELECTORS)]
+    if is_auth_url(page.url):
+        conditions.append(UrlCondition(lambda url: not is_auth_url(url)))
+    return conditions
+
+
+async def probe_login_state(page: Page, context: BrowserContext) -> Dict[str, Any]:
+    """
+    Check every login indicator in one pass and return a verdict dict with
+    logged_in, reason and the evidence it was based on
+    """
+    started = time.monotonic()
+    current_url = page.url
+    lowered_url = current_url.lower()
+
+    dom_state, cookies = await asyncio.gather(
+        _evaluate_page(page),
+        context.cookies()
+    )
+
+    cookie_names = [c.get("name", "") for c in cookies]
+    session_cookies = [
+        name for name in cookie_names
+        if any(keyword in name.lower() for keyword in SESSION_COOKIE_KEYWORDS)
+    ]
+
+    verdict = {
+        "logged_in": False,
+        "reason": "no_indicators",
+        "url": current_url,
+        "indicators": dom_state["indicators"],
+        "login_buttons": dom_state["loginButtons"],
+        "ready_state": dom_state["readyState"],
+        "cookie_count": len(cookies),
+        "session_cookies": session_cookies,
+    }
+
+    if is_auth_url(lowered_url):
+        verdict["reason"] = "auth_page"
+    elif any(domain in current_url for domain in GROK_DOMAINS) and verdict["indicators"]:
+        verdict.update(logged_in=True, reason="ui_indicator")
+    elif verdict["login_buttons"]:
+        verdict["reason"] = "login_button"
+    elif any(keyword in lowered_url for keyword in APP_URL_KEYWORDS) and cookies:
+        verdict.update(logged_in=True, reason="app_url")
+    elif session_cookies:
+        verdict.update(logged_in=True, reason="session_cookies")
+    elif len(cookies) >= 3 and "grok.com" in current_url:
+        verdict.update(logged_in=True, reason="cookie_count")
+
+    verdict["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return verdict
+
+
+async def _evaluate_page(page: Page) -> Dict[str, Any]:
+    try:
+        return await page.evaluate(PROBE_SCRIPT, [LOGIN_INDICATORS, LOGIN_BUTTON_TEXTS])
+    except Exception as e:
+        # E.g. the page navigated mid-probe; judge from URL and cookies alone
+        logger.warning(f"Login probe could not evaluate page: {str(e)}")
+        return {"indicators": [], "loginButtons": [], "readyState": None}
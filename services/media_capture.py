@@ -0,0 +1,209 @@
+"""
+Generated Media Capture Module
+
+Saves the generated image/video straight from the network response the
+CompletionDetector picked up, instead of clicking the result and waiting
+for a browser download. The body Playwright already holds for the response
+is written to disk, so nothing is downloaded a second time.
+
+Only when that body is not the whole file - a 206 answer to the range
+requests <video> elements make, or a body the browser no longer holds - is
+the resource fetched again, through the page's browser context (same
+cookies, proxy and user agent) in GROK_CAPTURE_CHUNK_BYTES range requests,
+so a large video is never held in memory at once.
+"""
+
+import asyncio
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Any, Set, Optional
+from playwright.async_api import Response
+from config import config
+from utils.tracing import traced, current_span
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "video/mp4": ".mp4",
+    "video/webm": ".webm",
+    "video/quicktime": ".mov",
+}
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)", re.IGNORECASE)
+
+# Request headers that must not be replayed when requesting a response again
+_SKIPPED_HEADERS = {"range", "content-length", "host", "connection"}
+
+
+class CaptureStats:
+    """
+    Counts how generated files were saved
+    """
+
+    def __init__(self):
+        self.buffered = 0
+        self.chunked = 0
+        self.partial_responses = 0
+        self.fallback_downloads = 0
+        self.failed = 0
+        self.bytes_written = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "buffered": self.buffered,
+            "chunked": self.chunked,
+            "partial_responses": self.partial_responses,
+            "fallback_downloads": self.fallback_downloads,
+            "failed": self.failed,
+            "bytes_written": self.bytes_written,
+        }
+
+
+capture_stats = CaptureStats()
+
+
+def extension_for(content_type: str, default: str) -> str:
+    """
+    Pick a file extension for a response content type
+    """
+    mime_type = content_type.split(";")[0].strip().lower()
+    return EXTENSIONS.get(mime_type, default)
+
+
+def _parse_content_range(value: Optional[str]):
+    """(first byte, last byte, total or None) of a Content-Range header, or None"""
+    match = _CONTENT_RANGE.match((value or "").strip())
+    if match is None:
+        return None
+    first, last, total = match.groups()
+    return int(first), int(last), None if total == "*" else int(total)
+
+
+def is_partial_response(response: Response) -> bool:
+    """
+    Check whether a response carries only part of the resource
+    """
+    content_range = response.headers.get("content-range")
+    if response.status != 206 and not content_range:
+        return False
+    parsed = _parse_content_range(content_range)
+    # A range answer that happens to span the whole file is complete
+    return not (parsed and parsed[0] == 0 and parsed[2] is not None and parsed[1] + 1 == parsed[2])
+
+
+@traced("playwright.save_response", kind="client")
+async def save_response(response: Response, file_path: Path) -> str:
+    """
+    Write the body of a captured response to file_path.
+
+    Returns "buffered" when the captured body was written, or "chunked" when
+    the full resource had to be fetched again in range requests.
+    """
+    tmp_path = file_path.with_name(file_path.name + ".part")
+    try:
+        body = None
+        if is_partial_response(response):
+            capture_stats.partial_responses += 1
+            logger.debug(f"Captured response of {response.url} is partial, fetching the full file")
+        else:
+            try:
+                body = await response.body()
+            except Exception as e:
+                logger.debug(f"Body of {response.url} is no longer available: {str(e)}")
+
+        if body is not None:
+            await asyncio.to_thread(tmp_path.write_bytes, body)
+            written = len(body)
+            capture_stats.buffered += 1
+            mode = "buffered"
+        else:
+            written = await _fetch_in_chunks(response, tmp_path)
+            capture_stats.chunked += 1
+            mode = "chunked"
+
+        os.replace(tmp_path, file_path)
+    except Exception:
+        capture_stats.failed += 1
+        raise
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    capture_stats.bytes_written += written
+    current = current_span()
+    if current is not None:
+        current.set_attribute("url", response.url)
+        current.set_attribute("mode", mode)
+        current.set_attribute("bytes", written)
+    logger.info(f"Captured generated media ({mode}, {written} bytes) to {file_path}")
+    return mode
+
+
+async def _fetch_in_chunks(response: Response, file_path: Path) -> int:
+    """
+    Fetch the whole resource through the page's browser context, one range
+    request of GROK_CAPTURE_CHUNK_BYTES at a time, appending to file_path
+    """
+    request_context = response.frame.page.context.request
+    # The context adds its own cookies
+    headers = await _replay_headers(response, skip={"cookie"})
+    chunk_size = max(1, config.GROK_CAPTURE_CHUNK_BYTES)
+    await asyncio.to_thread(file_path.write_bytes, b"")
+
+    written = 0
+    total: Optional[int] = None
+    while total is None or written < total:
+        fetched = await request_context.get(
+            response.url,
+            headers={**headers, "range": f"bytes={written}-{written + chunk_size - 1}"},
+            timeout=config.BROWSER_TIMEOUT
+        )
+        try:
+            if fetched.status == 200 and written == 0:
+                # The server ignores ranges and sent the whole file
+                body = await fetched.body()
+                await asyncio.to_thread(file_path.write_bytes, body)
+                return len(body)
+            if fetched.status != 206:
+                raise RuntimeError(f"HTTP {fetched.status} fetching {response.url} from byte {written}")
+            body = await fetched.body()
+            parsed = _parse_content_range(fetched.headers.get("content-range"))
+        finally:
+            await fetched.dispose()
+
+        if parsed is not None:
+            if parsed[0] != written:
+                raise RuntimeError(f"Expected bytes from {written}, got {fetched.headers.get('content-range')}")
+            total = parsed[2]
+        if not body:
+            break
+        await asyncio.to_thread(_append, file_path, body)
+        written += len(body)
+        if total is None and len(body) < chunk_size:
+            break
+
+    if total is not None and written < total:
+        raise RuntimeError(f"Incomplete download of {response.url}: {written} of {total} bytes")
+    return written
+
+
+def _append(file_path: Path, data: bytes):
+    with open(file_path, "ab") as f:
+        f.write(data)
+
+
+async def _replay_headers(response: Response, skip: Set[str] = frozenset()) -> Dict[str, str]:
+    """
+    Headers of the original request for requesting it again
+    """
+    headers = await response.request.all_headers()
+    return {
+        name: value for name, value in headers.items()
+        if not name.startswith(":") and name.lower() not in _SKIPPED_HEADERS and name.lower() not in skip
+    }
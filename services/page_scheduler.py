@@ -0,0 +1,196 @@
+"""
+Page Scheduler Module
+
+Admission control for pages handed out by the browser pool. Every pooled
+context can host a limited number of concurrent pages; requests beyond that
+wait in a fair FIFO queue, and once the queue is full new requests are
+rejected with a QueueFullError carrying a Retry-After estimate.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Deque
+from config import config
+from utils.error_handling import QueueFullError, BrowserError
+from services.metrics import pool_wait_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class PageScheduler:
+    """
+    Fair FIFO scheduler that assigns page slots on a fixed set of contexts
+    """
+
+    def __init__(
+        self,
+        max_pages_per_context: Optional[int] = None,
+        max_queue_size: Optional[int] = None
+    ):
+        self.max_pages_per_context = (
+            config.PAGE_SCHEDULER_MAX_PAGES_PER_CONTEXT
+            if max_pages_per_context is None else max_pages_per_context
+        )
+        self.max_queue_size = (
+            config.PAGE_SCHEDULER_MAX_QUEUE_SIZE
+            if max_queue_size is None else max_queue_size
+        )
+
+        if self.max_pages_per_context < 1:
+            raise ValueError("max_pages_per_context must be at least 1")
+
+        self._load: Dict[str, int] = {}
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._avg_hold_seconds = 30.0
+        self._total_wait_seconds = 0.0
+        self._acquired = 0
+        self._rejected = 0
+        self._closed = False
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._load) * self.max_pages_per_context
+
+    def available(self) -> int:
+        """Number of page slots that can be handed out right now"""
+        return sum(self.max_pages_per_context - load for load in self._load.values())
+
+    def load(self, key: str) -> int:
+        return self._load.get(key, 0)
+
+    def register(self, key: str):
+        """Add a context that can host pages"""
+        self._load.setdefault(key, 0)
+        self._dispatch()
+
+    def unregister(self, key: str):
+        """Stop handing out pages on a context; active leases stay valid"""
+        self._load.pop(key, None)
+
+    async def acquire(self, timeout: float) -> str:
+        """
+        Wait for a page slot and return the key of the context it belongs to.
+
+        Raises QueueFullError when the wait queue is full and
+        asyncio.TimeoutError when no slot frees up within the timeout.
+        """
+        if self._closed:
+            raise BrowserError("Page scheduler is closed")
+
+        started = time.monotonic()
+
+        # Only bypass the queue when nobody is waiting, to stay FIFO-fair
+        if not self._waiters:
+            key = self._pick()
+            if key is not None:
+                self._load[key] += 1
+                self._record_wait(started)
+                return key
+
+        if len(self._waiters) >= self.max_queue_size:
+            self._rejected += 1
+            retry_after = self.retry_after()
+            logger.warning(
+                f"Page queue full ({len(self._waiters)} waiting), "
+                f"rejecting request with Retry-After {retry_after}s"
+            )
+            raise QueueFullError(
+                f"Too many pending requests ({len(self._waiters)} queued)",
+                retry_after=retry_after
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+
+        try:
+            key = await asyncio.wait_for(waiter, timeout=timeout)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # A slot was handed over just as we gave up, give it back
+                self.release(waiter.result())
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+        self._record_wait(started)
+        return key
+
+    def release(self, key: str, held_seconds: Optional[float] = None):
+        """Return a page slot and hand it to the next waiter"""
+        if self._load.get(key, 0) > 0:
+            self._load[key] -= 1
+
+        if held_seconds is not None:
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * held_seconds
+
+        self._dispatch()
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds until a queued request would be served"""
+        capacity = max(1, self.capacity)
+        return max(1, math.ceil(self._avg_hold_seconds * (len(self._waiters) + 1) / capacity))
+
+    def close(self):
+        """Fail every waiting request"""
+        self._closed = True
+        self.fail_waiters(BrowserError("Page scheduler is closed"))
+
+    def fail_waiters(self, error: Exception):
+        """Fail every waiting request with error; new requests are still accepted"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics"""
+        active = sum(self._load.values())
+        return {
+            "contexts": len(self._load),
+            "active_pages": active,
+            "capacity": self.capacity,
+            "max_pages_per_context": self.max_pages_per_context,
+            "queue_depth": len(self._waiters),
+            "max_queue_size": self.max_queue_size,
+            "acquired": self._acquired,
+            "rejected": self._rejected,
+            "avg_wait_seconds": round(self._total_wait_seconds / self._acquired, 3) if self._acquired else 0.0,
+            "avg_hold_seconds": round(self._avg_hold_seconds, 3),
+        }
+
+    def _pick(self) -> Optional[str]:
+        """Pick the least-loaded context that still has a free slot"""
+        best = None
+        best_load = self.max_pages_per_context
+        for key, load in self._load.items():
+            if load < best_load:
+                best = key
+                best_load = load
+        return best
+
+    def _dispatch(self):
+        while self._waiters:
+            key = self._pick()
+            if key is None:
+                return
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._load[key] += 1
+            waiter.set_result(key)
+
+    def _record_wait(self, started: float):
+        waited = time.monotonic() - started
+        self._acquired += 1
+        self._total_wait_seconds += waited
+        pool_wait_seconds.observe(waited)
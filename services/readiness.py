@@ -0,0 +1,243 @@
+"""
+Page Readiness Module
+
+Replaces blanket wait_for_load_state("networkidle") waits, which on
+long-polling single page apps often only return at the timeout. Each call
+site declares what "ready" means for it as one or more conditions, and the
+wait returns as soon as the first of them holds:
+
+- SelectorCondition - an element matching any of the selectors is attached/visible
+- UrlCondition - the page URL matches a pattern or predicate
+- ResponseCondition - a response whose URL matches a pattern arrived
+- LoadStateCondition - a load state (e.g. "domcontentloaded") was reached
+
+Response conditions start listening when the Readiness is armed, so arm it
+before the action (goto, click) that triggers the response. Time spent
+waiting is recorded per call site in readiness_stats.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Optional, List, Dict, Any, Callable, Union, Pattern, Awaitable, Tuple
+from playwright.async_api import Page, Response
+from utils.tracing import traced, current_span
+
+logger = logging.getLogger(__name__)
+
+UrlMatcher = Union[str, Pattern, Callable[[str], bool]]
+
+
+class SelectorCondition:
+    """Ready once an element matching any of the CSS selectors appears"""
+
+    name = "selector"
+
+    def __init__(self, selectors: List[str], state: str = "visible"):
+        self.selector = ", ".join(selectors)
+        self.state = state
+
+    def start(self, page: Page, timeout_ms: float) -> Awaitable:
+        return page.wait_for_selector(self.selector, state=self.state, timeout=timeout_ms)
+
+
+class UrlCondition:
+    """Ready once the page URL matches a regex or predicate"""
+
+    name = "url"
+
+    def __init__(self, matcher: UrlMatcher):
+        self.matcher = re.compile(matcher) if isinstance(matcher, str) else matcher
+
+    def matches(self, url: str) -> bool:
+        if callable(self.matcher):
+            return bool(self.matcher(url))
+        return bool(self.matcher.search(url))
+
+    def start(self, page: Page, timeout_ms: float) -> Awaitable:
+        return page.wait_for_url(self.matches, wait_until="commit", timeout=timeout_ms)
+
+
+class ResponseCondition:
+    """Ready once a successful response from a matching URL arrives"""
+
+    name = "response"
+
+    def __init__(self, pattern: Union[str, Pattern]):
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+
+    def arm(self, page: Page) -> Tuple[asyncio.Future, Callable[[], None]]:
+        """Start listening; returns the future and a function that stops listening"""
+        future = asyncio.get_running_loop().create_future()
+
+        def on_response(response: Response):
+            if not future.done() and response.ok and self.pattern.search(response.url):
+                future.set_result(response)
+
+        page.on("response", on_response)
+
+        def detach():
+            try:
+                page.remove_listener("response", on_response)
+            except Exception:
+                pass
+
+        return future, detach
+
+
+class LoadStateCondition:
+    """Ready once the page reached a load state"""
+
+    name = "load_state"
+
+    def __init__(self, state: str = "domcontentloaded"):
+        self.state = state
+
+    def start(self, page: Page, timeout_ms: float) -> Awaitable:
+        return page.wait_for_load_state(self.state, timeout=timeout_ms)
+
+
+ReadyCondition = Union[SelectorCondition, UrlCondition, ResponseCondition, LoadStateCondition]
+
+
+class ReadinessStats:
+    """
+    Wait time and outcome of readiness waits, per call site
+    """
+
+    def __init__(self):
+        self.sites: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, site: str, condition: Optional[str], elapsed: float):
+        stats = self.sites.setdefault(site, {
+            "count": 0,
+            "timeouts": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "last_seconds": 0.0,
+            "conditions": {},
+        })
+        stats["count"] += 1
+        stats["total_seconds"] += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+        stats["last_seconds"] = elapsed
+        if condition is None:
+            stats["timeouts"] += 1
+        else:
+            stats["conditions"][condition] = stats["conditions"].get(condition, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            site: {
+                "count": stats["count"],
+                "timeouts": stats["timeouts"],
+                "avg_seconds": round(stats["total_seconds"] / stats["count"], 3),
+                "max_seconds": round(stats["max_seconds"], 3),
+                "last_seconds": round(stats["last_seconds"], 3),
+                "conditions": dict(stats["conditions"]),
+            }
+            for site, stats in self.sites.items()
+        }
+
+
+readiness_stats = ReadinessStats()
+
+
+class Readiness:
+    """
+    Waits until the first of a call site's conditions holds
+    """
+
+    def __init__(self, page: Page, site: str, conditions: List[ReadyCondition], timeout: float = 30000):
+        self.page = page
+        self.site = site
+        self.conditions = conditions
+        self.timeout = timeout
+        self.condition: Optional[str] = None
+        self._responses: List[Tuple[ResponseCondition, asyncio.Future]] = []
+        self._detach: List[Callable[[], None]] = []
+        self._armed = False
+
+    def arm(self):
+        """Start listening for responses; call before the triggering action"""
+        if self._armed:
+            return
+        self._armed = True
+        for condition in self.conditions:
+            if isinstance(condition, ResponseCondition):
+                future, detach = condition.arm(self.page)
+                self._responses.append((condition, future))
+                self._detach.append(detach)
+
+    @traced("playwright.readiness")
+    async def wait(self) -> Optional[str]:
+        """
+        Wait for the first condition to hold.
+
+        Returns the name of the condition that held, or None when none did
+        within the timeout. Conditions that fail (e.g. a selector wait
+        interrupted by a crash) are ignored while others are still pending.
+        """
+        self.arm()
+        started = time.monotonic()
+
+        tasks: Dict[asyncio.Future, str] = {}
+        for condition in self.conditions:
+            if not isinstance(condition, ResponseCondition):
+                tasks[asyncio.ensure_future(condition.start(self.page, self.timeout))] = condition.name
+        for condition, future in self._responses:
+            tasks[future] = condition.name
+
+        pending = set(tasks)
+        deadline = started + self.timeout / 1000
+        try:
+            while pending and self.condition is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        self.condition = tasks[task]
+                        break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()
+            self.close()
+
+        elapsed = time.monotonic() - started
+        readiness_stats.record(self.site, self.condition, elapsed)
+        current = current_span()
+        if current is not None:
+            current.set_attribute("site", self.site)
+            current.set_attribute("timeout", self.timeout)
+            current.set_attribute("conditions", [c.name for c in self.conditions])
+            current.set_attribute("condition", self.condition)
+            current.set_attribute("url", self.page.url)
+        if self.condition is None:
+            logger.warning(f"{self.site}: no readiness condition held within {self.timeout / 1000:.0f}s")
+        else:
+            logger.debug(f"{self.site}: ready ({self.condition}) after {elapsed:.2f}s")
+        return self.condition
+
+    def close(self):
+        for detach in self._detach:
+            detach()
+        self._detach = []
+
+
+async def wait_until_ready(
+    page: Page,
+    site: str,
+    conditions: List[ReadyCondition],
+    timeout: float = 30000
+) -> Optional[str]:
+    """
+    Wait for conditions that don't need arming before the action
+    """
+    return await Readiness(page, site, conditions, timeout).wait()
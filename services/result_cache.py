@@ -0,0 +1,212 @@
+"""
+Prompt Result Cache Module
+
+Maps a normalized prompt, content type and generation parameters to a file
+already saved in OUTPUT_DIR, so repeated prompts (regenerated thumbnails,
+retries from a GUI) are answered from disk instead of driving the browser
+for minutes.
+
+Prompts are normalized before hashing: Unicode NFKC, lower case, collapsed
+whitespace and surrounding punctuation stripped, so "A cat." and " a  cat"
+share an entry.
+
+Entries expire after a TTL and are evicted least recently used first when
+the cache holds more than max_entries entries or max_bytes bytes of files.
+Evicting an entry only forgets the mapping; the generated file stays in
+OUTPUT_DIR. The index is persisted as JSON so it survives restarts.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION = " .,;:!?\"'`"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so near-identical prompts share a cache entry"""
+    prompt = unicodedata.normalize("NFKC", prompt).lower()
+    return _WHITESPACE.sub(" ", prompt).strip(_PUNCTUATION)
+
+
+def cache_key(content_type: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    payload = json.dumps([content_type, normalize_prompt(prompt), params or {}], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Persisted LRU map of prompt key -> generated file with TTL and byte cap
+    """
+
+    def __init__(
+        self,
+        index_file: Optional[str] = None,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.index_file = Path(index_file or config.RESULT_CACHE_FILE)
+        self.ttl = config.RESULT_CACHE_TTL if ttl is None else ttl
+        self.max_entries = config.RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = config.RESULT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = self._load()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self) -> "OrderedDict[str, Dict[str, Any]]":
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return OrderedDict()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable result cache {self.index_file}: {str(e)}")
+            return OrderedDict()
+
+        return OrderedDict(sorted(entries.items(), key=lambda item: item[1]["last_used"]))
+
+    def _save(self):
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_file.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self.index_file)
+        except Exception as e:
+            logger.warning(f"Could not save result cache: {str(e)}")
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def get(self, content_type: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Get the cached file for a prompt, or None when there is no fresh entry
+        """
+        key = cache_key(content_type, prompt, params)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        stale = now - entry["created_at"] > self.ttl
+        if stale or not self._file_matches(entry):
+            # Expired, or the file was deleted or replaced since
+            self._entries.pop(key)
+            self._save()
+            self.misses += 1
+            return None
+
+        entry["last_used"] = now
+        entry["hits"] += 1
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry["file_path"]
+
+    def put(
+        self,
+        content_type: str,
+        prompt: str,
+        file_path: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Remember the file generated for a prompt; returns False when it is
+        too large to cache
+        """
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            return False
+        if size > self.max_bytes:
+            return False
+
+        now = time.time()
+        key = cache_key(content_type, prompt, params)
+        self._entries[key] = {
+            "content_type": content_type,
+            "prompt": normalize_prompt(prompt),
+            "file_path": file_path,
+            "size": size,
+            "created_at": now,
+            "last_used": now,
+            "hits": 0,
+        }
+        self._entries.move_to_end(key)
+        self._evict()
+        self._save()
+        return True
+
+    def _file_matches(self, entry: Dict[str, Any]) -> bool:
+        try:
+            return os.path.getsize(entry["file_path"]) == entry["size"]
+        except OSError:
+            return False
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones over the caps"""
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if now - e["created_at"] > self.ttl]:
+            del self._entries[key]
+            self.evictions += 1
+
+        total = self.total_bytes
+        while self._entries and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            total -= entry["size"]
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": config.RESULT_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def flush(self):
+        """
+        Persist the current recency order and hit counts
+        """
+        self._save()
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache, loading it on first use"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
+
+
+def set_result_cache(cache: Optional[ResultCache]):
+    """Replace the process-wide result cache"""
+    global _result_cache
+    _result_cache = cache
@@ -0,0 +1,164 @@
+"""
+Learned Selector Cache Module
+
+Remembers which of several fallback selectors actually matched for each
+site and role (e.g. "grok.com" / "prompt_input") and tries that selector
+first next time. The learned selector gets a short head start on its own;
+only when it doesn't show up are all candidates raced. In the common case
+a lookup is then a single round trip instead of one per candidate.
+
+The cache is persisted as JSON so it survives restarts, and keeps hit/miss
+counts per site and role.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+from playwright.async_api import Page, ElementHandle
+from config import config
+from utils.browser_utils import BrowserUtils
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorCache:
+    """
+    Persisted map of site -> role -> learned selector with hit/miss counts
+    """
+
+    def __init__(self, cache_file: Optional[str] = None, head_start: Optional[int] = None):
+        self.cache_file = Path(cache_file or config.SELECTOR_CACHE_FILE)
+        self.head_start = config.SELECTOR_CACHE_HEAD_START if head_start is None else head_start
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable selector cache {self.cache_file}: {str(e)}")
+            return {}
+
+    def _save(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Could not save selector cache: {str(e)}")
+
+    def _entry(self, site: str, role: str) -> Dict[str, Any]:
+        return self._entries.setdefault(site, {}).setdefault(
+            role, {"selector": None, "hits": 0, "misses": 0}
+        )
+
+    def learned(self, site: str, role: str, selectors: List[str]) -> Optional[str]:
+        """
+        Get the learned selector for a site and role, if it is still a candidate
+        """
+        selector = self._entries.get(site, {}).get(role, {}).get("selector")
+        return selector if selector in selectors else None
+
+    def record(self, site: str, role: str, selector: Optional[str], hit: bool):
+        """
+        Record the outcome of a lookup; the matched selector becomes the learned one
+        """
+        entry = self._entry(site, role)
+        if hit:
+            entry["hits"] += 1
+        else:
+            entry["misses"] += 1
+
+        if selector is not None and selector != entry["selector"]:
+            logger.info(f"Learned selector for {site}/{role}: {selector}")
+            entry["selector"] = selector
+            self._save()
+
+    async def find(
+        self,
+        page: Page,
+        role: str,
+        selectors: List[str],
+        timeout: int = 10000,
+        visible: bool = True,
+        site: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[ElementHandle]]:
+        """
+        Look up the element for a role, trying the learned selector first.
+
+        The site defaults to the host name of the page.
+        """
+        site = site or urlparse(page.url).hostname or "unknown"
+        with span("playwright.find", site=site, role=role, selectors=list(selectors), timeout=timeout) as current:
+            selector, element, hit = await self._find(page, site, role, selectors, timeout, visible)
+            if current is not None:
+                current.set_attribute("selector", selector)
+                current.set_attribute("hit", hit)
+            return selector, element
+
+    async def _find(
+        self,
+        page: Page,
+        site: str,
+        role: str,
+        selectors: List[str],
+        timeout: int,
+        visible: bool
+    ) -> Tuple[Optional[str], Optional[ElementHandle], bool]:
+        learned = self.learned(site, role, selectors)
+
+        if learned is not None:
+            head_start = min(self.head_start, timeout)
+            selector, element = await BrowserUtils.race_selectors(page, [learned], head_start, visible)
+            if element is not None:
+                self.record(site, role, selector, hit=True)
+                return selector, element, True
+            timeout -= head_start
+
+        selector, element = await BrowserUtils.race_selectors(page, selectors, max(timeout, 1), visible)
+        self.record(site, role, selector, hit=False)
+        return selector, element, False
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(e["hits"] for roles in self._entries.values() for e in roles.values())
+        misses = sum(e["misses"] for roles in self._entries.values() for e in roles.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "sites": {
+                site: {role: dict(entry) for role, entry in roles.items()}
+                for site, roles in self._entries.items()
+            },
+        }
+
+    def flush(self):
+        """
+        Persist the current hit/miss counts
+        """
+        self._save()
+
+
+_selector_cache: Optional[SelectorCache] = None
+
+
+def get_selector_cache() -> SelectorCache:
+    """Get the process-wide selector cache, loading it on first use"""
+    global _selector_cache
+    if _selector_cache is None:
+        _selector_cache = SelectorCache()
+    return _selector_cache
+
+
+def set_selector_cache(cache: Optional[SelectorCache]):
+    """Replace the process-wide selector cache"""
+    global _selector_cache
+    _selector_cache = cache
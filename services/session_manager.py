@@ -1,21 +1,37 @@
 import os
-import json
 import logging
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from datetime import datetime, timedelta
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from config import config
+from utils.browser_utils import BrowserUtils
+from services.login_probe import probe_login_state, session_ready_conditions, post_login_conditions
+from services.readiness import Readiness, wait_until_ready
+from services.session_store import get_session_store
+from services.storage_state import StorageStateStore
+from services.session_registry import get_session_registry, DEFAULT_SESSION_ID
+from services.context_cache import context_cache, CachedContext
+from services.resource_blocking import apply_generation_profile, apply_validation_profile
+from services.metrics import login_validation_seconds
+from services.cookie_pipeline import playwright_cookies
+from utils.tracing import traced, span
 import asyncio
 import uuid
 
 class SessionManager:
     def __init__(self):
         self.session_file = Path(config.SESSION_DIR) / "grok_session.json"
+        self.profile_dir = Path(config.SESSION_DIR) / "session_manager_profile"
+        self.session_store = get_session_store(self.session_file)
+        self.storage_state = StorageStateStore()
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
+        self.last_login_verdict: Optional[Dict[str, Any]] = None
         
     async def __aenter__(self):
         await self.initialize()
@@ -37,16 +53,18 @@ class SessionManager:
                 )
         else:
             if self.context is None:
-                user_data_dir = Path(config.SESSION_DIR) / "session_manager_profile"
-                user_data_dir.mkdir(parents=True, exist_ok=True)
+                # A profile can only be opened once, release the cached copy first
+                await context_cache.evict(self._persistent_profile_key())
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
 
                 self.context = await self.playwright.chromium.launch_persistent_context(
-                    user_data_dir=str(user_data_dir),
+                    user_data_dir=str(self.profile_dir),
                     headless=False,
                     timeout=config.BROWSER_TIMEOUT,
                     viewport={"width": 1280, "height": 800},
                     ignore_https_errors=True,
                 )
+                await apply_validation_profile(self.context)
                 self.browser = None
         
     async def close(self):
@@ -67,6 +85,7 @@ class SessionManager:
             await self.playwright.stop()
             self.playwright = None
             
+    @traced("session.login")
     async def login(self, username: str, password: str, remember_me: bool = True) -> bool:
         """
         Perform manual login to Grok AI
@@ -79,6 +98,7 @@ class SessionManager:
                     viewport={"width": 1280, "height": 800},
                     ignore_https_errors=True
                 )
+                await apply_validation_profile(self.context)
 
             if self.context is None:
                 raise Exception("Browser context not initialized")
@@ -92,9 +112,12 @@ class SessionManager:
             await self.page.goto(config.GROK_URL, timeout=config.LOGIN_TIMEOUT * 1000)
             
             # Wait for login elements - this will need to be customized based on actual Grok login page
-            await self.page.wait_for_selector("input[name='username']", timeout=10000)
-            await self.page.wait_for_selector("input[name='password']", timeout=10000)
-            await self.page.wait_for_selector("button[type='submit']", timeout=10000)
+            form_elements = await asyncio.gather(*(
+                BrowserUtils.wait_for_element(self.page, [selector], timeout=10000)
+                for selector in ("input[name='username']", "input[name='password']", "button[type='submit']")
+            ))
+            if not all(form_elements):
+                raise Exception("Login form not found")
             
             # Fill login form
             await self.page.fill("input[name='username']", username)
@@ -105,11 +128,12 @@ class SessionManager:
                 if remember_checkbox:
                     await remember_checkbox.check()
             
-            # Submit login form
+            # Submit login form and wait until the app or a login error renders
+            readiness = Readiness(
+                self.page, "session.login", post_login_conditions(self.page), config.LOGIN_TIMEOUT * 1000
+            )
             await self.page.click("button[type='submit']")
-            
-            # Wait for navigation to complete
-            await self.page.wait_for_load_state("networkidle", timeout=config.LOGIN_TIMEOUT * 1000)
+            await readiness.wait()
             
             # Check if login was successful by looking for logged-in indicators
             # This will need to be customized based on actual Grok UI
@@ -124,8 +148,8 @@ class SessionManager:
                     "browser_type": config.BROWSER_TYPE
                 }
                 
-                with open(self.session_file, "w") as f:
-                    json.dump(session_data, f)
+                self.session_store.write(session_data)
+                await self._capture_storage_state("login")
                 
                 return True
             else:
@@ -138,146 +162,50 @@ class SessionManager:
             
     async def _check_login_success(self) -> bool:
         """
-        Check if login was successful by looking for UI elements that indicate logged-in state
+        Check if login was successful by probing the page and cookies in one pass
         """
+        started = time.monotonic()
         try:
-            current_url = self.page.url
-            logging.info(f"Checking login success at URL: {current_url}")
-            
-            # Give the page a moment to fully load after cookie injection
-            await asyncio.sleep(1)
-            
-            # Check if we're on a login/auth page (indicates not logged in)
-            if any(keyword in current_url.lower() for keyword in ["login", "signin", "sign-in", "auth/", "oauth/"]):
-                logging.info("Still on login/auth page - not logged in")
-                return False
-            
-            # If we're on the main Grok domain, that's a strong indicator
-            if "grok.com" in current_url or "grok.x.ai" in current_url:
-                # Check for common Grok logged-in indicators
-                # Try multiple selectors that might indicate a logged-in state
-                login_indicators = [
-                    # Chat interface elements (Grok-specific)
-                    'textarea',
-                    'input[type="text"]',
-                    'div[role="textbox"]',
-                    'textarea[placeholder*="Ask"]',
-                    'textarea[placeholder*="Message"]',
-                    'textarea[placeholder*="Type"]',
-                    'div[class*="chat"]',
-                    'div[class*="conversation"]',
-                    'button[aria-label*="Send"]',
-                    # User profile/menu elements
-                    'button[aria-label*="Profile"]',
-                    'button[aria-label*="User"]',
-                    'button[aria-label*="Menu"]',
-                    '[data-testid*="profile"]',
-                    '[data-testid*="user"]',
-                    '[data-testid*="menu"]',
-                    # Navigation elements that appear when logged in
-                    'nav',
-                    'aside',
-                    '[class*="sidebar"]',
-                    '[class*="navigation"]',
-                    # Avatar or user icon
-                    'img[alt*="avatar"]',
-                    'img[alt*="profile"]',
-                    '[class*="avatar"]',
-                ]
-                
-                for selector in login_indicators:
-                    try:
-                        element = await self.page.wait_for_selector(selector, timeout=3000, state="attached")
-                        if element:
-                            logging.info(f"✅ Found logged-in indicator: {selector}")
-                            return True
-                    except Exception:
-                        continue
-            
-            # Check for "Sign in" or "Login" buttons (indicates not logged in)
-            try:
-                login_button_selectors = [
-                    'button:has-text("Sign in")',
-                    'button:has-text("Log in")',
-                    'a:has-text("Sign in")',
-                    'a:has-text("Log in")',
-                    'button:has-text("Login")',
-                ]
-                for selector in login_button_selectors:
-                    try:
-                        button = await self.page.wait_for_selector(selector, timeout=1000)
-                        if button:
-                            text = await button.inner_text()
-                            logging.info(f"❌ Found login button: {text} - not logged in")
-                            return False
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-            
-            # If URL suggests we're in the app and no login buttons found, consider logged in
-            if any(keyword in current_url.lower() for keyword in ["chat", "conversation", "app", "dashboard", "home", "grok.com"]):
-                logging.info(f"✅ URL suggests logged in state: {current_url}")
-                
-                # Additional check: verify we have important cookies
-                cookies = await self.context.cookies()
-                if len(cookies) > 0:
-                    logging.info(f"✅ Found {len(cookies)} cookies in context")
-                    return True
-            
-            # Check cookies for session indicators
-            cookies = await self.context.cookies()
-            logging.info(f"🍪 Total cookies in context: {len(cookies)}")
-            
-            # Log cookie names for debugging
-            cookie_names = [c.get("name", "") for c in cookies]
-            logging.info(f"🍪 Cookie names: {', '.join(cookie_names[:10])}")
-            
-            session_cookies = [c for c in cookies if any(
-                keyword in c.get("name", "").lower() 
-                for keyword in ["session", "auth", "token", "sid", "_ga", "ct0", "kdt"]
-            )]
-            
-            if session_cookies:
-                logging.info(f"✅ Found {len(session_cookies)} session-related cookies")
-                return True
+            # Don't judge a page that hasn't parsed its DOM yet
+            await self.page.wait_for_load_state("domcontentloaded")
             
-            # If we have a significant number of cookies and we're on grok.com, assume logged in
-            if len(cookies) >= 3 and "grok.com" in current_url:
-                logging.info(f"✅ Have {len(cookies)} cookies and on grok.com - assuming logged in")
-                return True
+            verdict = await probe_login_state(self.page, self.context)
+            self.last_login_verdict = verdict
             
-            logging.warning("⚠️ No definitive login indicators found")
-            return False
+            if verdict["logged_in"]:
+                logging.info(
+                    f"✅ Logged in ({verdict['reason']}) at {verdict['url']} "
+                    f"in {verdict['elapsed_ms']}ms"
+                )
+            else:
+                logging.info(
+                    f"❌ Not logged in ({verdict['reason']}) at {verdict['url']}, "
+                    f"{verdict['cookie_count']} cookies"
+                )
+            login_validation_seconds.observe(
+                time.monotonic() - started, logged_in=str(verdict["logged_in"]).lower()
+            )
+            return verdict["logged_in"]
             
         except Exception as e:
             logging.error(f"❌ Error checking login success: {str(e)}")
+            login_validation_seconds.observe(time.monotonic() - started, logged_in="error")
             return False
             
-    def has_valid_session(self) -> bool:
+    async def _capture_storage_state(self, source: str):
         """
-        Check if we have a valid session
+        Snapshot the validated context so new contexts can restore it in one call
         """
-        if not self.session_file.exists():
-            return False
-            
         try:
-            with open(self.session_file, "r") as f:
-                session_data = json.load(f)
-                
-            if not session_data.get("logged_in", False):
-                return False
-                
-            expiry_str = session_data.get("expiry")
-            if expiry_str:
-                expiry = datetime.fromisoformat(expiry_str)
-                if datetime.now() > expiry:
-                    return False
-                    
-            return True
+            await self.storage_state.capture(self.context, source)
+        except Exception as e:
+            logging.warning(f"Could not capture storage state: {str(e)}")
             
-        except Exception:
-            return False
+    def has_valid_session(self) -> bool:
+        """
+        Check if we have a valid session
+        """
+        return self.session_store.is_valid()
             
     def get_session_status(self) -> Dict[str, Any]:
         """
@@ -290,19 +218,13 @@ class SessionManager:
             "browser_type": config.BROWSER_TYPE
         }
         
-        if self.session_file.exists():
-            try:
-                with open(self.session_file, "r") as f:
-                    session_data = json.load(f)
-                    
-                status.update({
-                    "logged_in": session_data.get("logged_in", False),
-                    "session_valid": self.has_valid_session(),
-                    "session_expiry": session_data.get("expiry")
-                })
-                
-            except Exception as e:
-                logging.error(f"Failed to read session file: {str(e)}")
+        session_data = self.session_store.read()
+        if session_data is not None:
+            status.update({
+                "logged_in": session_data.get("logged_in", False),
+                "session_valid": self.session_store.is_valid(),
+                "session_expiry": session_data.get("expiry")
+            })
         
         return status
         
@@ -311,8 +233,8 @@ class SessionManager:
         Clear current session
         """
         try:
-            if self.session_file.exists():
-                os.remove(self.session_file)
+            self.session_store.delete()
+            self.storage_state.delete()
                 
             # Clear user data directory
             user_data_dir = Path(config.SESSION_DIR) / "user_data"
@@ -325,32 +247,96 @@ class SessionManager:
             
     async def get_page(self) -> Page:
         """
-        Get a page with valid session
+        Get a page with valid session.
+        
+        The page belongs to a context cached per profile and has already
+        been navigated to Grok, so repeated calls don't navigate again.
         """
         if not self.has_valid_session():
             raise Exception("No valid session available")
             
-        if self.page is None:
-            await self.initialize()
+        entry = await self._cached_context()
+        return await entry.home()
+    
+    @asynccontextmanager
+    async def lease_page(self) -> AsyncIterator[Page]:
+        """
+        Lease a page on the cached context for one generation: the navigated
+        home page when it is free, otherwise a fresh page that is closed afterwards
+        """
+        if not self.has_valid_session():
+            raise Exception("No valid session available")
             
-            user_data_dir = Path(config.SESSION_DIR) / "user_data"
-            if not user_data_dir.exists():
-                raise Exception("No user data directory found")
-                
-            self.context = await self.browser.new_context(
-                user_data_dir=str(user_data_dir),
+        entry = await self._cached_context()
+        async with context_cache.lease(entry) as page:
+            yield page
+    
+    def _persistent_profile_key(self) -> str:
+        return f"persistent:{self.profile_dir}"
+    
+    async def _cached_context(self) -> CachedContext:
+        """
+        Get the cached context for the current profile: the persistent
+        profile in headed mode, a storage-state context in headless mode
+        """
+        if not config.HEADLESS:
+            key = self._persistent_profile_key()
+            return await context_cache.get(key, lambda: self._create_persistent_context(key))
+        
+        # Rebuild the context when the snapshot or cookie file changes
+        sources = [Path(config.STORAGE_STATE_FILE), Path(config.GROK_COOKIE_FILE_PATH)]
+        version = max((p.stat().st_mtime for p in sources if p.exists()), default=None)
+        key = f"storage_state:{config.STORAGE_STATE_FILE}"
+        return await context_cache.get(key, lambda: self._create_storage_state_context(key), version)
+    
+    async def _create_persistent_context(self, key: str) -> CachedContext:
+        playwright = await async_playwright().start()
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            context = await playwright.chromium.launch_persistent_context(
+                user_data_dir=str(self.profile_dir),
+                headless=False,
+                timeout=config.BROWSER_TIMEOUT,
                 viewport={"width": 1280, "height": 800},
-                ignore_https_errors=True
+                ignore_https_errors=True,
             )
+            await apply_generation_profile(context)
+        except Exception:
+            await playwright.stop()
+            raise
+        return CachedContext(key, context, playwright=playwright)
+    
+    async def _create_storage_state_context(self, key: str) -> CachedContext:
+        playwright = await async_playwright().start()
+        browser = None
+        try:
+            browser = await playwright.chromium.launch(headless=True, timeout=config.BROWSER_TIMEOUT)
             
-            self.page = await self.context.new_page()
-            
-            # Navigate to home page to ensure session is valid
-            await self.page.goto(config.GROK_URL, timeout=config.BROWSER_TIMEOUT)
-            await self.page.wait_for_load_state("networkidle")
-            
-        return self.page
+            registry = get_session_registry()
+            storage_state = registry.load_storage_state(DEFAULT_SESSION_ID)
+            if storage_state is not None:
+                context = await browser.new_context(
+                    viewport={"width": 1280, "height": 800},
+                    ignore_https_errors=True,
+                    storage_state=storage_state
+                )
+            else:
+                context = await browser.new_context(
+                    viewport={"width": 1280, "height": 800},
+                    ignore_https_errors=True
+                )
+                from services.enhanced_cookie_injector import EnhancedCookieInjector
+                cookies = playwright_cookies(registry.load_cookies(DEFAULT_SESSION_ID))
+                await EnhancedCookieInjector.inject_cookie_batch(context, cookies)
+            await apply_generation_profile(context)
+        except Exception:
+            if browser is not None:
+                await browser.close()
+            await playwright.stop()
+            raise
+        return CachedContext(key, context, playwright=playwright, browser=browser)
     
+    @traced("session.oauth_login")
     async def oauth_login(self, provider: str, auth_code: str, redirect_uri: Optional[str] = None, remember_me: bool = True) -> Tuple[bool, str]:
         """
         Perform OAuth authorization login
@@ -363,6 +349,7 @@ class SessionManager:
                     viewport={"width": 1280, "height": 800},
                     ignore_https_errors=True
                 )
+                await apply_validation_profile(self.context)
 
             if self.context is None:
                 raise Exception("Browser context not initialized")
@@ -374,10 +361,12 @@ class SessionManager:
             
             # Navigate to OAuth callback URL or provider-specific login page
             oauth_url = self._get_oauth_url(provider, auth_code, redirect_uri)
-            await self.page.goto(oauth_url, timeout=config.LOGIN_TIMEOUT * 1000)
+            await self.page.goto(oauth_url, wait_until="domcontentloaded", timeout=config.LOGIN_TIMEOUT * 1000)
             
-            # Wait for OAuth completion - this depends on the specific website's OAuth flow
-            await self.page.wait_for_load_state("networkidle", timeout=config.LOGIN_TIMEOUT * 1000)
+            # Wait for OAuth completion - the callback redirects away from the auth URL
+            await wait_until_ready(
+                self.page, "session.oauth_login", post_login_conditions(self.page), config.LOGIN_TIMEOUT * 1000
+            )
             
             # Check if OAuth login was successful
             logged_in = await self._check_login_success()
@@ -397,8 +386,8 @@ class SessionManager:
                     "session_id": session_id
                 }
                 
-                with open(self.session_file, "w") as f:
-                    json.dump(session_data, f)
+                self.session_store.write(session_data)
+                await self._capture_storage_state("oauth")
                 
                 return True, session_id
             else:
@@ -426,6 +415,7 @@ class SessionManager:
             # Default fallback - may need to be customized
             return f"{config.GROK_URL}/auth/{provider}/callback?code={auth_code}&redirect_uri={redirect_uri or ''}"
     
+    @traced("session.inject_cookies")
     async def inject_cookies(self, cookies: List[Dict[str, Any]], user_agent: Optional[str] = None, remember_me: bool = True) -> Tuple[bool, int]:
         """
         Manually inject cookies to establish a session
@@ -442,6 +432,7 @@ class SessionManager:
                     context_kwargs["user_agent"] = user_agent
 
                 self.context = await self.browser.new_context(**context_kwargs)
+                await apply_validation_profile(self.context)
 
             if self.context is None:
                 raise Exception("Browser context not initialized")
@@ -476,79 +467,12 @@ class SessionManager:
                 await self.page.goto(url, timeout=config.BROWSER_TIMEOUT)
                 await self.page.wait_for_load_state("domcontentloaded")
             
-            # Filter out expired cookies and prepare cookies for injection
-            current_timestamp = datetime.now().timestamp()
-            valid_cookies = []
-            
-            for cookie in cookies:
-                # Normalize/validate expires
-                expires = cookie.get("expires")
-                if isinstance(expires, (int, float)):
-                    # Some exports store expiry in milliseconds
-                    if expires > 10_000_000_000:
-                        expires = expires / 1000
-                else:
-                    expires = None
-
-                # Check if cookie is expired
-                if expires and expires > 0 and expires < current_timestamp:
-                    logging.debug(f"Skipping expired cookie: {cookie.get('name', '')}")
-                    continue
-
-                # Normalize domain - preserve the original domain format
-                # Don't artificially add leading dots to domains that didn't have them
-                domain_raw = str(cookie.get("domain", "")).strip()
-                if not domain_raw:
-                    logging.debug(f"Skipping cookie without domain: {cookie.get('name', '')}")
-                    continue
-
-                had_leading_dot = domain_raw.startswith(".")
-                domain = domain_raw.lstrip(".")
-                if had_leading_dot:
-                    domain = "." + domain
-                # For domains like "accounts.x.ai" without leading dot, keep as-is
-
-                cookie_data: Dict[str, Any] = {
-                    "name": cookie["name"],
-                    "value": cookie["value"],
-                    "domain": domain,
-                    "path": cookie.get("path", "/"),
-                    "httpOnly": cookie.get("httpOnly", False),
-                    "secure": cookie.get("secure", False),
-                }
-
-                # Add expires only if it's valid
-                if expires and expires > 0:
-                    cookie_data["expires"] = float(expires)
-
-                # Add sameSite if present (normalize common formats)
-                # CRITICAL: SameSite=None requires Secure=True for browser security
-                same_site = cookie.get("sameSite")
-                cookie_secure = cookie.get("secure", False)
-                if same_site:
-                    same_site_str = str(same_site)
-                    same_site_norm = {
-                        "lax": "Lax",
-                        "strict": "Strict",
-                        "none": "None",
-                        "no_restriction": "None",
-                    }.get(same_site_str.lower())
-                    if same_site_norm:
-                        cookie_data["sameSite"] = same_site_norm
-                        # Auto-enable Secure for SameSite=None (browser requirement)
-                        if same_site_norm == "None" and not cookie_secure:
-                            logging.debug(f"Auto-enabling secure=True for SameSite=None cookie: {cookie['name']}")
-                            cookie_data["secure"] = True
-
-                valid_cookies.append(cookie_data)
-            
-            logging.info(f"Injecting {len(valid_cookies)} valid cookies (filtered from {len(cookies)} total)")
-            
-            # Add cookies to the browser context using enhanced injector
+            # Add cookies to the browser context using enhanced injector, which
+            # normalizes them and drops expired and invalid ones in one pass
             from services.enhanced_cookie_injector import EnhancedCookieInjector
             
             injection_report = await EnhancedCookieInjector.inject_cookies_with_report(
-                self.context, valid_cookies, self.page
+                self.context, cookies, self.page
             )
             
             cookie_count = injection_report["cookies_injected"]
@@ -577,11 +501,12 @@ class SessionManager:
                     validation_url = config.X_AI_URL
 
             logging.info(f"🔄 Navigating to {validation_url} to apply injected cookies...")
-            await self.page.goto(validation_url, wait_until="networkidle", timeout=30000)
+            with span("playwright.goto", kind="client", url=validation_url, timeout=30000):
+                await self.page.goto(validation_url, wait_until="domcontentloaded", timeout=30000)
             
-            # Wait for page to fully render and JavaScript to execute
-            logging.info("⏳ Waiting for page to fully render...")
-            await asyncio.sleep(3)
+            # Wait until the app or a login form rendered
+            logging.info("⏳ Waiting for page to render...")
+            await wait_until_ready(self.page, "session.inject_cookies", session_ready_conditions(), 30000)
             
             # Log current URL and page title for debugging
             current_url = self.page.url
@@ -611,8 +536,8 @@ class SessionManager:
                     "user_agent": user_agent
                 }
                 
-                with open(self.session_file, "w") as f:
-                    json.dump(session_data, f)
+                self.session_store.write(session_data)
+                await self._capture_storage_state("cookie_injection")
                 
                 return True, cookie_count
             else:
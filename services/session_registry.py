@@ -0,0 +1,243 @@
+"""
+Session Registry Module
+
+Holds several independent Grok identities (accounts), keyed by session_id,
+so generation work can be spread across more than one logged-in account.
+Each account keeps its own cookie file (and optionally a storage state
+snapshot) under SESSION_REGISTRY_DIR/<id>/.
+
+The browser pool launches pooled browsers per account (always picking the
+account with the fewest browsers) and the page scheduler routes each
+generation to the least-loaded context, which balances work across the
+accounts. Only accounts whose cookie file holds usable (unexpired) cookies
+are routed to; the default cookie file (GROK_COOKIE_FILE_PATH) stays in the
+rotation as one more account while it does. Without usable registered
+accounts it is the only one, as before. Whether a cookie file is usable is
+cached by its mtime and size, so routing decisions don't re-read it.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from config import config
+from services.cookie_extractor import save_cookies_to_file, load_cookies_from_file
+from services.storage_state import StorageStateStore
+from services.cookie_pipeline import normalize_jar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_ID = "default"
+
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SessionRegistry:
+    """
+    Persisted set of accounts with their own cookies
+    """
+
+    def __init__(self, registry_dir: Optional[str] = None):
+        self.registry_dir = Path(registry_dir or config.SESSION_REGISTRY_DIR)
+        self.index_file = self.registry_dir / "accounts.json"
+        self._accounts: Dict[str, Dict[str, Any]] = self._load()
+        # Cookie file -> (stat signature, time its last usable cookie expires)
+        self._usable_until: Dict[str, Tuple[Tuple[int, int, int], Optional[float]]] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return {a["session_id"]: a for a in json.load(f)}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Failed to read session registry {self.index_file}: {str(e)}")
+            return {}
+
+    def _save(self):
+        self.registry_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_file.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self._accounts.values()), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.index_file)
+
+    def _account_dir(self, session_id: str) -> Path:
+        return self.registry_dir / session_id
+
+    def add(
+        self,
+        cookies: List[Dict[str, Any]],
+        session_id: Optional[str] = None,
+        label: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Register an account (or replace the cookies of an existing one)
+        """
+        session_id = session_id or str(uuid.uuid4())[:8]
+        if session_id == DEFAULT_SESSION_ID or not _SESSION_ID_PATTERN.match(session_id):
+            raise ValueError(f"Invalid session_id: {session_id}")
+
+        cookie_file = save_cookies_to_file(cookies, str(self._account_dir(session_id) / "cookies.json"))
+
+        account = self._accounts.get(session_id, {})
+        account.update({
+            "session_id": session_id,
+            "label": label or account.get("label") or session_id,
+            "cookie_file": cookie_file,
+            "cookie_count": len(cookies),
+            "created_at": account.get("created_at") or datetime.now(timezone.utc).isoformat(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        })
+        self._accounts[session_id] = account
+        self._save()
+
+        logger.info(f"Registered session {session_id} with {len(cookies)} cookies")
+        return dict(account)
+
+    def remove(self, session_id: str) -> bool:
+        """
+        Forget an account and delete its stored cookies
+        """
+        if self._accounts.pop(session_id, None) is None:
+            return False
+
+        self._save()
+        shutil.rmtree(self._account_dir(session_id), ignore_errors=True)
+        logger.info(f"Removed session {session_id}")
+        return True
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        account = self._accounts.get(session_id)
+        return dict(account) if account else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [dict(a) for a in self._accounts.values()]
+
+    def has_accounts(self) -> bool:
+        return bool(self._accounts)
+
+    def has_usable_accounts(self) -> bool:
+        return any(self.is_usable(session_id) for session_id in self._accounts)
+
+    def session_ids(self) -> List[str]:
+        """
+        Accounts the pool should spread browsers over: the usable ones, the
+        default session included while its cookie file has usable cookies
+        """
+        accounts = [session_id for session_id in self._accounts if self.is_usable(session_id)]
+        if not accounts:
+            return [DEFAULT_SESSION_ID]
+        if self.is_usable(DEFAULT_SESSION_ID):
+            return [DEFAULT_SESSION_ID] + accounts
+        return accounts
+
+    def is_usable(self, session_id: str) -> bool:
+        """
+        Check whether an account's cookie file holds at least one usable cookie
+        """
+        if session_id == DEFAULT_SESSION_ID:
+            cookie_file = config.GROK_COOKIE_FILE_PATH
+        else:
+            account = self._accounts.get(session_id)
+            if account is None:
+                return False
+            cookie_file = account["cookie_file"]
+
+        try:
+            stat = os.stat(cookie_file)
+        except OSError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        cached = self._usable_until.get(cookie_file)
+        if cached is None or cached[0] != signature:
+            cached = (signature, self._read_usable_until(cookie_file))
+            self._usable_until[cookie_file] = cached
+        usable_until = cached[1]
+        return usable_until is not None and time.time() < usable_until
+
+    @staticmethod
+    def _read_usable_until(cookie_file: str) -> Optional[float]:
+        """When the last usable cookie of a file expires (inf for session cookies), None if none is usable"""
+        try:
+            records = normalize_jar(load_cookies_from_file(cookie_file))
+        except Exception as e:
+            logger.warning(f"Could not read cookie file {cookie_file}: {str(e)}")
+            return None
+        if not records:
+            return None
+        if any(record.expires is None for record in records):
+            return float("inf")
+        return max(record.expires for record in records)
+
+    def load_cookies(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Load the cookies of an account; the default account uses GROK_COOKIE_FILE_PATH
+        """
+        if session_id == DEFAULT_SESSION_ID:
+            return load_cookies_from_file()
+
+        account = self._accounts.get(session_id)
+        if account is None:
+            logger.warning(f"Unknown session {session_id}")
+            return []
+        return load_cookies_from_file(account["cookie_file"])
+
+    def storage_state_store(self, session_id: str) -> StorageStateStore:
+        """
+        Snapshot store of an account; the default account uses STORAGE_STATE_FILE
+        """
+        if session_id == DEFAULT_SESSION_ID:
+            return StorageStateStore()
+        return StorageStateStore(str(self._account_dir(session_id) / "storage_state.json"))
+
+    def load_storage_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the storage state snapshot of an account, unless its cookies
+        were replaced after the snapshot was taken
+        """
+        if session_id == DEFAULT_SESSION_ID:
+            cookie_file = Path(config.GROK_COOKIE_FILE_PATH)
+        else:
+            account = self._accounts.get(session_id)
+            if account is None:
+                return None
+            cookie_file = Path(account["cookie_file"])
+
+        cookies_changed_at = cookie_file.stat().st_mtime if cookie_file.exists() else None
+        return self.storage_state_store(session_id).load(newer_than=cookies_changed_at)
+
+
+def has_usable_session(session_manager) -> bool:
+    """
+    Check whether generations can run: either the default session is valid,
+    or the browser pool is running with a registered account whose cookies
+    are usable
+    """
+    if session_manager.has_valid_session():
+        return True
+
+    from services.browser_pool import get_browser_pool
+    return get_browser_pool() is not None and get_session_registry().has_usable_accounts()
+
+
+_session_registry: Optional[SessionRegistry] = None
+
+
+def get_session_registry() -> SessionRegistry:
+    """Get the process-wide session registry, loading it on first use"""
+    global _session_registry
+    if _session_registry is None:
+        _session_registry = SessionRegistry()
+    return _session_registry
+
+
+def set_session_registry(registry: Optional[SessionRegistry]):
+    """Replace the process-wide session registry"""
+    global _session_registry
+    _session_registry = registry
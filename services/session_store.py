@@ -0,0 +1,115 @@
+"""
+Session Status Store Module
+
+Keeps the parsed session file in memory so has_valid_session() and
+get_session_status() don't open and parse sessions/grok_session.json on
+every request. The file is only re-read when its mtime, size or inode
+changes (e.g. edited by hand or by another process), and all writes go
+through the store atomically so readers never see a partial file.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    In-memory view of one session file, refreshed when the file changes
+    """
+
+    def __init__(self, session_file: Path):
+        self.session_file = Path(session_file)
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self.loads = 0
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.session_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the session data, or None when there is no readable session file
+        """
+        signature = self._stat_signature()
+        with self._lock:
+            if signature != self._signature:
+                self._data = self._load() if signature is not None else None
+                self._signature = signature
+            return dict(self._data) if self._data is not None else None
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        self.loads += 1
+        try:
+            with open(self.session_file, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Failed to read session file: {str(e)}")
+            return None
+
+    def write(self, session_data: Dict[str, Any]):
+        """
+        Replace the session file atomically and update the cached copy
+        """
+        with self._lock:
+            self.session_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.session_file.with_suffix(".json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(session_data, f)
+            os.replace(tmp_path, self.session_file)
+            self._data = dict(session_data)
+            self._signature = self._stat_signature()
+
+    def delete(self):
+        """
+        Remove the session file
+        """
+        with self._lock:
+            try:
+                os.remove(self.session_file)
+            except FileNotFoundError:
+                pass
+            self._data = None
+            self._signature = None
+
+    def is_valid(self) -> bool:
+        """
+        Check whether the stored session is logged in and not expired
+        """
+        session_data = self.read()
+        if not session_data or not session_data.get("logged_in", False):
+            return False
+
+        try:
+            expiry_str = session_data.get("expiry")
+            if expiry_str and datetime.now() > datetime.fromisoformat(expiry_str):
+                return False
+        except Exception:
+            return False
+
+        return True
+
+
+_stores: Dict[str, SessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_store(session_file: Path) -> SessionStore:
+    """Get the process-wide store for a session file"""
+    key = str(Path(session_file).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SessionStore(Path(session_file))
+        return store
@@ -0,0 +1,92 @@
+"""
+Single-Flight Coalescing Module
+
+Collapses identical generations that are in flight at the same time into
+one browser run. The first caller for a key starts the work; callers that
+arrive with the same key while it is running attach to it, receive every
+progress report from then on and get the same result (or exception).
+
+The work runs in its own task, so a caller that goes away does not cancel
+it for the others.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, List, Callable, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+Reporter = Callable[..., None]
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.callbacks: List[Reporter] = []
+        self.waiters = 0
+
+    def report(self, *args):
+        for callback in list(self.callbacks):
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {str(e)}")
+
+
+class SingleFlight:
+    """
+    Process-wide map of key -> in-flight work shared by identical callers
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: str,
+        work: Callable[[Reporter], Awaitable[Any]],
+        progress_callback: Optional[Reporter] = None
+    ) -> Any:
+        """
+        Run work(report) for key, or attach to the run already in flight.
+
+        report fans progress out to the progress callbacks of every caller
+        currently attached to the flight.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(work(flight.report))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Attached to in-flight generation {key[:12]} ({flight.waiters} waiting)")
+
+        if progress_callback is not None:
+            flight.callbacks.append(progress_callback)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if progress_callback is not None:
+                flight.callbacks.remove(progress_callback)
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "waiting": sum(f.waiters for f in self._flights.values()),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+generation_flights = SingleFlight()
@@ -0,0 +1,102 @@
+"""
+Storage State Snapshot Module
+
+Captures the full authenticated browser state (cookies plus localStorage
+per origin, in Playwright's storage_state format) once a session has been
+validated, and restores it into new contexts with a single
+new_context(storage_state=...) call. New contexts then start logged in
+without bootstrap navigations or per-cookie injection.
+
+Snapshots are stored as JSON with a small header:
+
+    {
+        "captured_at": "<ISO timestamp>",
+        "source": "cookie_injection",
+        "cookie_count": 12,
+        "origin_count": 2,
+        "state": {"cookies": [...], "origins": [{"origin": ..., "localStorage": [...]}]}
+    }
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional
+from playwright.async_api import BrowserContext
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class StorageStateStore:
+    """
+    Reads and writes one storage state snapshot file
+    """
+
+    def __init__(self, state_file: Optional[str] = None):
+        self.state_file = Path(state_file or config.STORAGE_STATE_FILE)
+
+    async def capture(self, context: BrowserContext, source: str) -> Dict[str, Any]:
+        """
+        Snapshot the cookies and localStorage of a validated context
+        """
+        state = await context.storage_state()
+        snapshot = {
+            "captured_at": datetime.now(timezone.utc).isoformat(),
+            "source": source,
+            "cookie_count": len(state.get("cookies", [])),
+            "origin_count": len(state.get("origins", [])),
+            "state": state,
+        }
+
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_file)
+
+        logger.info(
+            f"Captured storage state ({snapshot['cookie_count']} cookies, "
+            f"{snapshot['origin_count']} origins) to {self.state_file}"
+        )
+        return snapshot
+
+    def load(self, newer_than: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the state to pass as storage_state=, without expired cookies.
+
+        Returns None when there is no snapshot, or when it is older than the
+        newer_than timestamp (e.g. the mtime of a cookie file saved later).
+        """
+        try:
+            if newer_than is not None and os.path.getmtime(self.state_file) < newer_than:
+                logger.info(f"Ignoring storage state {self.state_file}, the cookies changed after it was captured")
+                return None
+
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable storage state {self.state_file}: {str(e)}")
+            return None
+
+        state = snapshot.get("state") or {}
+        now = time.time()
+        cookies = [
+            c for c in state.get("cookies", [])
+            if not (c.get("expires", -1) > 0 and c["expires"] < now)
+        ]
+        if not cookies:
+            return None
+
+        return {"cookies": cookies, "origins": state.get("origins", [])}
+
+    def delete(self):
+        try:
+            self.state_file.unlink()
+        except FileNotFoundError:
+            pass
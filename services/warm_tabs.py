@@ -0,0 +1,95 @@
+"""
+Warm Generation Tabs Module
+
+Helpers for keeping pooled pages parked on the Grok generation pages.
+A parked tab has already loaded /generate/image or /generate/video and has
+its prompt input focused, so a generation can start typing right away.
+After a job the tab is reset in place (prompt cleared, result dismissed)
+instead of being reloaded.
+"""
+
+import logging
+from playwright.async_api import Page
+from config import config
+from services.readiness import SelectorCondition, wait_until_ready
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Prompt inputs of the generation pages, in order of preference
+PROMPT_SELECTORS = [
+    "textarea[placeholder*='prompt']",
+    "textarea[placeholder*='describe']",
+    "input[placeholder*='prompt']",
+    "#prompt-input",
+    ".prompt-textarea",
+    "[name='prompt']",
+]
+_PROMPT_SELECTOR = ", ".join(PROMPT_SELECTORS)
+
+# Clears the prompt, dismisses the previous result and focuses the prompt.
+# The page's own DOM is left alone; a result still on screen is ignored by
+# the completion detector, which judges completion relative to its arm().
+# Returns false when the page no longer looks like a generation page.
+RESET_SCRIPT = """(promptSelector) => {
+    const prompt = document.querySelector(promptSelector);
+    if (!prompt) return false;
+
+    const dismiss = document.querySelector(
+        "[aria-label='Close'], [aria-label='Dismiss'], button.dismiss, button.close-result"
+    );
+    if (dismiss) dismiss.click();
+
+    const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(prompt), "value");
+    if (setter && setter.set) setter.set.call(prompt, "");
+    else prompt.value = "";
+    prompt.dispatchEvent(new Event("input", {bubbles: true}));
+    prompt.focus();
+    return true;
+}"""
+
+
+def generation_url(content_type: str) -> str:
+    """URL of the generation page for a content type"""
+    return f"{config.GROK_URL}/generate/{content_type}"
+
+
+def is_on_generation_page(page: Page, content_type: str) -> bool:
+    """Check whether a page is already parked on the right generation page"""
+    try:
+        return page.url.startswith(generation_url(content_type))
+    except Exception:
+        return False
+
+
+async def park(page: Page, content_type: str) -> bool:
+    """
+    Load the generation page into a tab and focus the prompt input
+    """
+    try:
+        if not is_on_generation_page(page, content_type):
+            url = generation_url(content_type)
+            with span("playwright.goto", kind="client", url=url, timeout=config.BROWSER_TIMEOUT):
+                await page.goto(url, wait_until="domcontentloaded", timeout=config.BROWSER_TIMEOUT)
+        # The SPA renders the prompt after load; reset only once it is there
+        if not await wait_until_ready(
+            page, "warm_tabs.park", [SelectorCondition(PROMPT_SELECTORS)], timeout=config.BROWSER_TIMEOUT
+        ):
+            return False
+        return bool(await page.evaluate(RESET_SCRIPT, _PROMPT_SELECTOR))
+    except Exception as e:
+        logger.warning(f"Could not park tab on the {content_type} generation page: {str(e)}")
+        return False
+
+
+async def reset(page: Page, content_type: str) -> bool:
+    """
+    Reset a tab in place after a job; False means it should be discarded
+    """
+    if page.is_closed() or not is_on_generation_page(page, content_type):
+        return False
+    try:
+        return bool(await page.evaluate(RESET_SCRIPT, _PROMPT_SELECTOR))
+    except Exception as e:
+        logger.debug(f"Could not reset warm tab: {str(e)}")
+        return False
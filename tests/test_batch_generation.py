@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batch image generation
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from fastapi.testclient import TestClient
+from config import config
+from main import app
+from api.routers import grok as grok_router
+from utils.error_handling import QueueFullError
+from models.response_models import GenerationResponse, FileType
+from services.grok_service import GrokService
+from services.result_cache import ResultCache, set_result_cache
+
+
+class FakeBatchService(GrokService):
+    """GrokService that 'generates' on fake pages and counts leases"""
+
+    def __init__(self, lease_error=None):
+        self.browser_pool = None
+        self.leases = 0
+        self.pages_used = {}
+        self.lease_error = lease_error
+
+    @asynccontextmanager
+    async def _lease_page(self, content_type=None, page=None):
+        if page is not None:
+            yield page
+            return
+        if self.lease_error is not None:
+            raise self.lease_error
+        self.leases += 1
+        yield f"tab-{self.leases}"
+
+    async def _run_generation(self, content_type, prompt, timeout, progress_callback=None, held_page=None):
+        await asyncio.sleep(0.01)
+        self.pages_used.setdefault(held_page, []).append(prompt)
+        return GenerationResponse(success=True, file_path=f"/output/{prompt}.png", file_type=FileType.image)
+
+
+def collect(service, prompts, **kwargs):
+    async def run():
+        return [item async for item in service.generate_image_batch(prompts, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_batch_reuses_one_tab_per_worker():
+    """Test that a batch leases one tab per worker and runs every prompt"""
+    service = FakeBatchService()
+    prompts = [f"prompt-{i}" for i in range(5)]
+    results = collect(service, prompts, concurrency=2)
+
+    assert sorted(index for index, _ in results) == list(range(5))
+    assert all(result.success for _, result in results)
+    assert service.leases == 2
+    assert set(service.pages_used) == {"tab-1", "tab-2"}
+    print("✓ Batch reuses one warm tab per worker")
+
+
+def test_batch_serves_cached_prompts_without_browser():
+    """Test that cached prompts are answered before any tab is leased"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cached_file = Path(tmpdir) / "cat.png"
+        cached_file.write_bytes(b"png")
+        cache = ResultCache(str(Path(tmpdir) / "index.json"), ttl=3600, max_entries=10, max_bytes=1024)
+        cache.put("image", "a cat", str(cached_file))
+        set_result_cache(cache)
+        enabled = config.RESULT_CACHE_ENABLED
+        config.RESULT_CACHE_ENABLED = True
+        try:
+            service = FakeBatchService()
+            results = collect(service, ["A cat"])
+        finally:
+            config.RESULT_CACHE_ENABLED = enabled
+            set_result_cache(None)
+
+    assert results[0][1].cached
+    assert service.leases == 0
+    print("✓ Batch answers cached prompts without a browser")
+
+
+def test_batch_reports_failures_when_no_tab_available():
+    """Test that every item fails cleanly when no worker gets a tab"""
+    service = FakeBatchService(lease_error=RuntimeError("pool closed"))
+    results = collect(service, ["one", "two", "three"], concurrency=2)
+
+    assert sorted(index for index, _ in results) == [0, 1, 2]
+    assert all(not r.success and r.error_message == "pool closed" for _, r in results)
+    print("✓ Batch reports failures when no tab can be leased")
+
+
+def test_held_page_generations_are_not_coalesced():
+    """Test that generations on caller-held pages never join a shared flight"""
+    service = FakeBatchService()
+    coalescing = config.GENERATION_COALESCING_ENABLED
+    config.GENERATION_COALESCING_ENABLED = True
+    try:
+        async def run():
+            return await asyncio.gather(
+                service._generate("image", "same", 30, bypass_cache=True, page="tab-a"),
+                service._generate("image", "same", 30, bypass_cache=True, page="tab-b"),
+            )
+        results = asyncio.run(run())
+    finally:
+        config.GENERATION_COALESCING_ENABLED = coalescing
+
+    assert all(result.success for result in results)
+    assert service.pages_used == {"tab-a": ["same"], "tab-b": ["same"]}
+    print("✓ Held-page generations run on their own tab")
+
+
+def test_coalescing_only_joins_flights_with_the_same_timeout():
+    """Test that a caller never inherits the timeout of a flight it joins"""
+    service = FakeBatchService()
+    coalescing = config.GENERATION_COALESCING_ENABLED
+    config.GENERATION_COALESCING_ENABLED = True
+    try:
+        async def run():
+            return await asyncio.gather(
+                service._generate("image", "same", 30, bypass_cache=True),
+                service._generate("image", "same", 30, bypass_cache=True),
+                service._generate("image", "same", 600, bypass_cache=True),
+            )
+        results = asyncio.run(run())
+    finally:
+        config.GENERATION_COALESCING_ENABLED = coalescing
+
+    assert all(result.success for result in results)
+    assert service.pages_used == {None: ["same", "same"]}
+    print("✓ Coalescing keys include the timeout")
+
+
+def test_batch_raises_queue_full_when_no_worker_leases():
+    """Test that a saturated pool surfaces as QueueFullError, not failed items"""
+    service = FakeBatchService(lease_error=QueueFullError("Too many requests waiting", retry_after=3))
+    try:
+        collect(service, ["one", "two"], concurrency=2)
+        assert False, "QueueFullError expected"
+    except QueueFullError as e:
+        assert e.retry_after == 3
+    print("✓ Batch raises QueueFullError when the pool is saturated")
+
+
+def test_batch_endpoint_backpressure_and_stream_errors(monkeypatch):
+    """Test that the endpoint answers 429 when saturated and ends broken streams with an error line"""
+    service = FakeBatchService(lease_error=QueueFullError("Too many requests waiting", retry_after=3))
+    monkeypatch.setattr(grok_router, "has_usable_session", lambda session_manager: True)
+    monkeypatch.setattr(grok_router, "GrokService", lambda *args: service)
+    client = TestClient(app)
+
+    for stream in (False, True):
+        response = client.post("/api/grok/image/batch", json={"prompts": ["one", "two"], "stream": stream})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
+
+    async def broken_batch(prompts, *args):
+        yield 0, GenerationResponse(success=True, file_path="/output/one.png", file_type=FileType.image)
+        raise RuntimeError("browser crashed")
+
+    service.generate_image_batch = broken_batch
+    response = client.post("/api/grok/image/batch", json={"prompts": ["one", "two"], "stream": True})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert lines[0]["index"] == 0 and lines[0]["success"]
+    assert "browser crashed" in lines[1]["error"]
+    print("✓ Batch endpoint sheds load with 429 and reports stream errors")
+
+
+def test_batch_endpoint_registered():
+    """Test that the batch endpoint is registered"""
+    routes = [route.path for route in app.routes]
+    assert '/api/grok/image/batch' in routes
+    print("✓ Batch endpoint registered")
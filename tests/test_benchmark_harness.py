@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the benchmark harness: the fake Grok site and the summary math
+"""
+
+import sys
+import os
+import re
+import json
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from config import config
+from services import warm_tabs
+from services.completion_detector import COMPLETION_PREDICATE
+from benchmarks.fake_grok_site import FakeGrokSite
+from benchmarks.run_benchmark import percentile, summarize
+
+
+def fetch(url, data=None):
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"} if data else {})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.headers.get("Content-Type"), response.read()
+
+
+def test_generation_page_has_the_driven_elements():
+    """Test that the fake generation page has what GrokService looks for"""
+    with FakeGrokSite() as site:
+        mime_type, body = fetch(f"{site.url}/generate/image")
+    page = body.decode("utf-8")
+
+    assert mime_type.startswith("text/html")
+    assert 'placeholder="Enter a prompt' in page
+    assert "#prompt-input" in warm_tabs.PROMPT_SELECTORS
+    assert 'id="prompt-input"' in page
+    assert 'id="generate-btn"' in page and "#generate-btn" in COMPLETION_PREDICATE
+    assert 'class="progress-bar"' in page and 'class="result-preview"' in page
+    print("✓ Fake generation page has prompt, button, progress bar and preview")
+
+
+def test_generate_api_and_assets_look_like_results():
+    """Test that jobs use the configured delay and assets pass the result filters"""
+    with FakeGrokSite(image_delay=0.5, video_delay=2.0, progress_steps=4) as site:
+        _, body = fetch(f"{site.url}/api/generate", json.dumps({"content_type": "video"}).encode())
+        job = json.loads(body)
+        assert job["delay"] == 2.0 and job["steps"] == 4
+
+        mime_type, asset = fetch(site.url + job["asset"])
+        assert mime_type == "video/mp4"
+        assert re.search(config.GROK_RESULT_URL_PATTERN, job["asset"])
+        assert len(asset) >= config.GROK_RESULT_MIN_BYTES
+
+        image_job = site.new_job("image")
+        mime_type, png = fetch(site.url + image_job["asset"])
+        assert mime_type == "image/png" and png.startswith(b"\x89PNG")
+        assert len(png) >= config.GROK_RESULT_MIN_BYTES
+
+        assert site.stats() == {"generations": {"image": 1, "video": 1}, "assets_served": 2}
+    print("✓ Fake jobs and assets look like real results")
+
+
+def test_percentiles_and_throughput():
+    """Test nearest-rank percentiles and jobs/sec of a level summary"""
+    latencies = [float(i) for i in range(1, 101)]
+    assert percentile(latencies, 50) == 50.0
+    assert percentile(latencies, 95) == 95.0
+    assert percentile(latencies, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) is None
+
+    summary = summarize(4, [1.0, 2.0, 3.0], failures=1, wall_seconds=2.0)
+    assert summary["jobs"] == 4 and summary["failed"] == 1
+    assert summary["p50"] == 2.0
+    assert summary["jobs_per_sec"] == pytest.approx(1.5)
+    print("✓ Percentiles and throughput are summarized per level")
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the process-wide browser pool
+
+The pool is exercised with lightweight fake browsers so the tests don't
+need a real Chromium installation.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from main import app
+from services.browser_pool import BrowserPool, PooledBrowser
+from services import warm_tabs
+from services.readiness import readiness_stats
+from services.page_scheduler import PageScheduler
+from services.session_registry import SessionRegistry, DEFAULT_SESSION_ID
+from utils.error_handling import BrowserError, QueueFullError
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.url = "about:blank"
+        self.gotos = 0
+        self.resets = 0
+        # Seconds the page takes to render its prompt input after goto
+        self.render_delay = 0
+        self.prompt_rendered = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        self.gotos += 1
+        self.wait_until = kwargs.get("wait_until")
+        self.url = url
+        self.prompt_rendered = False
+        asyncio.get_running_loop().call_later(self.render_delay, setattr, self, "prompt_rendered", True)
+
+    async def wait_for_selector(self, selector, **kwargs):
+        while not self.prompt_rendered:
+            await asyncio.sleep(0.01)
+
+    async def evaluate(self, script, *args):
+        self.resets += 1
+        return self.prompt_rendered
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def cookies(self):
+        return []
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeBrowserPool(BrowserPool):
+    """BrowserPool that launches fake browsers instead of Chromium"""
+
+    def __init__(self, pages_per_context=1, max_queue_size=4, **kwargs):
+        kwargs.setdefault("health_check_interval", 3600)
+        kwargs.setdefault("scheduler", PageScheduler(pages_per_context, max_queue_size))
+        kwargs.setdefault("registry", SessionRegistry(tempfile.mkdtemp()))
+        kwargs.setdefault("warm_tab_types", [])
+        super().__init__(**kwargs)
+        self.launched = 0
+
+    async def start(self):
+        self._closed = False
+        await self._ensure_min_size()
+
+    async def _launch(self, session_id=DEFAULT_SESSION_ID):
+        self.launched += 1
+        return PooledBrowser(FakeBrowser(), FakeContext(), self._generation, session_id)
+
+
+def test_pool_starts_min_size():
+    """Test that the pool launches min_size warm browsers on start"""
+    async def run():
+        pool = FakeBrowserPool(min_size=2, max_size=4)
+        await pool.start()
+        stats = pool.stats()
+        assert stats["size"] == 2
+        assert stats["idle"] == 2
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool starts with min_size warm browsers")
+
+
+def test_pool_reuses_warm_browser():
+    """Test that sequential leases reuse the same warm browser"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=2)
+        await pool.start()
+
+        async with pool.lease() as page:
+            first_page = page
+        async with pool.lease() as page:
+            assert page is not first_page
+
+        assert first_page.closed
+        assert pool.launched == 1
+        assert pool.stats()["size"] == 1
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool reuses warm browsers between leases")
+
+
+def test_pool_respects_max_size():
+    """Test that the pool never grows beyond max_size and times out waiting"""
+    async def run():
+        pool = FakeBrowserPool(min_size=0, max_size=1, acquire_timeout=0.1)
+        await pool.start()
+
+        async with pool.lease():
+            with pytest.raises(BrowserError):
+                async with pool.lease():
+                    pass
+
+        assert pool.launched == 1
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool respects max_size")
+
+
+def test_pool_shares_context_between_pages():
+    """Test that one context hosts several concurrent pages up to its cap"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=2, pages_per_context=2)
+        await pool.start()
+
+        async with pool.lease():
+            async with pool.lease():
+                assert pool.stats()["scheduler"]["active_pages"] == 2
+
+        assert pool.launched == 1
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool shares a context between concurrent pages")
+
+
+def test_pool_rejects_when_queue_full():
+    """Test that the pool applies backpressure once the queue is full"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=1, max_queue_size=1)
+        await pool.start()
+
+        async def hold():
+            async with pool.lease():
+                await asyncio.sleep(0.05)
+
+        async with pool.lease():
+            waiter = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            with pytest.raises(QueueFullError) as exc_info:
+                async with pool.lease():
+                    pass
+            assert exc_info.value.retry_after >= 1
+
+        await waiter
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool rejects requests when the queue is full")
+
+
+def test_pool_fails_waiters_when_launch_fails():
+    """Test that queued requests get the launch error, and further requests don't relaunch during backoff"""
+    class FailingPool(FakeBrowserPool):
+        async def _launch(self, session_id=DEFAULT_SESSION_ID):
+            self.launched += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("Executable doesn't exist")
+
+    async def run():
+        pool = FailingPool(min_size=0, max_size=2, acquire_timeout=30)
+        await pool.start()
+
+        started = asyncio.get_running_loop().time()
+        with pytest.raises(BrowserError, match="Executable doesn't exist"):
+            async with pool.lease():
+                pass
+        assert asyncio.get_running_loop().time() - started < 5
+        assert pool.launched == 1
+
+        with pytest.raises(BrowserError, match="Executable doesn't exist"):
+            async with pool.lease():
+                pass
+        assert pool.launched == 1
+        assert pool.stats()["launch_failures"] == 1
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool fails queued requests with the launch error and backs off")
+
+
+def test_pool_evicts_idle_browsers():
+    """Test that idle browsers above min_size are evicted"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=3, idle_timeout=0)
+        await pool.start()
+
+        async with pool.lease():
+            async with pool.lease():
+                pass
+
+        assert pool.stats()["size"] == 2
+        await pool._evict_idle()
+        assert pool.stats()["size"] == 1
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool evicts idle browsers above min_size")
+
+
+def test_pool_drops_unhealthy_browsers():
+    """Test that disconnected browsers are replaced"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=2)
+        await pool.start()
+        pool._entries[0].browser.connected = False
+
+        await pool._check_health()
+        assert pool.stats()["size"] == 0
+
+        await pool._ensure_min_size()
+        assert pool.stats()["size"] == 1
+        assert pool.launched == 2
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool replaces unhealthy browsers")
+
+
+def test_pool_invalidate_recycles_leased_browsers():
+    """Test that invalidate() recycles browsers, including leased ones on release"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=2)
+        await pool.start()
+
+        async with pool.lease():
+            await pool.invalidate()
+            # The leased browser stays until release, plus a new warm one
+            assert pool.stats()["size"] == 2
+
+        assert pool.stats()["size"] == 1
+        assert pool._entries[0].generation == pool._generation
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool invalidate recycles stale browsers")
+
+
+def test_pool_spreads_browsers_across_accounts():
+    """Test that each registered account gets a warm browser and its share of pages"""
+    async def run():
+        registry = SessionRegistry(tempfile.mkdtemp())
+        registry.add([{"name": "sso", "value": "a", "domain": ".grok.com"}], session_id="team-a")
+        registry.add([{"name": "sso", "value": "b", "domain": ".grok.com"}], session_id="team-b")
+
+        pool = FakeBrowserPool(min_size=1, max_size=4, registry=registry)
+        await pool.start()
+        sessions = pool.stats()["sessions"]
+        assert set(sessions) == {"team-a", "team-b"}
+
+        async with pool.lease():
+            async with pool.lease():
+                sessions = pool.stats()["sessions"]
+                assert sessions["team-a"]["active_pages"] == 1
+                assert sessions["team-b"]["active_pages"] == 1
+
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool spreads work across registered accounts")
+
+
+def test_pool_reuses_warm_tabs():
+    """Test that content type leases get parked tabs that are reset, not reloaded"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=1, warm_tab_types=["image", "video"])
+        await pool.start()
+        context = pool._entries[0].context
+        assert len(context.pages) == 2
+
+        async with pool.lease("image") as page:
+            first_page = page
+            assert page.url.endswith("/generate/image")
+        async with pool.lease("image") as page:
+            assert page is first_page
+
+        # Parked once on launch, reset after each job, never navigated again
+        assert first_page.gotos == 1
+        assert first_page.resets == 3
+        assert not first_page.closed
+        assert len(context.pages) == 2
+
+        warm = pool.stats()["warm_tabs"]
+        assert warm["hits"] == 2
+        assert warm["parked"] == 2
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool reuses warm generation tabs")
+
+
+def test_park_waits_for_prompt_to_render():
+    """Test that parking waits for the SPA to render the prompt before resetting"""
+    async def run():
+        page = FakePage()
+        page.render_delay = 0.05
+        assert await warm_tabs.park(page, "image")
+        assert page.resets == 1
+        assert page.url.endswith("/generate/image")
+        assert page.wait_until == "domcontentloaded"
+        assert readiness_stats.snapshot()["warm_tabs.park"]["conditions"]["selector"] >= 1
+
+    asyncio.run(run())
+    print("✓ Parking waits for the prompt input")
+
+
+def test_pool_discards_warm_tab_that_fails_reset():
+    """Test that a tab which can't be reset is closed instead of parked"""
+    async def run():
+        pool = FakeBrowserPool(min_size=1, max_size=1, warm_tab_types=["image"])
+        await pool.start()
+
+        async with pool.lease("image") as page:
+            page.url = "https://grok.com/some/other/page"
+
+            async def broken(script, *args):
+                raise RuntimeError("page crashed")
+            page.evaluate = broken
+
+        assert page.closed
+        warm = pool.stats()["warm_tabs"]
+        assert warm["parked"] == 0
+        assert warm["resets_failed"] == 1
+
+        async with pool.lease("image") as page:
+            assert pool.stats()["warm_tabs"]["misses"] == 1
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✓ Browser pool discards warm tabs that fail to reset")
+
+
+def test_pool_status_endpoint_registered():
+    """Test that the pool status endpoint is registered"""
+    routes = [route.path for route in app.routes]
+    assert '/api/grok/pool' in routes
+    print("✓ Browser pool status endpoint registered")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Unit tests for BrowserUtils selector racing
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.browser_utils import BrowserUtils
+
+
+class FakePage:
+    """Page whose selectors appear after a fixed delay, or never"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.cancelled = []
+
+    async def wait_for_selector(self, selector, timeout=30000, state="visible"):
+        delay = self.delays.get(selector)
+        try:
+            if delay is None or delay * 1000 > timeout:
+                await asyncio.sleep(timeout / 1000)
+                raise TimeoutError(f"Timeout waiting for {selector}")
+            await asyncio.sleep(delay)
+            return f"element:{selector}"
+        except asyncio.CancelledError:
+            self.cancelled.append(selector)
+            raise
+
+
+def test_race_returns_first_match():
+    """Test that the fastest selector wins and the others are cancelled"""
+    async def run():
+        page = FakePage({"#slow": 0.5, "#fast": 0.01})
+        selector, element = await BrowserUtils.race_selectors(page, ["#missing", "#slow", "#fast"], timeout=2000)
+        assert selector == "#fast"
+        assert element == "element:#fast"
+        await asyncio.sleep(0)
+        assert set(page.cancelled) == {"#missing", "#slow"}
+
+    asyncio.run(run())
+    print("✓ Selector race returns the first match")
+
+
+def test_race_prefers_earlier_selector_on_tie():
+    """Test that list order breaks ties between selectors already present"""
+    async def run():
+        page = FakePage({"#a": 0, "#b": 0})
+        selector, _ = await BrowserUtils.race_selectors(page, ["#b", "#a"], timeout=1000)
+        assert selector == "#b"
+
+    asyncio.run(run())
+    print("✓ Selector race prefers earlier selectors on ties")
+
+
+def test_race_times_out_once():
+    """Test that all selectors share one timeout instead of adding up"""
+    async def run():
+        page = FakePage({})
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        element = await BrowserUtils.wait_for_element(page, ["#a", "#b", "#c", "#d"], timeout=100)
+        assert element is None
+        assert loop.time() - started < 0.3
+
+    asyncio.run(run())
+    print("✓ Selector race times out once for all selectors")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the per-profile context cache used by SessionManager.get_page
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.context_cache import ContextCache, CachedContext
+
+
+class FakePage:
+    def __init__(self):
+        self.navigations = 0
+        self.closed = False
+
+    async def goto(self, url, **kwargs):
+        self.navigations += 1
+
+    async def wait_for_selector(self, selector, **kwargs):
+        return object()
+
+    async def wait_for_url(self, url, **kwargs):
+        await asyncio.sleep(3600)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.closed = False
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+        self.handlers["close"]()
+
+
+def _factory(created):
+    async def create():
+        created.append(1)
+        await asyncio.sleep(0)
+        return CachedContext("profile", FakeContext())
+    return create
+
+
+def test_context_created_once_per_profile():
+    """Test that concurrent and repeated lookups share one context"""
+    async def run():
+        cache = ContextCache()
+        created = []
+        entries = await asyncio.gather(*(cache.get("profile", _factory(created)) for _ in range(3)))
+        assert len(created) == 1
+        assert entries[0] is entries[1] is entries[2]
+        assert await cache.get("profile", _factory(created)) is entries[0]
+        await cache.close_all()
+
+    asyncio.run(run())
+    print("✓ Context cache creates one context per profile")
+
+
+def test_home_page_navigated_once():
+    """Test that leases reuse the navigated home page and open extra pages when busy"""
+    async def run():
+        cache = ContextCache()
+        entry = await cache.get("profile", _factory([]))
+
+        async with cache.lease(entry) as page:
+            home = page
+            async with cache.lease(entry) as other:
+                assert other is not home
+            assert other.closed
+        async with cache.lease(entry) as page:
+            assert page is home
+
+        assert home.navigations == 1
+        await cache.close_all()
+
+    asyncio.run(run())
+    print("✓ Home page is navigated once and reused")
+
+
+def test_stale_context_recreated():
+    """Test that a closed context or newer source version triggers a rebuild"""
+    async def run():
+        cache = ContextCache()
+        created = []
+        first = await cache.get("profile", _factory(created), source_version=1.0)
+        second = await cache.get("profile", _factory(created), source_version=2.0)
+        assert second is not first
+        assert first.context.closed
+
+        await second.context.close()
+        third = await cache.get("profile", _factory(created), source_version=2.0)
+        assert third is not second
+        assert len(created) == 3
+        await cache.close_all()
+
+    asyncio.run(run())
+    print("✓ Stale cached contexts are recreated")
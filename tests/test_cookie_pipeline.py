@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared cookie normalization pipeline
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from services.cookie_pipeline import CookieRecord, normalize_jar, playwright_cookies
+from services.enhanced_cookie_injector import EnhancedCookieInjector
+from services.cookie_extractor import GrokCookieExtractor
+
+NOW = 1_800_000_000.0
+
+
+def cookie(**fields):
+    base = {"name": "sso", "value": "abc", "domain": ".grok.com", "path": "/"}
+    base.update(fields)
+    return base
+
+
+def test_expiry_is_normalized_and_filtered():
+    """Test ms -> s conversion, session cookies and dropping expired cookies"""
+    records = normalize_jar([
+        cookie(name="ms", expires=(NOW + 60) * 1000),
+        cookie(name="session", expires=-1),
+        cookie(name="unparsable", expires="soon"),
+        cookie(name="expired", expires=NOW - 60),
+    ], NOW)
+
+    assert [r.name for r in records] == ["ms", "session", "unparsable"]
+    assert records[0].expires == NOW + 60
+    assert records[1].expires is None and records[2].expires is None
+    assert "expires" not in records[1].to_playwright()
+    assert records[1].to_export()["expires"] == -1
+    print("✓ Expiry is converted to seconds and expired cookies are dropped")
+
+
+def test_domains_and_same_site():
+    """Test domain spellings and sameSite mapping, including the Secure requirement"""
+    cookies = playwright_cookies([
+        cookie(name="a", domain="  .GROK.com "),
+        cookie(name="b", domain="www.grok.com"),
+        cookie(name="c", domain="accounts.x.ai", sameSite="no_restriction", secure=False),
+        cookie(name="d", sameSite="unspecified"),
+        cookie(name="e", sameSite="bogus", httpOnly=1),
+        cookie(name="f", domain=""),
+        cookie(name="g", value=""),
+    ], NOW)
+
+    by_name = {c["name"]: c for c in cookies}
+    assert set(by_name) == {"a", "b", "c", "d", "e"}
+    assert by_name["a"]["domain"] == ".grok.com"
+    assert by_name["b"]["domain"] == ".www.grok.com"
+    assert by_name["c"]["domain"] == "accounts.x.ai"
+    assert by_name["c"]["sameSite"] == "None" and by_name["c"]["secure"] is True
+    assert by_name["d"]["sameSite"] == "Lax"
+    assert "sameSite" not in by_name["e"] and by_name["e"]["httpOnly"] is True
+    print("✓ Domains and sameSite are normalized")
+
+
+def test_validate_cookie_reports_issues():
+    """Test that validate_cookie keeps its report format on top of the pipeline"""
+    result = EnhancedCookieInjector.validate_cookie(cookie(expires=4_102_444_800_000, sameSite="lax"), 3)
+    assert result["valid"] and result["index"] == 3
+    assert result["fixed"]["expires"] == 4_102_444_800.0
+    assert result["fixed"]["sameSite"] == "Lax"
+    assert "Divided expires by 1000 (ms -> s)" in result["fixes"]
+    assert "Normalized sameSite to Lax" in result["fixes"]
+
+    result = EnhancedCookieInjector.validate_cookie({"name": "x", "value": "", "domain": "", "expires": 1.0})
+    assert not result["valid"] and result["fixed"] is None
+    assert result["errors"][0] == "Missing or empty required field: 'value'"
+    assert "Missing domain field" in result["errors"]
+    assert any(e.startswith("Cookie expired") for e in result["errors"])
+    print("✓ validate_cookie reports errors, warnings and fixes")
+
+
+def test_fast_path_matches_report_path():
+    """Test that the jar fast path and validate_cookie agree on every cookie"""
+    jar = [
+        cookie(name=f"c{i}", domain=domain, sameSite=same_site, secure=bool(i % 2), expires=expires)
+        for i, (domain, same_site, expires) in enumerate([
+            ("grok.com", "Strict", None),
+            ("api.x.ai", "none", 4_102_444_800),
+            (".x.ai", None, 4_102_444_800_000),
+            ("grok.com", "Lax", 1.0),
+        ])
+    ]
+    fast = playwright_cookies(jar)
+    reported = [r["fixed"] for r in map(EnhancedCookieInjector.validate_cookie, jar) if r["valid"]]
+    assert fast == reported
+    print("✓ Fast path and report path agree")
+
+
+def test_records_are_slotted():
+    """Test that records stay compact"""
+    record = normalize_jar([cookie()], NOW)[0]
+    assert record == CookieRecord("sso", "abc", ".grok.com")
+    with pytest.raises(AttributeError):
+        record.extra = 1
+    print("✓ Cookie records use __slots__")
+
+
+def test_extractor_exports_normalized_cookies():
+    """Test that extracted cookies go through the same pipeline"""
+    class Context:
+        async def cookies(self):
+            return [
+                {"name": "sso", "value": "abc", "domain": "grok.com", "path": "/", "expires": -1,
+                 "httpOnly": True, "secure": True, "sameSite": "Lax"},
+                {"name": "empty", "value": "", "domain": "grok.com", "path": "/", "expires": -1},
+            ]
+
+    extractor = GrokCookieExtractor()
+    extractor.context = Context()
+    cookies = asyncio.run(extractor._extract_all_cookies())
+    assert cookies == [{
+        "name": "sso", "value": "abc", "domain": "grok.com", "path": "/", "expires": -1,
+        "httpOnly": True, "secure": True, "sameSite": "Lax",
+    }]
+    print("✓ Extracted cookies are normalized")
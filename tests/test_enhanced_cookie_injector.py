@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batched cookie injection
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.enhanced_cookie_injector import EnhancedCookieInjector
+
+
+class FakeContext:
+    """Context that rejects any batch containing a cookie named 'bad*'"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cookies = {}
+
+    async def add_cookies(self, cookies):
+        self.calls += 1
+        for cookie in cookies:
+            if cookie["name"].startswith("bad"):
+                raise Exception("Invalid cookie fields")
+        for cookie in cookies:
+            self.cookies[cookie["name"]] = cookie
+
+
+def _cookies(names):
+    return [
+        {"name": name, "value": "v", "domain": ".grok.com", "path": "/", "secure": True}
+        for name in names
+    ]
+
+
+def test_batch_injects_in_one_call():
+    """Test that a clean batch costs a single add_cookies call"""
+    context = FakeContext()
+    outcomes = asyncio.run(EnhancedCookieInjector.inject_cookie_batch(context, _cookies(f"c{i}" for i in range(100))))
+    assert outcomes == [(True, None)] * 100
+    assert context.calls == 1
+    print("✓ Batch injection uses one call")
+
+
+def test_batch_bisects_to_find_bad_cookies():
+    """Test that a failing batch is bisected and bad cookies are reported individually"""
+    context = FakeContext()
+    names = [f"c{i}" for i in range(16)]
+    names[5] = "bad5"
+    names[12] = "bad12"
+
+    outcomes = asyncio.run(EnhancedCookieInjector.inject_cookie_batch(context, _cookies(names)))
+    failed = [name for name, (success, _) in zip(names, outcomes) if not success]
+    assert failed == ["bad5", "bad12"]
+    assert outcomes[5][1].startswith("Browser rejected cookie")
+    assert len(context.cookies) == 14
+    assert context.calls < 16
+    print("✓ Batch injection bisects to the bad cookies")
+
+
+def test_report_format_unchanged():
+    """Test that the injection report keeps its per-cookie format in batch mode"""
+    context = FakeContext()
+    report = asyncio.run(EnhancedCookieInjector.inject_cookies_with_report(
+        context, _cookies(["a", "bad", "b"])
+    ))
+    assert report["cookies_processed"] == 3
+    assert report["cookies_injected"] == 2
+    assert report["cookies_failed"] == 1
+    print("✓ Injection report format is unchanged")
+
+
+def test_report_does_not_visit_cookie_domains():
+    """Test that injection no longer primes the cookie store by navigating to each domain"""
+    class FakePage:
+        url = "https://grok.com/"
+        gotos = 0
+
+        async def goto(self, url, **kwargs):
+            FakePage.gotos += 1
+
+    context = FakeContext()
+    report = asyncio.run(EnhancedCookieInjector.inject_cookies_with_report(
+        context, _cookies(["a", "b"]), initial_page=FakePage()
+    ))
+    assert report["cookies_injected"] == 2
+    assert FakePage.gotos == 0
+    print("✓ Injection does not navigate to cookie domains")
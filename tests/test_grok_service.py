@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Unit tests for GrokService helpers that don't need a browser
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.grok_service import GrokService
+from services.completion_detector import CompletionStats, is_result_response
+from config import config
+from services.media_capture import save_response, extension_for, is_partial_response
+
+
+def test_parse_progress_percent():
+    """Test that progress bar text is turned into a percentage"""
+    assert GrokService._parse_progress_percent("45%") == 45.0
+    assert GrokService._parse_progress_percent("Generating... 12.5 %") == 12.5
+    assert GrokService._parse_progress_percent("250%") == 100.0
+    assert GrokService._parse_progress_percent("Complete") is None
+    assert GrokService._parse_progress_percent(None) is None
+    print("✓ Progress bar text is parsed into a percentage")
+
+
+def test_completion_stats_estimate_saved_latency():
+    """Test that detections are counted and latency saved vs 2s polling is estimated"""
+    stats = CompletionStats()
+    stats.record("network", 5.5)
+    stats.record("mutation", 4.0)
+    stats.record(None, 300.0)
+
+    snapshot = stats.snapshot()
+    assert snapshot["detections"] == {"network": 1, "mutation": 1}
+    assert snapshot["timeouts"] == 1
+    # 5.5s would be seen at the 6s tick, 4.0s at the 6s tick as well
+    assert snapshot["estimated_saved_seconds"] == 2.5
+    assert snapshot["avg_saved_seconds"] == 1.25
+    print("✓ Completion stats estimate latency saved vs polling")
+
+
+def test_is_result_response_filters_media():
+    """Test that only sizeable generated media responses count as results"""
+    class FakeResponse:
+        def __init__(self, url, content_type, length, ok=True):
+            self.url = url
+            self.ok = ok
+            self.headers = {"content-type": content_type, "content-length": str(length)}
+
+    assert is_result_response(FakeResponse("https://grok.com/generated/a.png", "image/png", 500000))
+    assert is_result_response(FakeResponse("https://assets.grok.com/v/1.mp4", "video/mp4", 5000000))
+    assert not is_result_response(FakeResponse("https://grok.com/generated/a.png", "image/png", 100))
+    assert not is_result_response(FakeResponse("https://grok.com/api/status", "application/json", 500000))
+    assert not is_result_response(FakeResponse("https://grok.com/generated/a.png", "image/png", 500000, ok=False))
+    print("✓ Result responses are recognised by type, URL and size")
+
+
+def test_save_captured_response():
+    """Test that a captured response body is written to disk without a download"""
+    class FakeResponse:
+        url = "https://grok.com/generated/a.webp"
+        status = 200
+        headers = {"content-type": "image/webp", "content-length": "9"}
+
+        async def body(self):
+            return b"webp-body"
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir) / f"grok_image{extension_for('image/webp', '.png')}"
+        mode = asyncio.run(save_response(FakeResponse(), file_path))
+
+        assert mode == "buffered"
+        assert file_path.read_bytes() == b"webp-body"
+        assert not (Path(tmpdir) / "grok_image.webp.part").exists()
+
+    assert extension_for("video/mp4; codecs=avc1", ".bin") == ".mp4"
+    assert extension_for("application/octet-stream", ".png") == ".png"
+    print("✓ Captured responses are saved straight to disk")
+
+
+def test_partial_response_is_fetched_in_ranges_through_browser_context():
+    """Test that a 206 capture is not saved as is but fetched whole, chunk by chunk, inside the browser context"""
+    video = bytes(range(256)) * 40
+    calls = []
+
+    class FakeAPIResponse:
+        def __init__(self, status, body, headers):
+            self.status = status
+            self.headers = headers
+            self._body = body
+
+        async def body(self):
+            return self._body
+
+        async def dispose(self):
+            pass
+
+    class FakeRequestContext:
+        async def get(self, url, headers=None, **kwargs):
+            calls.append(headers)
+            first, last = (int(n) for n in headers["range"].split("=")[1].split("-"))
+            last = min(last, len(video) - 1)
+            return FakeAPIResponse(206, video[first:last + 1], {"content-range": f"bytes {first}-{last}/{len(video)}"})
+
+    class FakeRequest:
+        async def all_headers(self):
+            return {"cookie": "sso=1", "referer": "https://grok.com/", "range": "bytes=0-"}
+
+    class FakePartialResponse:
+        url = "https://assets.grok.com/generated/v.mp4"
+        status = 206
+        headers = {"content-type": "video/mp4", "content-range": f"bytes 0-1023/{len(video)}"}
+        request = FakeRequest()
+
+        def __init__(self):
+            context = type("FakeContext", (), {"request": FakeRequestContext()})()
+            self.frame = type("FakeFrame", (), {"page": type("FakePage", (), {"context": context})()})()
+
+        async def body(self):
+            raise AssertionError("a partial body must not be saved")
+
+    chunk_bytes = config.GROK_CAPTURE_CHUNK_BYTES
+    config.GROK_CAPTURE_CHUNK_BYTES = 4096
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_path = Path(tmpdir) / "grok_video.mp4"
+            assert asyncio.run(save_response(FakePartialResponse(), file_path)) == "chunked"
+            assert file_path.read_bytes() == video
+    finally:
+        config.GROK_CAPTURE_CHUNK_BYTES = chunk_bytes
+
+    assert [h["range"] for h in calls] == ["bytes=0-4095", "bytes=4096-8191", "bytes=8192-12287"]
+    # The context sends its own cookies
+    assert all("cookie" not in h and h["referer"] == "https://grok.com/" for h in calls)
+
+    complete = FakePartialResponse()
+    complete.headers = {"content-range": "bytes 0-9/10"}
+    assert not is_partial_response(complete)
+    print("✓ Partial results are fetched whole in ranges through the browser context")
+
+
+def test_detector_records_baseline_when_armed():
+    """Test that arming records what the page shows before the click, so a reused tab's old result is ignored"""
+    from services.completion_detector import CompletionDetector, BASELINE_SCRIPT, COMPLETION_PREDICATE
+
+    class FakePage:
+        def __init__(self):
+            self.scripts = []
+
+        def on(self, event, handler):
+            pass
+
+        async def expose_function(self, name, func):
+            pass
+
+        async def evaluate(self, script, *args):
+            self.scripts.append(script)
+
+    page = FakePage()
+    detector = CompletionDetector(page)
+    asyncio.run(detector.arm())
+    assert page.scripts == [BASELINE_SCRIPT]
+    assert "__grokCompletionState" in COMPLETION_PREDICATE and "busySeen" in COMPLETION_PREDICATE
+    print("✓ Completion detector records a baseline when armed")
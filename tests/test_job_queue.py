@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the asynchronous generation job queue and its endpoints
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.response_models import JobStatus
+from services.job_queue import JobStore, GenerationJobQueue, set_job_queue
+from utils.error_handling import QueueFullError
+
+
+def test_job_store_persists_jobs():
+    """Test that saved jobs are written to disk and can be reloaded"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = JobStore(tmpdir)
+        store.save({"job_id": "abc", "status": "queued", "created_at": "2024-01-01T00:00:00"})
+
+        with open(os.path.join(tmpdir, "abc.json")) as f:
+            assert json.load(f)["status"] == "queued"
+
+        reloaded = JobStore(tmpdir)
+        jobs = reloaded.load()
+        assert len(jobs) == 1
+        assert reloaded.get("abc")["status"] == "queued"
+
+    print("✓ JobStore persists jobs to disk")
+
+
+def test_job_store_prunes_finished_jobs():
+    """Test that only max_retained finished jobs are kept"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = JobStore(tmpdir)
+        for i in range(3):
+            store.save({
+                "job_id": f"done-{i}",
+                "status": "completed",
+                "created_at": f"2024-01-0{i + 1}T00:00:00",
+                "finished_at": f"2024-01-0{i + 1}T00:00:00",
+            })
+        store.save({"job_id": "pending", "status": "queued", "created_at": "2024-01-01T00:00:00"})
+
+        store.prune(1)
+
+        assert store.get("done-2") is not None
+        assert store.get("done-0") is None
+        assert store.get("pending") is not None
+        assert not os.path.exists(os.path.join(tmpdir, "done-0.json"))
+
+    print("✓ JobStore prunes the oldest finished jobs")
+
+
+def test_job_queue_submit_and_backpressure():
+    """Test that submit queues jobs and rejects them once the queue is full"""
+    async def run():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = GenerationJobQueue(JobStore(tmpdir), workers=0, max_queue_size=1)
+            job = queue.submit("image", "a cat", 300)
+            assert job["status"] == JobStatus.queued.value
+            assert queue.get(job["job_id"]) is job
+
+            with pytest.raises(QueueFullError):
+                queue.submit("image", "a dog", 300)
+
+    asyncio.run(run())
+    print("✓ Job queue submits jobs and applies backpressure")
+
+
+def test_job_queue_recovers_after_restart():
+    """Test that queued jobs are resumed and running jobs marked failed on start"""
+    async def run():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = JobStore(tmpdir)
+            store.save({"job_id": "q", "status": "queued", "progress": 0.0, "created_at": "2024-01-01T00:00:00"})
+            store.save({"job_id": "r", "status": "running", "progress": 0.5, "created_at": "2024-01-01T00:00:01"})
+
+            queue = GenerationJobQueue(JobStore(tmpdir), workers=0)
+            await queue.start()
+
+            assert queue.get("r")["status"] == JobStatus.failed.value
+            assert "restart" in queue.get("r")["error_message"]
+            assert queue.get("q")["status"] == JobStatus.queued.value
+            assert queue.stats()["queued"] == 1
+            await queue.stop()
+
+    asyncio.run(run())
+    print("✓ Job queue recovers persisted jobs after a restart")
+
+
+def test_job_endpoints():
+    """Test polling a job and downloading its result over HTTP"""
+    async def make_queue(tmpdir):
+        return GenerationJobQueue(JobStore(tmpdir), workers=0)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result_path = os.path.join(tmpdir, "result.png")
+        with open(result_path, "wb") as f:
+            f.write(b"png-bytes")
+
+        queue = asyncio.run(make_queue(tmpdir))
+        queue.store.save({
+            "job_id": "done",
+            "content_type": "image",
+            "status": "completed",
+            "stage": "completed",
+            "progress": 1.0,
+            "created_at": "2024-01-01T00:00:00",
+            "file_path": result_path,
+            "file_type": "image",
+        })
+        set_job_queue(queue)
+
+        try:
+            client = TestClient(app)
+            response = client.get("/api/grok/jobs/done")
+            assert response.status_code == 200
+            assert response.json()["status"] == "completed"
+            assert response.json()["file_path"] == result_path
+
+            response = client.get("/api/grok/jobs/done/result")
+            assert response.status_code == 200
+            assert response.content == b"png-bytes"
+
+            response = client.get("/api/grok/jobs/missing")
+            assert response.status_code == 404
+        finally:
+            set_job_queue(None)
+
+    print("✓ Job status and result endpoints work")
+
+
+def test_job_queue_publishes_progress_events():
+    """Test that subscribers receive progress and final events"""
+    async def run():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = GenerationJobQueue(JobStore(tmpdir), workers=0)
+            job = queue.submit("image", "a cat", 300)
+            events = queue.subscribe(job["job_id"])
+
+            queue.update_progress(job, "generating", 0.5)
+            queue._finish(job, JobStatus.completed, file_path="/tmp/cat.png", file_type="image")
+
+            first = events.get_nowait()
+            assert first["event"] == "progress"
+            assert first["progress"] == 0.5
+
+            last = events.get_nowait()
+            assert last["event"] == "completed"
+            assert last["file_path"] == "/tmp/cat.png"
+
+            queue.unsubscribe(job["job_id"], events)
+            assert queue.stats()["subscribers"] == 0
+
+    asyncio.run(run())
+    print("✓ Job queue publishes progress events to subscribers")
+
+
+def test_job_progress_is_persisted_sparingly_off_the_loop():
+    """Test that progress reaches subscribers at once but the job file only per stage"""
+    async def run():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = GenerationJobQueue(JobStore(tmpdir), workers=0)
+            job = queue.submit("image", "a cat", 300)
+            events = queue.subscribe(job["job_id"])
+
+            writes = []
+            write = queue.store._write
+            queue.store._write = lambda snapshot: (writes.append(snapshot["stage"]), write(snapshot))
+
+            for i in range(1, 21):
+                queue.update_progress(job, "generating", i / 20)
+            queue._finish(job, JobStatus.completed, file_path="/tmp/cat.png", file_type="image")
+            await queue.store.flush()
+
+            assert events.qsize() == 21
+            # The first update of the stage and the final state; the rest coalesced
+            assert 1 <= len(writes) <= 3 and writes[-1] == "completed"
+            with open(os.path.join(tmpdir, f"{job['job_id']}.json")) as f:
+                assert json.load(f)["status"] == JobStatus.completed.value
+
+    asyncio.run(run())
+    print("✓ Job progress is persisted per stage from a worker thread")
+
+
+def test_job_events_stream():
+    """Test that the SSE endpoint streams the final state of a finished job"""
+    async def make_queue(tmpdir):
+        return GenerationJobQueue(JobStore(tmpdir), workers=0)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        queue = asyncio.run(make_queue(tmpdir))
+        queue.store.save({
+            "job_id": "failed-job",
+            "content_type": "video",
+            "status": "failed",
+            "stage": "failed",
+            "progress": 0.3,
+            "created_at": "2024-01-01T00:00:00",
+            "error_message": "Generation timed out",
+        })
+        set_job_queue(queue)
+
+        try:
+            client = TestClient(app)
+            response = client.get("/api/grok/jobs/failed-job/events")
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert "event: failed" in response.text
+            assert "Generation timed out" in response.text
+        finally:
+            set_job_queue(None)
+
+    print("✓ Job events endpoint streams Server-Sent Events")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the single-pass login state probe
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.login_probe import probe_login_state
+
+
+class FakePage:
+    def __init__(self, url, indicators=(), login_buttons=()):
+        self.url = url
+        self.evaluations = 0
+        self.result = {
+            "indicators": list(indicators),
+            "loginButtons": list(login_buttons),
+            "readyState": "complete",
+        }
+
+    async def evaluate(self, script, arg=None):
+        self.evaluations += 1
+        return self.result
+
+
+class FakeContext:
+    def __init__(self, cookie_names=()):
+        self.cookie_names = cookie_names
+
+    async def cookies(self):
+        return [{"name": name, "value": "x"} for name in self.cookie_names]
+
+
+def probe(page, context):
+    return asyncio.run(probe_login_state(page, context))
+
+
+def test_probe_detects_logged_in_ui():
+    """Test that a Grok page with chat elements is judged logged in in one pass"""
+    page = FakePage("https://grok.com/chat", indicators=["textarea", "nav"])
+    verdict = probe(page, FakeContext(["sso"]))
+    assert verdict["logged_in"] is True
+    assert verdict["reason"] == "ui_indicator"
+    assert verdict["indicators"] == ["textarea", "nav"]
+    assert page.evaluations == 1
+    print("✓ Login probe detects logged-in UI")
+
+
+def test_probe_rejects_auth_pages_and_login_buttons():
+    """Test that auth URLs and visible login buttons mean logged out"""
+    verdict = probe(FakePage("https://accounts.x.ai/sign-in"), FakeContext(["auth_token"]))
+    assert verdict["logged_in"] is False
+    assert verdict["reason"] == "auth_page"
+
+    verdict = probe(FakePage("https://x.ai/", login_buttons=["Sign in"]), FakeContext(["auth_token"]))
+    assert verdict["logged_in"] is False
+    assert verdict["reason"] == "login_button"
+    print("✓ Login probe rejects auth pages and login buttons")
+
+
+def test_probe_falls_back_to_cookies():
+    """Test that session cookies decide when the UI is inconclusive"""
+    verdict = probe(FakePage("https://x.ai/"), FakeContext(["auth_token", "other"]))
+    assert verdict["logged_in"] is True
+    assert verdict["reason"] == "session_cookies"
+    assert verdict["session_cookies"] == ["auth_token"]
+
+    verdict = probe(FakePage("https://x.ai/"), FakeContext([]))
+    assert verdict["logged_in"] is False
+    assert verdict["reason"] == "no_indicators"
+    print("✓ Login probe falls back to cookies")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Prometheus-style metrics and the /metrics endpoint
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from services.metrics import Counter, Histogram, MetricsRegistry, generation_phase_seconds
+from services.enhanced_cookie_injector import EnhancedCookieInjector
+from services.metrics import cookie_injection_seconds, cookies_injected_total
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that histograms render cumulative buckets, sum and count per label set"""
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("phase_seconds", "Phase time", ["phase"], buckets=(1, 5)))
+    histogram.observe(0.5, phase="fill")
+    histogram.observe(3, phase="fill")
+    histogram.observe(30, phase="fill")
+
+    text = registry.render()
+    assert "# TYPE phase_seconds histogram" in text
+    assert 'phase_seconds_bucket{phase="fill",le="1"} 1' in text
+    assert 'phase_seconds_bucket{phase="fill",le="5"} 2' in text
+    assert 'phase_seconds_bucket{phase="fill",le="+Inf"} 3' in text
+    assert 'phase_seconds_sum{phase="fill"} 33.5' in text
+    assert 'phase_seconds_count{phase="fill"} 3' in text
+    print("✓ Histograms render cumulative buckets")
+
+
+def test_counter_checks_labels():
+    """Test that counters add up per label set and reject wrong labels"""
+    counter = Counter("jobs_total", "Jobs", ["outcome"])
+    counter.inc(outcome="success")
+    counter.inc(2, outcome="success")
+    assert counter.value(outcome="success") == 3
+    with pytest.raises(ValueError):
+        counter.inc(status="success")
+    print("✓ Counters add up per label set")
+
+
+def test_cookie_injection_is_measured():
+    """Test that a batch injection records its duration and outcome counts"""
+    class Context:
+        async def add_cookies(self, cookies):
+            if any(c["name"] == "bad" for c in cookies):
+                raise Exception("Invalid cookie fields")
+
+    before_count = cookie_injection_seconds.count()
+    before_failed = cookies_injected_total.value(outcome="failed")
+    cookies = [{"name": "good", "value": "1"}, {"name": "bad", "value": "2"}]
+    asyncio.run(EnhancedCookieInjector.inject_cookie_batch(Context(), cookies))
+
+    assert cookie_injection_seconds.count() == before_count + 1
+    assert cookies_injected_total.value(outcome="failed") == before_failed + 1
+    print("✓ Cookie injection is measured")
+
+
+def test_metrics_endpoint_exposes_phases_and_pool():
+    """Test that /metrics serves the text format with phase and pool metrics"""
+    generation_phase_seconds.observe(1.5, content_type="image", phase="navigate")
+
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'grok_generation_phase_seconds_count{content_type="image",phase="navigate"}' in response.text
+    assert "grok_pool_queue_depth 0" in response.text
+    print("✓ /metrics exposes phase and pool metrics")
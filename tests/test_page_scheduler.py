@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the page scheduler used by the browser pool
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from services.page_scheduler import PageScheduler
+from utils.error_handling import QueueFullError, ErrorHandler
+
+
+def test_scheduler_picks_least_loaded_context():
+    """Test that new pages go to the least-loaded context"""
+    async def run():
+        scheduler = PageScheduler(max_pages_per_context=2, max_queue_size=4)
+        scheduler.register("a")
+        scheduler.register("b")
+
+        first = await scheduler.acquire(1)
+        second = await scheduler.acquire(1)
+        assert {first, second} == {"a", "b"}
+        assert scheduler.available() == 2
+
+    asyncio.run(run())
+    print("✓ Scheduler picks the least-loaded context")
+
+
+def test_scheduler_serves_waiters_in_fifo_order():
+    """Test that queued requests are served first come, first served"""
+    async def run():
+        scheduler = PageScheduler(max_pages_per_context=1, max_queue_size=4)
+        scheduler.register("a")
+        key = await scheduler.acquire(1)
+
+        served = []
+
+        async def wait(name):
+            slot = await scheduler.acquire(1)
+            served.append(name)
+            scheduler.release(slot)
+
+        tasks = [asyncio.create_task(wait(n)) for n in ("first", "second", "third")]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 3
+
+        scheduler.release(key)
+        await asyncio.gather(*tasks)
+        assert served == ["first", "second", "third"]
+
+    asyncio.run(run())
+    print("✓ Scheduler serves waiters in FIFO order")
+
+
+def test_scheduler_rejects_when_queue_full():
+    """Test that a full queue raises QueueFullError with a Retry-After hint"""
+    async def run():
+        scheduler = PageScheduler(max_pages_per_context=1, max_queue_size=1)
+        scheduler.register("a")
+        await scheduler.acquire(1)
+
+        waiter = asyncio.create_task(scheduler.acquire(1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFullError) as exc_info:
+            await scheduler.acquire(1)
+
+        assert exc_info.value.retry_after >= 1
+        assert scheduler.stats()["rejected"] == 1
+        waiter.cancel()
+
+    asyncio.run(run())
+    print("✓ Scheduler rejects requests when the queue is full")
+
+
+def test_scheduler_timeout_leaves_queue():
+    """Test that a timed out waiter is removed from the queue"""
+    async def run():
+        scheduler = PageScheduler(max_pages_per_context=1, max_queue_size=4)
+        scheduler.register("a")
+        await scheduler.acquire(1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.acquire(0.01)
+
+        assert scheduler.queue_depth == 0
+
+    asyncio.run(run())
+    print("✓ Scheduler drops timed out waiters")
+
+
+def test_queue_full_error_maps_to_429():
+    """Test that QueueFullError becomes HTTP 429 with Retry-After"""
+    error = ErrorHandler.handle_exception(QueueFullError("busy", retry_after=7))
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "7"
+    print("✓ QueueFullError maps to HTTP 429")
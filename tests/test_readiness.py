@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the per-call-site readiness conditions
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import readiness
+from services.readiness import (
+    Readiness, ReadinessStats, SelectorCondition, UrlCondition, ResponseCondition, wait_until_ready
+)
+
+
+class FakeResponse:
+    def __init__(self, url, ok=True):
+        self.url = url
+        self.ok = ok
+
+
+class FakePage:
+    def __init__(self, selector_delay=None, url="https://grok.com/"):
+        self.selector_delay = selector_delay
+        self.url = url
+        self.listeners = {}
+
+    async def wait_for_selector(self, selector, **kwargs):
+        if self.selector_delay is None:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(self.selector_delay)
+        return object()
+
+    async def wait_for_url(self, matcher, **kwargs):
+        while not matcher(self.url):
+            await asyncio.sleep(0.01)
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    def emit(self, event, payload):
+        for handler in list(self.listeners.get(event, [])):
+            handler(payload)
+
+
+def with_stats(coro_factory):
+    stats = ReadinessStats()
+    original = readiness.readiness_stats
+    readiness.readiness_stats = stats
+    try:
+        result = asyncio.run(coro_factory())
+    finally:
+        readiness.readiness_stats = original
+    return result, stats.snapshot()
+
+
+def test_first_condition_wins():
+    """Test that the wait returns as soon as any condition holds"""
+    page = FakePage(selector_delay=0.01)
+    result, stats = with_stats(lambda: wait_until_ready(
+        page, "test.site", [SelectorCondition(["textarea"]), UrlCondition(r"/never$")], timeout=5000
+    ))
+    assert result == "selector"
+    assert stats["test.site"]["count"] == 1
+    assert stats["test.site"]["conditions"] == {"selector": 1}
+    assert stats["test.site"]["max_seconds"] < 1
+    print("✓ First readiness condition wins")
+
+
+def test_response_condition_armed_before_action():
+    """Test that a response arriving right after the action is not missed"""
+    page = FakePage()
+
+    async def run():
+        waiter = Readiness(page, "test.response", [
+            SelectorCondition(["#never"]),
+            ResponseCondition(r"/rest/app-chat"),
+        ], timeout=5000)
+        waiter.arm()
+        page.emit("response", FakeResponse("https://grok.com/rest/app-chat/x", ok=False))
+        page.emit("response", FakeResponse("https://grok.com/rest/app-chat/conversations"))
+        return await waiter.wait()
+
+    result, _ = with_stats(run)
+    assert result == "response"
+    assert page.listeners["response"] == []
+    print("✓ Response condition catches responses after arming")
+
+
+def test_timeout_is_recorded():
+    """Test that a wait where nothing holds returns None and counts a timeout"""
+    page = FakePage(url="https://grok.com/chat")
+    result, stats = with_stats(lambda: wait_until_ready(
+        page, "test.timeout", [SelectorCondition(["#never"]), UrlCondition(r"/sign-in")], timeout=50
+    ))
+    assert result is None
+    assert stats["test.timeout"]["timeouts"] == 1
+    print("✓ Readiness timeouts are recorded")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the resource blocking profiles
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from services import resource_blocking
+from services.resource_blocking import apply_blocking_profile, classify, resolve_profile, BlockingStats
+
+
+class FakeRequest:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeRoute:
+    def __init__(self, url):
+        self.request = FakeRequest(url)
+        self.aborted = None
+
+    async def abort(self, error_code=None):
+        self.aborted = error_code
+
+
+class FakeContext:
+    def __init__(self):
+        self.routes = []
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+
+def test_resolve_profiles_and_category_lists():
+    """Test that profile names and category lists resolve, unknown ones fail"""
+    assert resolve_profile("off") == []
+    assert resolve_profile("generation") == ["analytics", "fonts"]
+    assert resolve_profile("fonts, images") == ["fonts", "images"]
+    with pytest.raises(ValueError):
+        resolve_profile("fonts,everything")
+    print("✓ Blocking profiles resolve")
+
+
+def test_classify_urls():
+    """Test that URLs are matched to the first fitting category"""
+    categories = ["analytics", "fonts", "images", "media"]
+    assert classify("https://www.google-analytics.com/g/collect?v=2", categories) == "analytics"
+    assert classify("https://fonts.gstatic.com/s/inter/v12/abc.woff2", categories) == "fonts"
+    assert classify("https://grok.com/static/logo.svg?v=3", categories) == "images"
+    assert classify("https://grok.com/intro.mp4", categories) == "media"
+    assert classify("https://grok.com/rest/app-chat/conversations", categories) is None
+    # Generation contexts keep result images
+    assert classify("https://assets.grok.com/generated/result.png", ["analytics", "fonts"]) is None
+    print("✓ Blocking categories match URLs")
+
+
+def test_apply_profile_blocks_and_counts():
+    """Test that a profile registers one route that aborts and counts matches"""
+    async def run():
+        stats = BlockingStats()
+        original = resource_blocking.blocking_stats
+        resource_blocking.blocking_stats = stats
+        try:
+            context = FakeContext()
+            assert await apply_blocking_profile(context, "off") == []
+            assert context.routes == []
+
+            await apply_blocking_profile(context, "generation")
+            assert len(context.routes) == 1
+            pattern, handler = context.routes[0]
+            assert pattern.search("https://fonts.googleapis.com/css2?family=Inter")
+            assert not pattern.search("https://grok.com/generate/image")
+
+            route = FakeRoute("https://www.googletagmanager.com/gtag/js?id=G-1")
+            await handler(route)
+            assert route.aborted == "blockedbyclient"
+        finally:
+            resource_blocking.blocking_stats = original
+
+        snapshot = stats.snapshot()
+        assert snapshot["contexts"] == {"generation": 1}
+        assert snapshot["blocked"] == {"generation": {"analytics": 1}}
+        assert snapshot["blocked_total"] == 1
+
+    asyncio.run(run())
+    print("✓ Blocking profile aborts and counts requests")
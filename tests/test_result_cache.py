@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the prompt result cache
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from services.grok_service import GrokService
+from services.result_cache import ResultCache, normalize_prompt, set_result_cache
+
+
+def _cache(tmpdir, **kwargs):
+    kwargs.setdefault("ttl", 3600)
+    kwargs.setdefault("max_entries", 10)
+    kwargs.setdefault("max_bytes", 1024)
+    return ResultCache(str(Path(tmpdir) / "index.json"), **kwargs)
+
+
+def _file(tmpdir, name, size=10):
+    path = Path(tmpdir) / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_normalized_prompts_share_entries():
+    """Test that near-identical prompts map to the same cached file"""
+    assert normalize_prompt("  A   Cat on a MAT. ") == "a cat on a mat"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = _cache(tmpdir)
+        path = _file(tmpdir, "cat.png")
+        assert cache.put("image", "A cat on a mat.", path)
+
+        assert cache.get("image", "a cat  on a mat") == path
+        assert cache.get("video", "a cat on a mat") is None
+        assert cache.get("image", "a cat on a mat", {"aspect": "16:9"}) is None
+
+        # The index survives a restart
+        assert _cache(tmpdir).get("image", "A CAT ON A MAT") == path
+    print("✓ Normalized prompts share result cache entries")
+
+
+def test_ttl_and_deleted_files_expire():
+    """Test that stale entries and entries whose file is gone are dropped"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = _cache(tmpdir, ttl=0)
+        cache.put("image", "old", _file(tmpdir, "old.png"))
+        time.sleep(0.01)
+        assert cache.get("image", "old") is None
+
+        cache = _cache(tmpdir)
+        path = _file(tmpdir, "gone.png")
+        cache.put("image", "gone", path)
+        os.remove(path)
+        assert cache.get("image", "gone") is None
+        assert cache.stats()["entries"] == 0
+    print("✓ Expired and deleted results are not served")
+
+
+def test_lru_eviction_by_count_and_bytes():
+    """Test that the least recently used entries go first once a cap is hit"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = _cache(tmpdir, max_entries=2, max_bytes=100)
+        cache.put("image", "one", _file(tmpdir, "1.png"))
+        cache.put("image", "two", _file(tmpdir, "2.png"))
+        cache.get("image", "one")
+        cache.put("image", "three", _file(tmpdir, "3.png"))
+        assert cache.get("image", "two") is None
+        assert cache.get("image", "one") is not None
+
+        # 60 + 10 + 60 bytes is over the 100 byte cap
+        cache.put("image", "big", _file(tmpdir, "big.png", 60))
+        cache.put("image", "bigger", _file(tmpdir, "bigger.png", 60))
+        assert cache.stats()["bytes"] <= 100
+        assert cache.get("image", "bigger") is not None
+        assert not cache.put("image", "huge", _file(tmpdir, "huge.png", 200))
+        # Evicting only forgets the mapping, the file stays
+        assert (Path(tmpdir) / "2.png").exists()
+    print("✓ Result cache evicts least recently used entries")
+
+
+def test_service_answers_repeat_prompts_from_cache():
+    """Test that a cached prompt skips the browser unless the request bypasses it"""
+    class NoBrowserService(GrokService):
+        def __init__(self):
+            self.browser_pool = None
+            self.leases = 0
+
+        def _lease_page(self, content_type=None, page=None):
+            self.leases += 1
+            raise RuntimeError("browser used")
+
+    async def run(tmpdir):
+        cache = _cache(tmpdir)
+        path = _file(tmpdir, "cat.png")
+        cache.put("image", "a cat", path)
+        set_result_cache(cache)
+        enabled = config.RESULT_CACHE_ENABLED
+        config.RESULT_CACHE_ENABLED = True
+        try:
+            service = NoBrowserService()
+            result = await service.generate_image("A cat")
+            assert result.success and result.cached and result.file_path == path
+            assert service.leases == 0
+
+            result = await service.generate_image("A cat", bypass_cache=True)
+            assert not result.success
+            assert service.leases == 1
+        finally:
+            config.RESULT_CACHE_ENABLED = enabled
+            set_result_cache(None)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        asyncio.run(run(tmpdir))
+    print("✓ Repeat prompts are answered from the result cache")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the learned selector cache
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.selector_cache import SelectorCache
+
+
+class FakePage:
+    """Page on grok.com where only the given selectors exist"""
+
+    url = "https://grok.com/generate/image"
+
+    def __init__(self, present):
+        self.present = present
+        self.lookups = []
+
+    async def wait_for_selector(self, selector, timeout=30000, state="visible"):
+        self.lookups.append(selector)
+        if selector in self.present:
+            return f"element:{selector}"
+        await asyncio.sleep(timeout / 1000)
+        raise TimeoutError(f"Timeout waiting for {selector}")
+
+
+SELECTORS = ["textarea[placeholder*='prompt']", "#prompt-input", "[name='prompt']"]
+
+
+def test_cache_learns_matching_selector():
+    """Test that the matched selector is learned, persisted and tried first"""
+    async def run():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, "selectors.json")
+            cache = SelectorCache(cache_file, head_start=50)
+
+            page = FakePage({"#prompt-input"})
+            selector, _ = await cache.find(page, "prompt_input", SELECTORS, timeout=200)
+            assert selector == "#prompt-input"
+            assert len(page.lookups) == 3
+
+            with open(cache_file) as f:
+                assert json.load(f)["grok.com"]["prompt_input"]["selector"] == "#prompt-input"
+
+            # A fresh cache loaded from disk needs a single lookup
+            page = FakePage({"#prompt-input"})
+            reloaded = SelectorCache(cache_file, head_start=50)
+            selector, _ = await reloaded.find(page, "prompt_input", SELECTORS, timeout=200)
+            assert selector == "#prompt-input"
+            assert page.lookups == ["#prompt-input"]
+            assert reloaded.stats()["hits"] == 1
+
+    asyncio.run(run())
+    print("✓ Selector cache learns and persists matching selectors")
+
+
+def test_cache_falls_back_when_learned_selector_disappears():
+    """Test that a stale learned selector counts as a miss and is replaced"""
+    async def run():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SelectorCache(os.path.join(tmpdir, "selectors.json"), head_start=20)
+            cache.record("grok.com", "prompt_input", "#prompt-input", hit=False)
+
+            page = FakePage({"[name='prompt']"})
+            selector, _ = await cache.find(page, "prompt_input", SELECTORS, timeout=200)
+            assert selector == "[name='prompt']"
+
+            entry = cache.stats()["sites"]["grok.com"]["prompt_input"]
+            assert entry["selector"] == "[name='prompt']"
+            assert entry["hits"] == 0
+            assert entry["misses"] == 2
+
+    asyncio.run(run())
+    print("✓ Selector cache relearns when the UI changes")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the multi-account session registry and its endpoints
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from config import config
+from services.cookie_extractor import save_cookies_to_file
+from services.session_registry import SessionRegistry, set_session_registry, DEFAULT_SESSION_ID
+
+COOKIES = [{"name": "sso", "value": "abc", "domain": ".grok.com"}]
+
+
+def test_registry_persists_accounts():
+    """Test that accounts and their cookies survive a reload"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        registry = SessionRegistry(tmpdir)
+        assert registry.session_ids() == [DEFAULT_SESSION_ID]
+
+        account = registry.add(COOKIES, session_id="team-a", label="Team A")
+        assert account["cookie_count"] == 1
+
+        reloaded = SessionRegistry(tmpdir)
+        assert reloaded.session_ids() == ["team-a"]
+        assert reloaded.get("team-a")["label"] == "Team A"
+        assert reloaded.load_cookies("team-a")[0]["value"] == "abc"
+
+        assert reloaded.remove("team-a")
+        assert not reloaded.remove("team-a")
+        assert not os.path.exists(os.path.join(tmpdir, "team-a"))
+
+    print("✓ Session registry persists accounts")
+
+
+def test_default_session_stays_in_rotation():
+    """Test that a usable default cookie file keeps its session next to registered accounts"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cookie_file = config.GROK_COOKIE_FILE_PATH
+        config.GROK_COOKIE_FILE_PATH = os.path.join(tmpdir, "grok_cookies.json")
+        try:
+            registry = SessionRegistry(os.path.join(tmpdir, "accounts"))
+            registry.add(COOKIES, session_id="team-a")
+            assert registry.session_ids() == ["team-a"]
+
+            save_cookies_to_file(COOKIES, config.GROK_COOKIE_FILE_PATH)
+            assert registry.session_ids() == [DEFAULT_SESSION_ID, "team-a"]
+
+            save_cookies_to_file([dict(COOKIES[0], expires=1)], config.GROK_COOKIE_FILE_PATH)
+            assert registry.session_ids() == ["team-a"]
+        finally:
+            config.GROK_COOKIE_FILE_PATH = cookie_file
+
+    print("✓ Default session stays in the rotation while usable")
+
+
+def test_only_accounts_with_usable_cookies_count():
+    """Test that accounts with expired cookies are neither routed to nor make sessions usable"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cookie_file = config.GROK_COOKIE_FILE_PATH
+        config.GROK_COOKIE_FILE_PATH = os.path.join(tmpdir, "missing.json")
+        try:
+            registry = SessionRegistry(os.path.join(tmpdir, "accounts"))
+            registry.add([dict(COOKIES[0], expires=1)], session_id="stale")
+            assert not registry.has_usable_accounts()
+            assert registry.session_ids() == [DEFAULT_SESSION_ID]
+
+            registry.add(COOKIES, session_id="team-a")
+            assert registry.has_usable_accounts()
+            assert registry.session_ids() == ["team-a"]
+
+            reads = []
+            read = SessionRegistry._read_usable_until
+            registry._read_usable_until = lambda path: (reads.append(path), read(path))[1]
+            for _ in range(5):
+                registry.session_ids()
+            # Cached by file signature: unchanged files are not read again
+            assert reads == []
+            registry.add(COOKIES + COOKIES, session_id="stale")
+            assert registry.session_ids() == ["stale", "team-a"]
+            assert len(reads) == 1
+        finally:
+            config.GROK_COOKIE_FILE_PATH = cookie_file
+
+    print("✓ Only accounts with usable cookies are routed to")
+
+
+def test_registry_rejects_invalid_ids():
+    """Test that reserved or path-like session ids are rejected"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        registry = SessionRegistry(tmpdir)
+        for session_id in (DEFAULT_SESSION_ID, "../escape", "a b"):
+            with pytest.raises(ValueError):
+                registry.add(COOKIES, session_id=session_id)
+
+    print("✓ Session registry rejects invalid session ids")
+
+
+def test_account_endpoints():
+    """Test registering, listing and removing accounts over HTTP"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        set_session_registry(SessionRegistry(tmpdir))
+        try:
+            client = TestClient(app)
+            response = client.post("/api/session/accounts", json={"session_id": "team-a", "cookies": COOKIES})
+            assert response.status_code == 201
+            assert response.json()["session_id"] == "team-a"
+            assert "cookie_file" not in response.json()
+
+            response = client.get("/api/session/accounts")
+            assert response.json()["count"] == 1
+            assert response.json()["accounts"][0]["pool"]["browsers"] == 0
+
+            assert client.delete("/api/session/accounts/team-a").status_code == 200
+            assert client.delete("/api/session/accounts/team-a").status_code == 404
+        finally:
+            set_session_registry(None)
+
+    print("✓ Account endpoints work")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-memory session status store
+"""
+
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.session_store import SessionStore
+
+
+def _session(days=30):
+    return {"logged_in": True, "expiry": (datetime.now() + timedelta(days=days)).isoformat()}
+
+
+def test_store_reads_file_once():
+    """Test that repeated status checks are answered from memory"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = SessionStore(Path(tmpdir) / "session.json")
+        assert store.read() is None
+        assert not store.is_valid()
+
+        store.write(_session())
+        for _ in range(5):
+            assert store.is_valid()
+        assert store.loads == 0
+
+        # A second store (e.g. another process) reads it exactly once
+        other = SessionStore(Path(tmpdir) / "session.json")
+        for _ in range(5):
+            assert other.is_valid()
+        assert other.loads == 1
+
+    print("✓ Session store answers from memory")
+
+
+def test_store_picks_up_external_changes():
+    """Test that changes made outside the store are noticed via the file signature"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        session_file = Path(tmpdir) / "session.json"
+        store = SessionStore(session_file)
+        store.write(_session())
+        assert store.is_valid()
+
+        with open(session_file, "w") as f:
+            json.dump(_session(days=-1) | {"note": "expired"}, f)
+        assert not store.is_valid()
+        assert store.read()["note"] == "expired"
+
+        os.remove(session_file)
+        assert store.read() is None
+
+    print("✓ Session store notices external changes")
+
+
+def test_store_delete():
+    """Test that delete removes the file and the cached copy"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = SessionStore(Path(tmpdir) / "session.json")
+        store.write(_session())
+        store.delete()
+        assert not (Path(tmpdir) / "session.json").exists()
+        assert not store.is_valid()
+        store.delete()
+
+    print("✓ Session store delete clears the session")
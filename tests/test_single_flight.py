@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for single-flight coalescing of identical generations
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from models.response_models import GenerationResponse
+from services.single_flight import SingleFlight
+
+
+def test_identical_calls_share_one_run():
+    """Test that concurrent callers with the same key share one run and result"""
+    async def run():
+        flights = SingleFlight()
+        runs = []
+        release = asyncio.Event()
+
+        async def work(report):
+            runs.append(1)
+            await release.wait()
+            report("downloading", 0.9)
+            return GenerationResponse(success=True, file_path="/output/cat.png")
+
+        first_reports, second_reports = [], []
+        first = asyncio.create_task(flights.run("cat", work, lambda *a: first_reports.append(a)))
+        second = asyncio.create_task(flights.run("cat", work, lambda *a: second_reports.append(a)))
+        other = asyncio.create_task(flights.run("dog", work))
+        await asyncio.sleep(0)
+        assert flights.stats()["in_flight"] == 2
+
+        release.set()
+        results = await asyncio.gather(first, second, other)
+        assert results[0] is results[1]
+        assert len(runs) == 2
+        assert first_reports == second_reports == [("downloading", 0.9)]
+        assert flights.stats() == {"in_flight": 0, "waiting": 0, "started": 2, "coalesced": 1}
+
+        # A later call with the same key starts a new run
+        await flights.run("cat", work)
+        assert len(runs) == 3
+
+    asyncio.run(run())
+    print("✓ Identical in-flight generations are coalesced")
+
+
+def test_failure_reaches_every_caller_and_cancel_is_isolated():
+    """Test that errors are shared and one caller going away doesn't cancel the run"""
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work(report):
+            await release.wait()
+            raise RuntimeError("browser crashed")
+
+        first = asyncio.create_task(flights.run("cat", work))
+        second = asyncio.create_task(flights.run("cat", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(RuntimeError):
+            await second
+        assert first.cancelled()
+
+    asyncio.run(run())
+    print("✓ Coalesced callers share failures but not cancellation")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unit tests for storage state snapshots
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.storage_state import StorageStateStore
+from services.session_registry import SessionRegistry
+
+
+class FakeContext:
+    def __init__(self, state):
+        self.state = state
+
+    async def storage_state(self):
+        return self.state
+
+
+STATE = {
+    "cookies": [
+        {"name": "sso", "value": "a", "domain": ".grok.com", "path": "/", "expires": -1},
+        {"name": "old", "value": "b", "domain": ".grok.com", "path": "/", "expires": 1000},
+    ],
+    "origins": [{"origin": "https://grok.com", "localStorage": [{"name": "theme", "value": "dark"}]}],
+}
+
+
+def test_capture_and_restore():
+    """Test that a snapshot round-trips cookies and localStorage, minus expired cookies"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = StorageStateStore(os.path.join(tmpdir, "state.json"))
+        assert store.load() is None
+
+        snapshot = asyncio.run(store.capture(FakeContext(STATE), "cookie_injection"))
+        assert snapshot["cookie_count"] == 2
+        assert snapshot["origin_count"] == 1
+
+        state = store.load()
+        assert [c["name"] for c in state["cookies"]] == ["sso"]
+        assert state["origins"][0]["localStorage"][0]["value"] == "dark"
+
+        assert store.load(newer_than=time.time() + 60) is None
+        store.delete()
+        assert store.load() is None
+
+    print("✓ Storage state snapshots round-trip")
+
+
+def test_registry_ignores_snapshot_older_than_cookies():
+    """Test that replacing an account's cookies invalidates its snapshot"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        registry = SessionRegistry(tmpdir)
+        registry.add([{"name": "sso", "value": "a", "domain": ".grok.com"}], session_id="team-a")
+        asyncio.run(registry.storage_state_store("team-a").capture(FakeContext(STATE), "test"))
+        assert registry.load_storage_state("team-a") is not None
+
+        cookie_file = registry.get("team-a")["cookie_file"]
+        later = time.time() + 60
+        os.utime(cookie_file, (later, later))
+        assert registry.load_storage_state("team-a") is None
+
+    print("✓ Registry ignores stale storage state snapshots")
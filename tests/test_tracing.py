@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for request tracing and the OTLP/JSON file exporter
+"""
+
+import sys
+import os
+import json
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils import tracing
+from utils.tracing import Tracer, JsonFileExporter
+
+
+class RecordingExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+
+def test_child_spans_share_the_trace():
+    """Test that nested and awaited spans become children of the open span"""
+    exporter = RecordingExporter()
+    tracer = Tracer(exporter, enabled=True)
+
+    async def child():
+        with tracer.span("child", selector="#prompt") as span:
+            return span
+
+    async def run():
+        with tracer.span("root", kind="server") as root:
+            inner = await asyncio.create_task(child())
+        return root, inner
+
+    root, inner = asyncio.run(run())
+    assert len(exporter.traces) == 1
+    assert [s.name for s in exporter.traces[0]] == ["child", "root"]
+    assert inner.trace_id == root.trace_id
+    assert inner.parent_span_id == root.span_id
+    assert inner.attributes == {"selector": "#prompt"}
+    assert tracer.current_span() is None
+    print("✓ Child spans share the trace of the open span")
+
+
+def test_exception_marks_span_as_error():
+    """Test that an exception leaving a span is recorded and re-raised"""
+    exporter = RecordingExporter()
+    tracer = Tracer(exporter, enabled=True)
+
+    with pytest.raises(TimeoutError):
+        with tracer.span("playwright.goto", url="https://grok.com"):
+            raise TimeoutError("Timeout 30000ms exceeded")
+
+    span = exporter.traces[0][0]
+    otlp = span.to_otlp()
+    assert otlp["status"] == {"code": 2, "message": "Timeout 30000ms exceeded"}
+    assert otlp["events"][0]["name"] == "exception"
+    print("✓ Exceptions mark the span as failed")
+
+
+def test_late_span_is_exported_on_its_own():
+    """Test that a span ending after its root is exported instead of kept around"""
+    exporter = RecordingExporter()
+    tracer = Tracer(exporter, enabled=True)
+
+    async def run():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def background():
+            with tracer.span("background"):
+                started.set()
+                await release.wait()
+
+        with tracer.span("root"):
+            task = asyncio.create_task(background())
+            await started.wait()
+        release.set()
+        await task
+
+    asyncio.run(run())
+    assert [[s.name for s in spans] for spans in exporter.traces] == [["root"], ["background"]]
+    assert tracer._finished == {}
+    print("✓ Spans outliving their root are exported separately")
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    """Test that each trace is appended as one OTLP ExportTraceServiceRequest line"""
+    export_file = tmp_path / "traces.jsonl"
+    tracer = Tracer(JsonFileExporter(str(export_file)), enabled=True)
+
+    with tracer.span("POST /api/grok/image", kind="server", **{"http.status_code": 200}):
+        with tracer.span("playwright.find", selectors=["textarea", "input"], timeout=5000, hit=True):
+            pass
+
+    tracer.flush()
+    lines = export_file.read_text().splitlines()
+    assert len(lines) == 1
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    find, request = spans
+    assert request["kind"] == 2 and "parentSpanId" not in request
+    assert find["parentSpanId"] == request["spanId"]
+    attributes = {a["key"]: a["value"] for a in find["attributes"]}
+    assert attributes["timeout"] == {"intValue": "5000"}
+    assert attributes["hit"] == {"boolValue": True}
+    assert attributes["selectors"]["arrayValue"]["values"][0] == {"stringValue": "textarea"}
+    print("✓ Traces are exported as OTLP/JSON lines")
+
+
+def test_disabled_tracer_is_a_no_op():
+    """Test that a disabled tracer yields no span and exports nothing"""
+    exporter = RecordingExporter()
+    tracer = Tracer(exporter, enabled=False)
+
+    with tracer.span("root") as span:
+        assert span is None
+        assert tracer.current_span() is None
+    assert exporter.traces == []
+    print("✓ Disabled tracing is a no-op")
+
+
+def test_api_requests_open_a_server_span(monkeypatch):
+    """Test that the HTTP middleware traces API requests"""
+    exporter = RecordingExporter()
+    monkeypatch.setattr(tracing, "tracer", Tracer(exporter, enabled=True))
+
+    response = TestClient(app).get("/")
+    assert response.status_code == 200
+
+    request = exporter.traces[-1][-1]
+    assert request.name == "GET /"
+    assert request.kind == "server"
+    assert request.attributes["http.status_code"] == 200
+    assert request.attributes["http.route"] == "/"
+    print("✓ API requests open a server span")
+
+
+def test_middleware_passes_requests_through_when_disabled(monkeypatch):
+    """Test that with tracing off the middleware opens no span"""
+    exporter = RecordingExporter()
+    monkeypatch.setattr(tracing, "tracer", Tracer(exporter, enabled=False))
+
+    response = TestClient(app).get("/")
+    assert response.status_code == 200
+    assert exporter.traces == []
+    print("✓ Tracing middleware is a pass-through when disabled")
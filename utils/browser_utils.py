@@ -1,35 +1,63 @@
 import asyncio
 import logging
-from typing import Optional, List, Dict
-from playwright.async_api import Page, Locator
+from typing import Optional, List, Dict, Tuple
+from playwright.async_api import Page, Locator, ElementHandle
 
 class BrowserUtils:
     """
     Utility functions for browser automation
     """
     
+    @staticmethod
+    async def race_selectors(
+        page: Page,
+        selectors: List[str],
+        timeout: int = 10000,
+        visible: bool = True
+    ) -> Tuple[Optional[str], Optional[ElementHandle]]:
+        """
+        Wait on all candidate selectors at once and return the first one
+        that matches together with its element, or (None, None) on timeout.
+        When several match at the same time the earliest in the list wins.
+        """
+        if not selectors:
+            return None, None
+            
+        state = "visible" if visible else "attached"
+        tasks = {
+            asyncio.create_task(page.wait_for_selector(selector, timeout=timeout, state=state)): selector
+            for selector in selectors
+        }
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                matches = [
+                    task for task in done
+                    if not task.cancelled() and task.exception() is None and task.result() is not None
+                ]
+                if matches:
+                    winner = min(matches, key=lambda task: selectors.index(tasks[task]))
+                    return tasks[winner], winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+                
+        return None, None
+        
     @staticmethod
     async def wait_for_element(
         page: Page,
         selectors: List[str],
         timeout: int = 10000,
         visible: bool = True
-    ) -> Optional[Locator]:
+    ) -> Optional[ElementHandle]:
         """
         Wait for any of the specified elements to appear
         """
-        for selector in selectors:
-            try:
-                element = await page.wait_for_selector(
-                    selector,
-                    timeout=timeout,
-                    state="visible" if visible else "attached"
-                )
-                if element:
-                    return element
-            except Exception:
-                continue
-        return None
+        _, element = await BrowserUtils.race_selectors(page, selectors, timeout, visible)
+        return element
         
     @staticmethod
     async def wait_for_navigation(
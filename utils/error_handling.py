@@ -1,6 +1,7 @@
 import logging
 from fastapi import HTTPException
 from typing import Optional
+from utils.tracing import trace_ids
 
 class AIServiceError(Exception):
     """Base exception for AI service errors"""
@@ -18,6 +19,13 @@ class BrowserError(AIServiceError):
     """Browser automation errors"""
     pass
 
+class QueueFullError(AIServiceError):
+    """Too many pending requests, the client should retry later"""
+    
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class ErrorHandler:
     """
     Centralized error handling for the API
@@ -40,6 +48,12 @@ class ErrorHandler:
                 status_code=422,
                 detail=f"Generation error: {str(e)}"
             )
+        elif isinstance(e, QueueFullError):
+            return HTTPException(
+                status_code=429,
+                detail=f"Server busy: {str(e)}",
+                headers={"Retry-After": str(e.retry_after)}
+            )
         elif isinstance(e, BrowserError):
             return HTTPException(
                 status_code=503,
@@ -58,5 +72,6 @@ class ErrorHandler:
         """
         Log error with context
         """
+        kwargs = {**kwargs, **trace_ids()}
         extra_info = ", ".join(f"{k}={v}" for k, v in kwargs.items())
         logging.error(f"{context}: {str(error)} | {extra_info}", exc_info=True)
\ No newline at end of file
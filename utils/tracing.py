@@ -0,0 +1,292 @@
+"""
+Lightweight request tracing
+
+Spans link an API request to the service calls and Playwright operations
+it triggers. The current span is kept in a contextvar, so spans opened in
+awaited coroutines (and in tasks created while a span is open) become its
+children without passing anything around.
+
+Finished traces are appended to TRACE_EXPORT_FILE as JSON lines in the
+OTLP/JSON format (one ExportTraceServiceRequest per trace, as written by
+the OpenTelemetry collector's file exporter), so they can be loaded into
+any OpenTelemetry-compatible viewer. Traces are serialized and written by a
+background thread, never on the event loop.
+
+Tracing is off unless TRACING_ENABLED is set; span() is then a no-op and
+TracingMiddleware passes requests straight through.
+"""
+
+import json
+import logging
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator, Callable
+from config import config
+
+logger = logging.getLogger(__name__)
+
+SCOPE_NAME = "ai-browser-automation"
+
+_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class Span:
+    """
+    One timed operation with attributes, events and a status
+    """
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_span_id", "name", "kind",
+        "start_ns", "end_ns", "attributes", "events", "status_code", "status_message",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], kind: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = 0
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, error: BaseException):
+        self.add_event("exception", **{"exception.type": type(error).__name__, "exception.message": str(error)})
+        self.status_code = 2
+        self.status_message = str(error)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _SPAN_KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {
+                    "timeUnixNano": str(e["time_ns"]),
+                    "name": e["name"],
+                    "attributes": _otlp_attributes(e["attributes"]),
+                }
+                for e in self.events
+            ],
+            "status": {"code": self.status_code, "message": self.status_message} if self.status_code else {},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class JsonFileExporter:
+    """
+    Appends each finished trace to a JSON lines file from a background thread
+    """
+
+    def __init__(self, export_file: Optional[str] = None):
+        self.export_file = Path(export_file or config.TRACE_EXPORT_FILE)
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, spans: List[Span]):
+        """Queue a finished trace for writing; returns right away"""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        self._queue.put(spans)
+
+    def flush(self):
+        """Block until every queued trace is written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self._write(spans)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, spans: List[Span]):
+        document = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SCOPE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": SCOPE_NAME},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        try:
+            line = json.dumps(document, ensure_ascii=False)
+            self.export_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.export_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except Exception as e:
+            logger.warning(f"Could not export trace: {str(e)}")
+
+
+class Tracer:
+    """
+    Creates spans and hands each trace to the exporter once its root span ends
+    """
+
+    def __init__(self, exporter: Optional[JsonFileExporter] = None, enabled: Optional[bool] = None):
+        self.exporter = exporter
+        self.enabled = config.TRACING_ENABLED if enabled is None else enabled
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+        # Finished spans per trace, exported with the root span
+        self._finished: Dict[str, List[Span]] = {}
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Time the block as a child of the current span (or as a new trace)
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = self._current.get()
+        trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        span = Span(name, trace_id, parent.span_id if parent is not None else None, kind, attributes)
+        if parent is None:
+            self._finished[trace_id] = []
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            self._current.reset(token)
+            self._finish(span, is_root=parent is None)
+
+    def _finish(self, span: Span, is_root: bool):
+        spans = self._finished.get(span.trace_id)
+        if spans is None:
+            # Ended after its root, e.g. in a task that outlived the request
+            self._export([span])
+            return
+
+        spans.append(span)
+        if is_root:
+            del self._finished[span.trace_id]
+            self._export(spans)
+
+    def _export(self, spans: List[Span]):
+        if self.exporter is None:
+            self.exporter = JsonFileExporter()
+        self.exporter.export(spans)
+
+    def flush(self):
+        """Wait until exported traces are written"""
+        flush = getattr(self.exporter, "flush", None)
+        if flush is not None:
+            flush()
+
+
+tracer = Tracer()
+
+
+def span(name: str, kind: str = "internal", **attributes: Any):
+    """Open a span on the process-wide tracer"""
+    return tracer.span(name, kind, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return tracer.current_span()
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """
+    Decorator that wraps every call of an async function in a span
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(span_name, **attributes):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_ids() -> Dict[str, str]:
+    """Trace and span id of the current span, for log lines"""
+    current = tracer.current_span()
+    if current is None:
+        return {}
+    return {"trace_id": current.trace_id, "span_id": current.span_id}
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of a trace for every HTTP request.
+
+    Pure ASGI, so streamed (SSE/NDJSON) responses pass through unbuffered and
+    the span covers the whole stream.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        with span(f"{method} {path}", kind="server", **{"http.method": method, "url.path": path}) as current:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    current.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # The router records the matched route in the shared scope
+                current.set_attribute("http.route", getattr(scope.get("route"), "path", None))